@@ -41,21 +41,24 @@ def local_neighborhood(network_file: Path, nodes_file: Path, output_file: Path):
             nodes.add(line.strip())
     print(f"Read {len(nodes)} unique nodes")
 
-    # Iterate through the network edges and write those that have an endpoint in the node set
+    # Filter the network edges to those that have an endpoint in the node set
+    # The output is only written once the whole network has been checked so that a badly formatted network does not
+    # leave a partial output file behind
+    kept_edges = []
     in_edge_counter = 0
-    out_edge_counter = 0
+    with network_file.open() as network_f:
+        for line in network_f:
+            line = line.strip()
+            in_edge_counter += 1
+            node1, sep, node2 = line.partition("|")
+            if not sep or "|" in node2:
+                raise ValueError(f"Edge {line} does not contain 2 nodes separated by '|'")
+            if node1 in nodes or node2 in nodes:
+                kept_edges.append(line)
+
     with output_file.open('w') as output_f:
-        with network_file.open() as network_f:
-            for line in network_f:
-                line = line.strip()
-                in_edge_counter += 1
-                endpoints = line.split("|")
-                if len(endpoints) != 2:
-                    raise ValueError(f"Edge {line} does not contain 2 nodes separated by '|'")
-                if endpoints[0] in nodes or endpoints[1] in nodes:
-                    out_edge_counter += 1
-                    output_f.write(f"{line}\n")
-    print(f"Kept {out_edge_counter} of {in_edge_counter} edges")
+        output_f.writelines(f"{edge}\n" for edge in kept_edges)
+    print(f"Kept {len(kept_edges)} of {in_edge_counter} edges")
 
 
 def main():
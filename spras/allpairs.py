@@ -1,15 +1,21 @@
 import warnings
 from pathlib import Path
 
-from spras.config.container_schema import ProcessedContainerSettings
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
 from spras.config.util import Empty
-from spras.containers import prepare_volume, run_container_and_log
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.dataset import Dataset
 from spras.interactome import (
     convert_undirected_to_directed,
     has_direction,
     reinsert_direction_col_undirected,
 )
+from spras.native.allpairs import (
+    read_network,
+    read_node_types,
+    shortest_path_edges,
+    write_edges,
+)
 from spras.prm import PRM
 from spras.util import add_rank_column, duplicate_edges, raw_pathway_df
 
@@ -19,6 +25,7 @@ __all__ = ['AllPairs']
 class AllPairs(PRM[Empty]):
     required_inputs = ['nodetypes', 'network', 'directed_flag']
     dois = []
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data: Dataset, filename_map):
@@ -76,29 +83,30 @@ class AllPairs(PRM[Empty]):
         if not container_settings: container_settings = ProcessedContainerSettings()
         AllPairs.validate_required_run_args(inputs)
 
-        work_dir = '/apsp'
+        directed = Path(inputs["directed_flag"]).read_text().strip() == "true"
+        if container_settings.backend == ExecutionBackend.native:
+            AllPairs.run_native(inputs, output_file, directed)
+            return
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        work_dir = '/apsp'
 
-        bind_path, node_file = prepare_volume(inputs["nodetypes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, network_file = prepare_volume(inputs["network"], work_dir, container_settings)
-        volumes.append(bind_path)
+        node_file = volumes.add(inputs["nodetypes"])
+        network_file = volumes.add(inputs["network"])
 
         # Create the parent directories for the output file if needed
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_file = prepare_volume(output_file, work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_file = volumes.add(output_file)
 
         command = ['python',
                    '/AllPairs/all-pairs-shortest-paths.py',
                    '--network', network_file,
                    '--nodes', node_file,
                    '--output', mapped_out_file]
-        if Path(inputs["directed_flag"]).read_text().strip() == "true":
+        if directed:
             command.append("--directed")
 
         container_suffix = "allpairs:v4"
@@ -106,11 +114,22 @@ class AllPairs(PRM[Empty]):
             'All Pairs Shortest Paths',
             container_suffix,
             command,
-            volumes,
+            volumes.binds,
             work_dir,
             out_dir,
             container_settings)
 
+    @staticmethod
+    def run_native(inputs, output_file, directed: bool):
+        """
+        Find the shortest paths in process with spras.native.allpairs instead of the allpairs container.
+        Every source is searched once for all targets. When several shortest paths tie, the path that is kept can differ
+        from the container's.
+        """
+        network = read_network(inputs["network"], directed)
+        sources, targets = read_node_types(inputs["nodetypes"])
+        write_edges(shortest_path_edges(network, sources, targets), output_file)
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         """
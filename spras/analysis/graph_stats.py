@@ -0,0 +1,187 @@
+"""
+Graph statistics for the pathway summary table computed over sparse CSR arrays with scipy.sparse.csgraph.
+
+Pathways are summarized as undirected graphs. The connected components are found once, and one breadth first search
+from each node of a component gives both the eccentricities for the diameter and the distance sums for the average
+shortest path length. Components with more nodes than a cutoff can instead be searched from a random sample of their
+nodes, which estimates the average path length and gives a lower bound on the diameter.
+"""
+
+from pathlib import Path
+from statistics import median
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from spras.config.schema import SummaryPathLengths
+from spras.util import LoosePathLike
+
+__all__ = ['NetworkStatistics', 'read_network', 'summary_statistics']
+
+# The most distances held in memory at once, as the number of search sources times the component size
+MAX_DISTANCES = 2 ** 22
+
+
+def read_network(network_file: LoosePathLike) -> tuple[list[str], list[str]]:
+    """
+    Read the edges of a pathway file in the universal format, skipping the header line.
+    Columns are separated by tabs, so node names can contain spaces, and lines with fewer than two columns are
+    skipped.
+    @param network_file: the pathway file
+    @return: the first and second node of each edge
+    """
+    node1 = []
+    node2 = []
+    with open(network_file) as f:
+        next(f, None)
+        for line in f:
+            fields = line.rstrip('\r\n').split('\t')
+            if len(fields) >= 2:
+                node1.append(fields[0].strip())
+                node2.append(fields[1].strip())
+    return node1, node2
+
+
+class NetworkStatistics:
+    """
+    Summary statistics of an undirected graph, where repeated edges are counted once.
+    """
+
+    def __init__(self, node1: list[str], node2: list[str]):
+        """
+        @param node1: the first node of each edge
+        @param node2: the second node of each edge
+        """
+        # Nodes are numbered in the order they first appear, so components are in the order networkx finds them
+        codes, nodes = pd.factorize(np.column_stack([np.asarray(node1, dtype=object),
+                                                     np.asarray(node2, dtype=object)]).ravel())
+        self.nodes = pd.Index(nodes)
+        n = len(self.nodes)
+        u, v = codes[0::2], codes[1::2]
+        low, high = np.minimum(u, v), np.maximum(u, v)
+        edges = np.unique(np.stack([low, high]), axis=1) if len(u) else np.empty((2, 0), dtype=np.int64)
+        low, high = edges
+        loops = low == high
+
+        self.number_of_edges = edges.shape[1]
+        adjacency = sparse.csr_array((np.ones(2 * np.count_nonzero(~loops), dtype=np.int8),
+                                      (np.concatenate([low[~loops], high[~loops]]),
+                                       np.concatenate([high[~loops], low[~loops]]))), shape=(n, n))
+        self.adjacency = adjacency
+        # As in networkx, a self loop adds 2 to the degree of its node
+        self.degrees = np.diff(adjacency.indptr) + 2 * np.bincount(low[loops], minlength=n)
+        self.number_of_components, self.component_labels = csgraph.connected_components(adjacency, directed=False)
+
+    @staticmethod
+    def from_file(network_file: LoosePathLike) -> 'NetworkStatistics':
+        """
+        Read a pathway file in the universal format
+        """
+        return NetworkStatistics(*read_network(network_file))
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def density(self) -> float:
+        """
+        The density as computed by networkx, where self loops count as edges.
+        An empty pathway has density 0.0, and networkx gives a single node with a self loop a density of 0.
+        """
+        n = self.number_of_nodes
+        if n == 0:
+            return 0.0
+        if self.number_of_edges == 0 or n <= 1:
+            return 0
+        return self.number_of_edges / (n * (n - 1)) * 2
+
+    def max_degree(self) -> int:
+        return int(self.degrees.max()) if self.number_of_nodes > 0 else 0
+
+    def median_degree(self) -> float:
+        return median(self.degrees.tolist()) if self.number_of_nodes > 0 else 0.0
+
+    def path_lengths(self, mode: SummaryPathLengths = SummaryPathLengths.exact, sampling_cutoff: int = 10000,
+                     samples: int = 500, seed: Optional[int] = 0) -> tuple[int, float]:
+        """
+        The largest diameter of the connected components and the mean of their average shortest path lengths.
+        Components with a single node have diameter 0 and average shortest path length 0.0.
+        @param mode: exact to search from every node, or sampled to search from a random sample of the nodes of the
+        components with more than sampling_cutoff nodes
+        @param sampling_cutoff: the largest component that is always searched from every node
+        @param samples: the number of nodes to search from in each sampled component
+        @param seed: the seed of the node samples
+        @return: the max diameter and the average path length
+        """
+        mode = SummaryPathLengths(mode)
+        rng = np.random.default_rng(seed)
+        order = np.argsort(self.component_labels, kind='stable')
+        bounds = np.searchsorted(self.component_labels[order], np.arange(self.number_of_components + 1))
+
+        diameters = []
+        average_path_lengths = []
+        for label in range(self.number_of_components):
+            members = order[bounds[label]:bounds[label + 1]]
+            if len(members) < 2:
+                diameters.append(0)
+                average_path_lengths.append(0.0)
+                continue
+
+            component = sparse.csr_array(self.adjacency[members][:, members])
+            size = len(members)
+            if mode == SummaryPathLengths.sampled and size > sampling_cutoff:
+                sources = rng.choice(size, size=min(samples, size), replace=False)
+                eccentricities, distance_sums = _search(component, sources)
+                # Searching again from the node farthest from the first sample tightens the diameter bound
+                farthest = int(np.argmax(_distances(component, sources[:1])[0]))
+                diameter = max(int(eccentricities.max()), int(_search(component, np.array([farthest]))[0][0]))
+                average_path_length = float(distance_sums.sum() / (len(sources) * (size - 1)))
+            else:
+                eccentricities, distance_sums = _search(component, np.arange(size))
+                diameter = int(eccentricities.max())
+                average_path_length = int(distance_sums.sum()) / (size * (size - 1))
+            diameters.append(diameter)
+            average_path_lengths.append(average_path_length)
+
+        max_diameter = max(diameters, default=0)
+        avg_path_len = sum(average_path_lengths) / len(average_path_lengths) if average_path_lengths else 0.0
+        return max_diameter, avg_path_len
+
+
+def _distances(component: sparse.csr_array, sources: np.ndarray) -> np.ndarray:
+    return csgraph.shortest_path(component, method='D', directed=False, unweighted=True, indices=sources)
+
+
+def _search(component: sparse.csr_array, sources: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The eccentricity and the sum of the distances to all other nodes of each source in a connected graph, from one
+    breadth first search per source run in batches
+    """
+    batch_size = max(1, MAX_DISTANCES // component.shape[0])
+    eccentricities = np.empty(len(sources), dtype=np.int64)
+    distance_sums = np.empty(len(sources), dtype=np.int64)
+    for start in range(0, len(sources), batch_size):
+        distances = _distances(component, sources[start:start + batch_size])
+        eccentricities[start:start + batch_size] = distances.max(axis=1)
+        distance_sums[start:start + batch_size] = distances.sum(axis=1)
+    return eccentricities, distance_sums
+
+
+def summary_statistics(network_file: Path, path_lengths: SummaryPathLengths = SummaryPathLengths.exact,
+                       sampling_cutoff: int = 10000, path_length_samples: int = 500) -> tuple[NetworkStatistics, list]:
+    """
+    The graph statistics of a pathway in the order of the summary table columns
+    @param network_file: the pathway file
+    @param path_lengths: how shortest path lengths are computed, see NetworkStatistics.path_lengths
+    @param sampling_cutoff: the largest component that is always searched from every node
+    @param path_length_samples: the number of nodes to search from in each sampled component
+    @return: the network statistics and the number of nodes, number of edges, number of connected components,
+    density, max degree, median degree, max diameter and average path length
+    """
+    stats = NetworkStatistics.from_file(network_file)
+    max_diameter, avg_path_len = stats.path_lengths(path_lengths, sampling_cutoff, path_length_samples)
+    return stats, [stats.number_of_nodes, stats.number_of_edges, stats.number_of_components, stats.density(),
+                   stats.max_degree(), stats.median_degree(), max_diameter, avg_path_len]
@@ -0,0 +1,172 @@
+from os import PathLike
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class PathwayNodeMatrix:
+    """
+    A sparse binary matrix with a row for every node in a shared node index and a column for every pathway, where an
+    entry is 1 if the node is an endpoint of an edge in the pathway.
+    Build it once with from_files and share it between the analyses that compare pathways by their nodes.
+    """
+
+    def __init__(self, nodes: pd.Index, pathways: list[Union[str, PathLike]], matrix: sparse.csc_array):
+        """
+        @param nodes: the node index, which labels the rows
+        @param pathways: the pathway files, which label the columns
+        @param matrix: the node-by-pathway incidence matrix
+        """
+        self.nodes = nodes
+        self.pathways = pathways
+        self.matrix = matrix
+
+    @staticmethod
+    def from_files(file_paths: Iterable[Union[str, PathLike]]) -> 'PathwayNodeMatrix':
+        """
+        Read the nodes of pathway files in the universal format, with the columns 'Node1', 'Node2', 'Rank' and
+        'Direction'. Each file is read once and the nodes of all files are encoded against one node index.
+        @param file_paths: the pathway files
+        """
+        pathways = list(file_paths)
+        nodes_per_pathway = []
+        for file_path in pathways:
+            df = pd.read_table(file_path, sep='\t', header=0, usecols=['Node1', 'Node2'])
+            nodes_per_pathway.append(np.concatenate([df['Node1'].to_numpy(dtype=object), df['Node2'].to_numpy(dtype=object)]))
+        return PathwayNodeMatrix.from_node_lists(pathways, nodes_per_pathway)
+
+    @staticmethod
+    def from_node_lists(pathways: list[Union[str, PathLike]], nodes_per_pathway: list[Iterable]) -> 'PathwayNodeMatrix':
+        """
+        Encode the nodes of pathways that were already read against one node index
+        @param pathways: the pathway files
+        @param nodes_per_pathway: the nodes of each pathway, which can repeat
+        """
+        nodes_per_pathway = [np.asarray(list(nodes), dtype=object) for nodes in nodes_per_pathway]
+        all_nodes = np.concatenate(nodes_per_pathway) if nodes_per_pathway else np.array([], dtype=object)
+        codes, nodes = pd.factorize(all_nodes)
+        columns = np.repeat(np.arange(len(pathways)), [len(p) for p in nodes_per_pathway])
+        matrix = sparse.csc_array((np.ones(len(codes), dtype=np.int64), (codes, columns)),
+                                  shape=(len(nodes), len(pathways)))
+        # A node is counted once per pathway, however many of its edges the pathway has
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return PathwayNodeMatrix(pd.Index(nodes), pathways, matrix)
+
+    def select(self, file_paths: Iterable[Union[str, PathLike]]) -> 'PathwayNodeMatrix':
+        """
+        The columns of some of the pathways, in the given order
+        @param file_paths: pathway files that are columns of this matrix
+        """
+        file_paths = list(file_paths)
+        columns = pd.Index([str(p) for p in self.pathways]).get_indexer([str(p) for p in file_paths])
+        if (columns < 0).any():
+            missing = [p for p, c in zip(file_paths, columns, strict=True) if c < 0]
+            raise ValueError(f'Pathways {missing} are not in the node-by-pathway matrix')
+        return PathwayNodeMatrix(self.nodes, file_paths, sparse.csc_array(self.matrix[:, columns]))
+
+    def node_mask(self, nodes: Iterable) -> np.ndarray:
+        """
+        A boolean vector over the node index that is true for the given nodes. Nodes that are not in any pathway are
+        ignored.
+        """
+        positions = self.nodes.get_indexer(pd.unique(pd.Series(list(nodes), dtype=object)))
+        mask = np.zeros(len(self.nodes), dtype=bool)
+        mask[positions[positions >= 0]] = True
+        return mask
+
+    def property_mask(self, node_table: pd.DataFrame, columns: list[str]) -> np.ndarray:
+        """
+        A boolean node-by-column matrix over the node index that is true where a node has a property, which is a
+        value greater than 0 or True in a node table column. Nodes of the node table that are not in any pathway
+        are ignored.
+        @param node_table: a node table with the node identifiers in its 'NODEID' column
+        @param columns: the node property columns
+        """
+        positions = self.nodes.get_indexer(node_table['NODEID'])
+        has_property = (node_table[columns] > 0).to_numpy(dtype=bool)
+        mask = np.zeros((len(self.nodes), len(columns)), dtype=bool)
+        in_pathways = positions >= 0
+        np.logical_or.at(mask, positions[in_pathways], has_property[in_pathways])
+        return mask
+
+    def pathway_sizes(self) -> np.ndarray:
+        """
+        The number of nodes in each pathway
+        """
+        return np.diff(self.matrix.indptr)
+
+    def overlap_counts(self, mask: np.ndarray) -> np.ndarray:
+        """
+        The number of nodes of each pathway for which mask is true
+        @param mask: a boolean vector, or a boolean matrix with one column per node set, over the node index
+        @return: the counts, with one row per pathway and one column per node set if mask is a matrix
+        """
+        return self.matrix.T @ mask.astype(np.int64)
+
+
+# The ways an edge gold standard and the predicted edges can be compared, which match the mixed, undirected and
+# directed edge tables of an edge gold standard
+EDGE_DIRECTIONALITIES = ('mixed', 'undirected', 'directed')
+
+
+class EdgeKeyEncoder:
+    """
+    Encodes edges as integer keys over a shared node index so that sets of edges can be compared with NumPy instead of
+    by joining tables of node names. An undirected edge gets the same key whichever order its nodes are in, and never
+    the key of a directed edge.
+    """
+
+    def __init__(self, nodes: Iterable):
+        """
+        @param nodes: every node of the edges that will be encoded, in any order and with repeats
+        """
+        self.nodes = pd.Index(pd.unique(pd.Series(list(nodes), dtype=object)))
+
+    def keys(self, node1: Iterable, node2: Iterable, directed: np.ndarray, directionality: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The keys of the edges when they are compared with the given directionality
+        - mixed: undirected edges are order-independent and directed edges keep their direction
+        - undirected: every edge is treated as undirected
+        - directed: every undirected edge is treated as the pair of directed edges between its nodes
+        @param node1: the first node of each edge
+        @param node2: the second node of each edge
+        @param directed: a boolean vector that is true for the directed edges
+        @param directionality: one of EDGE_DIRECTIONALITIES
+        @return: the key of each encoded edge and the position of the input edge it came from. Keys can repeat.
+        """
+        if directionality not in EDGE_DIRECTIONALITIES:
+            raise ValueError(f'Unknown edge directionality {directionality}. Expected one of {EDGE_DIRECTIONALITIES}.')
+        u = self.nodes.get_indexer(pd.Series(list(node1), dtype=object))
+        v = self.nodes.get_indexer(pd.Series(list(node2), dtype=object))
+        if (u < 0).any() or (v < 0).any():
+            raise ValueError('Edges have nodes that are not in the node index')
+        directed = np.asarray(directed, dtype=bool)
+        positions = np.arange(len(u))
+
+        if directionality == 'undirected':
+            directed = np.zeros(len(u), dtype=bool)
+        elif directionality == 'directed':
+            reverse = np.flatnonzero(~directed)
+            positions = np.concatenate([positions, reverse])
+            u, v = np.concatenate([u, v[reverse]]), np.concatenate([v, u[reverse]])
+            directed = np.ones(len(u), dtype=bool)
+
+        low = np.where(directed, u, np.minimum(u, v)).astype(np.int64)
+        high = np.where(directed, v, np.maximum(u, v)).astype(np.int64)
+        return (low * len(self.nodes) + high) * 2 + directed, positions
+
+    def decode(self, keys: np.ndarray) -> pd.DataFrame:
+        """
+        The edges of keys
+        @return: a pandas DataFrame with the columns 'Node1', 'Node2' and 'Direction', which is 'D' or 'U'
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        pairs = keys // 2
+        return pd.DataFrame({
+            'Node1': self.nodes[pairs // len(self.nodes)],
+            'Node2': self.nodes[pairs % len(self.nodes)],
+            'Direction': np.where(keys % 2 == 1, 'D', 'U'),
+        })
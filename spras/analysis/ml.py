@@ -1,6 +1,6 @@
 from os import PathLike
 from pathlib import PurePath
-from typing import Iterable, Union
+from typing import Iterable, Optional, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -14,6 +14,7 @@ from sklearn.metrics import jaccard_score
 from sklearn.neighbors import KernelDensity
 from sklearn.preprocessing import StandardScaler
 
+from spras.config.params import RunCatalog, run_algorithms
 from spras.util import make_required_dirs
 
 plt.switch_backend('Agg')
@@ -117,7 +118,7 @@ def create_palette(column_names):
     return label_color_map
 
 def pca(dataframe: pd.DataFrame, output_png: str | PathLike, output_var: str | PathLike, output_coord: str | PathLike, components: int = 2, labels: bool = True,
-        kde: bool = False, remove_empty_pathways: bool = False):
+        kde: bool = False, remove_empty_pathways: bool = False, run_catalog: Optional[RunCatalog] = None):
     """
     Performs PCA on the data and creates a scatterplot of the top two principal components.
     It saves the plot, the variance explained by each component, and the
@@ -130,6 +131,7 @@ def pca(dataframe: pd.DataFrame, output_png: str | PathLike, output_var: str | P
     @param labels: determines if labels will be included in the scatterplot (Default is True)
     @param kde: if True, overlays a kernel density estimate (KDE) on top of the PCA scatterplot (Default is False). Also saves coordinates to kde maximum (kde_peak) to output_coord file.
     @remove_empty_pathways: if True, removes pathways (columns) from the dataframe that contain no edges before performing PCA (Default is False)
+    @param run_catalog: the run catalog used to look up the algorithm of each pathway (Default is None, which parses it from the column names)
     """
     df = dataframe.reset_index(drop=True)
 
@@ -140,7 +142,7 @@ def pca(dataframe: pd.DataFrame, output_png: str | PathLike, output_var: str | P
     validate_df(df)
 
     columns = df.columns
-    column_names = [element.split('-')[-3] for element in columns]  # assume algorithm names do not contain '-'
+    column_names = run_algorithms(columns, run_catalog)
 
     df = df.transpose()  # based on the algorithms rather than the edges
     X = df.values
@@ -297,7 +299,8 @@ def plot_dendrogram(model, **kwargs):
     dendrogram(linkage_matrix, **kwargs)
 
 
-def hac_vertical(dataframe: pd.DataFrame, output_png: str | PathLike, output_file: str | PathLike, linkage: str = 'ward', metric: str = 'euclidean'):
+def hac_vertical(dataframe: pd.DataFrame, output_png: str | PathLike, output_file: str | PathLike, linkage: str = 'ward', metric: str = 'euclidean',
+                 run_catalog: Optional[RunCatalog] = None):
     """
     Performs hierarchical agglomerative clustering on the dataframe,
     creates a dendrogram of the resulting tree using seaborn and scipy for the cluster groups,
@@ -307,6 +310,7 @@ def hac_vertical(dataframe: pd.DataFrame, output_png: str | PathLike, output_fil
     @param output_file: the file name to save the clustering labels
     @param linkage: methods for calculating the distance between clusters
     @param metric: used for distance computation between instances of clusters
+    @param run_catalog: the run catalog used to look up the algorithm of each pathway (Default is None, which parses it from the column names)
     """
     validate_df(dataframe)
     if linkage not in linkage_methods:
@@ -324,7 +328,7 @@ def hac_vertical(dataframe: pd.DataFrame, output_png: str | PathLike, output_fil
 
     df = dataframe.reset_index(drop=True)
     columns = df.columns
-    column_names = [element.split('-')[-3] for element in columns]  # assume algorithm names do not contain '-'
+    column_names = run_algorithms(columns, run_catalog)
     df = df.transpose()
 
     # create a color map for the given labels
@@ -0,0 +1,187 @@
+import json
+import math
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from spras.config.params import ParameterTable
+from spras.dataset import Dataset
+from spras.util import LoosePathLike
+
+# Columns of the aggregated resource usage table.
+USAGE_COLUMNS = ['dataset', 'algorithm', 'params_hash', 'params', 'network_nodes', 'network_edges', 'input_bytes',
+                 'peak_memory_bytes', 'cpu_usage_usec', 'cpu_user_usec', 'cpu_system_usec', 'wall_sec']
+
+
+def summarize_usage_profile(run_dir: LoosePathLike) -> Optional[dict[str, float]]:
+    """
+    Summarize the profiling files written by a single reconstruct job.
+    A job can run more than one container, so 'usage-profile.tsv' can have several rows. The peak memory is the
+    maximum over the containers and the CPU times are summed.
+    The wall time is taken from 'usage-timeseries.tsv', where the elapsed time restarts at 0 for every container.
+    @param run_dir: the output directory of a reconstruct job
+    @return: a dict of resource usage values, or None if the job was not profiled
+    """
+    profile_file = Path(run_dir, 'usage-profile.tsv')
+    if not profile_file.exists():
+        return None
+
+    # Values that could not be read are recorded as N/A and become NaN here
+    profile_df = pd.read_csv(profile_file, sep='\t').apply(pd.to_numeric, errors='coerce')
+    usage = {
+        'peak_memory_bytes': profile_df['peak_memory_bytes'].max(),
+        'cpu_usage_usec': profile_df['cpu_usage_usec'].sum(min_count=1),
+        'cpu_user_usec': profile_df['cpu_user_usec'].sum(min_count=1),
+        'cpu_system_usec': profile_df['cpu_system_usec'].sum(min_count=1),
+        'wall_sec': np.nan
+    }
+
+    timeseries_file = Path(run_dir, 'usage-timeseries.tsv')
+    if timeseries_file.exists():
+        elapsed = pd.read_csv(timeseries_file, sep='\t', usecols=['elapsed_sec'])['elapsed_sec'].to_numpy()
+        if len(elapsed) > 0:
+            # A new container starts wherever the elapsed time decreases
+            container_ids = np.concatenate([[0], np.cumsum(np.diff(elapsed) < 0)])
+            usage['wall_sec'] = pd.Series(elapsed).groupby(container_ids).max().sum()
+
+    return usage
+
+
+def collect_resource_usage(out_dir: LoosePathLike, dataset_labels: Iterable[str],
+                           algorithm_params: Union[dict[str, dict[str, Any]], ParameterTable]) -> pd.DataFrame:
+    """
+    Collect the 'usage-profile.tsv' files of every reconstruct job under out_dir into a single table that relates
+    the resources each job used to the size of its network and its parameter combination.
+    Jobs that were not profiled are skipped.
+    @param out_dir: the reconstruction output directory
+    @param dataset_labels: the labels of the datasets in the config
+    @param algorithm_params: the parameter table of the config, or a nested dict mapping algorithm names to dicts that
+    map parameter hashes to parameter combinations
+    @return: pandas DataFrame with one row per profiled job and the USAGE_COLUMNS columns
+    """
+    parameter_table = ParameterTable.of(algorithm_params)
+    rows = []
+    for dataset in dataset_labels:
+        network_nodes = network_edges = np.nan
+        dataset_file = Path(out_dir, f'dataset-{dataset}-merged.pickle')
+        if dataset_file.exists():
+            data = Dataset.from_file(dataset_file)
+            network_nodes = len(data.node_table)
+            network_edges = len(data.interactome)
+
+        input_bytes_by_algorithm = {}
+        for combination in parameter_table:
+            algorithm = combination.algorithm
+            if algorithm not in input_bytes_by_algorithm:
+                # The prepared inputs are shared by every parameter combination of this dataset and algorithm
+                prepared_dir = Path(out_dir, 'prepared', f'{dataset}-{algorithm}-inputs')
+                input_bytes_by_algorithm[algorithm] = (sum(f.stat().st_size for f in prepared_dir.glob('*.txt'))
+                                                       if prepared_dir.is_dir() else np.nan)
+
+            usage = summarize_usage_profile(Path(out_dir, f'{dataset}-{combination.label}'))
+            if usage is None:
+                continue
+            rows.append({'dataset': dataset, 'algorithm': algorithm, 'params_hash': combination.params_hash,
+                         'params': combination.params_json, 'network_nodes': network_nodes,
+                         'network_edges': network_edges, 'input_bytes': input_bytes_by_algorithm[algorithm], **usage})
+
+    usage_df = pd.DataFrame(rows, columns=USAGE_COLUMNS)
+    return usage_df.sort_values(['algorithm', 'dataset', 'params_hash'], ignore_index=True)
+
+
+def fit_upper_envelope(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """
+    Fit a line that lies on or above every observation, so it can be used to request resources without
+    underestimating any job it was fit on.
+    The slope is the least squares slope (clipped to be non-negative) and the intercept is raised until the line
+    covers the largest residual. With fewer than two distinct x values, the line is the constant max(y).
+    @param x: the job sizes
+    @param y: the observed resource usage
+    @return: (slope, intercept)
+    """
+    if len(np.unique(x)) < 2:
+        return 0.0, float(np.max(y))
+    slope = max(float(np.polyfit(x, y, 1)[0]), 0.0)
+    intercept = float(np.max(y - slope * x))
+    return slope, intercept
+
+
+class ResourceModel:
+    """
+    Predicts the Snakemake resources of a reconstruct job from the total size of its prepared input files.
+    Models are fit per algorithm from the table built by collect_resource_usage and stored as JSON so that
+    a later workflow run can schedule its jobs with them.
+    """
+
+    def __init__(self, algorithms: dict[str, dict[str, float]], headroom: float = 1.25):
+        """
+        @param algorithms: a dict mapping algorithm names to their fitted coefficients
+        @param headroom: the factor that predicted memory and runtime are multiplied by
+        """
+        self.algorithms = algorithms
+        self.headroom = headroom
+
+    @classmethod
+    def fit(cls, usage_df: pd.DataFrame, headroom: float = 1.25) -> "ResourceModel":
+        """
+        Fit a resource model from a table in the collect_resource_usage format.
+        @param usage_df: the resource usage table
+        @param headroom: the factor that predicted memory and runtime are multiplied by
+        """
+        algorithms = {}
+        for algorithm, algorithm_df in usage_df.groupby('algorithm'):
+            algorithm_df = algorithm_df.dropna(subset=['input_bytes'])
+            model = {}
+
+            memory_df = algorithm_df.dropna(subset=['peak_memory_bytes'])
+            if not memory_df.empty:
+                model['memory_slope'], model['memory_intercept'] = fit_upper_envelope(
+                    memory_df['input_bytes'].to_numpy(dtype=float), memory_df['peak_memory_bytes'].to_numpy(dtype=float))
+
+            # Use CPU time as a stand-in for the wall time when the time series was not recorded
+            runtime = algorithm_df['wall_sec'].fillna(algorithm_df['cpu_usage_usec'] / 1e6)
+            runtime_mask = runtime.notna()
+            if runtime_mask.any():
+                model['runtime_slope'], model['runtime_intercept'] = fit_upper_envelope(
+                    algorithm_df.loc[runtime_mask, 'input_bytes'].to_numpy(dtype=float), runtime[runtime_mask].to_numpy(dtype=float))
+
+            # The number of cores kept busy on average, rounded up
+            parallelism = (algorithm_df['cpu_usage_usec'] / 1e6) / algorithm_df['wall_sec']
+            parallelism = parallelism.replace([np.inf, -np.inf], np.nan).dropna()
+            model['threads'] = max(1, math.ceil(parallelism.max())) if not parallelism.empty else 1
+
+            algorithms[str(algorithm)] = model
+        return cls(algorithms, headroom)
+
+    @classmethod
+    def from_file(cls, model_file: LoosePathLike) -> "ResourceModel":
+        with open(model_file) as f:
+            model_dict = json.load(f)
+        return cls(model_dict['algorithms'], model_dict['headroom'])
+
+    def to_file(self, model_file: LoosePathLike):
+        with open(model_file, 'w') as f:
+            json.dump({'headroom': self.headroom, 'algorithms': self.algorithms}, f, indent=2, sort_keys=True)
+
+    def predict(self, algorithm: str, input_bytes: float) -> dict[str, int]:
+        """
+        Predict the Snakemake resources of a reconstruct job.
+        Resources that the model has no data for are omitted.
+        @param algorithm: the algorithm name
+        @param input_bytes: the total size of the prepared input files of the job
+        @return: a dict with any of the keys 'mem_mb', 'runtime' (in minutes), and 'threads'
+        """
+        model = self.algorithms.get(algorithm)
+        if model is None:
+            return {}
+
+        prediction = {'threads': int(model['threads'])}
+        if 'memory_slope' in model:
+            memory_bytes = model['memory_intercept'] + model['memory_slope'] * input_bytes
+            prediction['mem_mb'] = max(1, math.ceil(self.headroom * memory_bytes / 1e6))
+        if 'runtime_slope' in model:
+            runtime_sec = model['runtime_intercept'] + model['runtime_slope'] * input_bytes
+            prediction['runtime'] = max(1, math.ceil(self.headroom * runtime_sec / 60))
+        return prediction
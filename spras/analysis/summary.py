@@ -1,108 +1,173 @@
+import hashlib
 import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from statistics import median
-from typing import Iterable
+from typing import Iterable, Optional, Union
 
-import networkx as nx
 import pandas as pd
 
+from spras.analysis.graph_stats import summary_statistics
+from spras.analysis.incidence import PathwayNodeMatrix
+from spras.config.params import ParameterTable
+from spras.config.schema import SummaryPathLengths
+from spras.util import LoosePathLike
 
-def summarize_networks(file_paths: Iterable[Path], node_table: pd.DataFrame, algo_params: dict[str, dict],
-                       algo_with_params: list[str]) -> pd.DataFrame:
+# Increment when the cached per-pathway statistics change so that older cache files are not reused
+SUMMARY_CACHE_VERSION = 1
+
+
+def pathway_statistics(file_path: LoosePathLike, path_lengths: SummaryPathLengths, sampling_cutoff: int,
+                       path_length_samples: int) -> tuple[list[str], list]:
+    """
+    The nodes and graph statistics of one pathway, which do not depend on the other pathways or the node table
+    @return: the nodes of the pathway and its statistics in the order of the summary table columns
+    """
+    nw, nw_stats = summary_statistics(file_path, path_lengths, sampling_cutoff, path_length_samples)
+    return nw.nodes.tolist(), nw_stats
+
+
+def _cache_file(cache_dir: LoosePathLike, file_path: LoosePathLike, settings: list) -> Path:
+    """
+    The cache file of a pathway's statistics, named by the hash of the pathway contents and the summary settings
+    """
+    digest = hashlib.sha256(json.dumps([SUMMARY_CACHE_VERSION, *settings]).encode())
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return Path(cache_dir, f'{digest.hexdigest()}.json')
+
+
+def _write_cache_file(cache_file: Path, statistics: tuple[list[str], list]):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a unique file and move it into place so concurrent summaries never read a partial file
+    partial_file = cache_file.with_name(f'{cache_file.name}.{uuid.uuid4().hex}.partial')
+    with open(partial_file, 'w') as f:
+        json.dump(statistics, f)
+    os.replace(partial_file, cache_file)
+
+
+def collect_pathway_statistics(file_paths: list[LoosePathLike], path_lengths: SummaryPathLengths, sampling_cutoff: int,
+                               path_length_samples: int, processes: int = 1,
+                               cache_dir: Optional[LoosePathLike] = None) -> list[tuple[list[str], list]]:
+    """
+    The nodes and graph statistics of each pathway, as returned by pathway_statistics.
+    Pathways are summarized in a pool of processes when processes is greater than 1. With a cache_dir, the statistics
+    of each pathway are saved under the hash of its contents, so only new or changed pathways are summarized again.
+    The cache directory keeps only the statistics of these pathways, and older cache files in it are removed.
+    @param file_paths: the pathway files
+    @param path_lengths: how shortest path lengths are computed
+    @param sampling_cutoff: the largest connected component whose path lengths are always computed exactly
+    @param path_length_samples: the number of nodes to search from in each sampled connected component
+    @param processes: the number of worker processes
+    @param cache_dir: the directory of cached statistics of one set of pathways, or None to not cache them
+    @return: the statistics in the order of file_paths
+    """
+    path_lengths = SummaryPathLengths(path_lengths)
+    settings = [path_lengths.value, sampling_cutoff, path_length_samples]
+    statistics: list[Optional[tuple[list[str], list]]] = [None] * len(file_paths)
+    cache_files = [_cache_file(cache_dir, file_path, settings) if cache_dir is not None else None
+                   for file_path in file_paths]
+
+    for index, cache_file in enumerate(cache_files):
+        if cache_file is not None and cache_file.exists():
+            with open(cache_file) as f:
+                nodes, nw_stats = json.load(f)
+            statistics[index] = (nodes, nw_stats)
+
+    missing = [index for index, stats in enumerate(statistics) if stats is None]
+    arguments = ([file_paths[index] for index in missing], [path_lengths] * len(missing),
+                 [sampling_cutoff] * len(missing), [path_length_samples] * len(missing))
+    if processes > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(missing))) as pool:
+            results = list(pool.map(pathway_statistics, *arguments))
+    else:
+        results = list(map(pathway_statistics, *arguments))
+
+    for index, result in zip(missing, results, strict=True):
+        statistics[index] = result
+        if cache_files[index] is not None:
+            _write_cache_file(cache_files[index], result)
+
+    if cache_dir is not None:
+        _prune_cache(cache_dir, cache_files)
+
+    return statistics
+
+
+def _prune_cache(cache_dir: LoosePathLike, cache_files: list[Path]):
+    """
+    Remove the cache files of pathways that were not summarized, including partial files left by interrupted runs,
+    so the cache does not grow with every changed pathway
+    """
+    keep = set(cache_files)
+    for cache_file in [*Path(cache_dir).glob('*.json'), *Path(cache_dir).glob('*.partial')]:
+        if cache_file not in keep:
+            cache_file.unlink(missing_ok=True)
+
+
+def summarize_networks(file_paths: Iterable[Path], node_table: pd.DataFrame,
+                       algo_params: Union[dict[str, dict], ParameterTable],
+                       algo_with_params: list[str], path_lengths: SummaryPathLengths = SummaryPathLengths.exact,
+                       sampling_cutoff: int = 10000, path_length_samples: int = 500, processes: int = 1,
+                       cache_dir: Optional[LoosePathLike] = None) -> pd.DataFrame:
     """
     Generate a table that aggregates summary information about networks in file_paths, including which nodes are present
     in node_table columns. Network directionality is ignored and all edges are treated as undirected. The order of the
     file_paths and algo_with_params inputs must match after they are each sorted.
     @param file_paths: iterable of edge list files
     @param node_table: pandas DataFrame containing node attributes
-    @param algo_params: a nested dict mapping algorithm names to dicts that map parameter hashes to parameter
-    combinations.
+    @param algo_params: the parameter table of the config, or a nested dict mapping algorithm names to dicts that
+    map parameter hashes to parameter combinations, which is not modified
     @param algo_with_params: a list of <algorithm>-params-<params_hash> combinations
+    @param path_lengths: exact to compute the max diameter and average path length from every node, or sampled to
+    estimate them from a sample of the nodes of connected components with more than sampling_cutoff nodes
+    @param sampling_cutoff: the largest connected component whose path lengths are always computed exactly
+    @param path_length_samples: the number of nodes to search from in each sampled connected component
+    @param processes: the number of processes that summarize pathways in parallel
+    @param cache_dir: a directory to cache the statistics of each pathway by its contents, or None to not cache them.
+    It only keeps the statistics of file_paths, so it should not be shared with summaries of other pathways.
     @return: pandas DataFrame with summary information
     """
     # Ensure that NODEID is the first column
     assert node_table.columns[0] == 'NODEID'
-    # Initialize list to store input nodes that have property data
-    nodes_by_col = []
+    property_columns = node_table.columns[1:].tolist()
     # Save new labels
     nodes_by_col_labs = ('Nodes in ' + node_table.columns[1:]).tolist()
-    # Iterate through each node property column
-    for col in node_table.columns[1:]:
-        # Assumption: property columns only contain NA, boolean, numeric data
-        # If the property contains numeric data, save the nodes with property values that are not NA and > 0
-        # If the property contains boolean data, save the nodes with property values that are True
-        nodes_by_col.append(set(node_table.loc[node_table[col] > 0, 'NODEID']))
 
     # Initialize list to store network summary data
     nw_info = []
 
     algo_with_params = sorted(algo_with_params)
+    parameter_table = ParameterTable.of(algo_params)
 
-    # Iterate through each network file path
-    for index, file_path in enumerate(sorted(file_paths)):
-        with open(file_path, 'r') as f:
-            lines = f.readlines()[1:]  # skip the header line
+    file_paths = sorted(file_paths)
+    # The graph statistics of each pathway do not depend on the others, so they can be computed in parallel
+    statistics = collect_pathway_statistics(file_paths, path_lengths, sampling_cutoff, path_length_samples,
+                                            processes, cache_dir)
 
-        # directed or mixed graphs are parsed and summarized as an undirected graph
-        nw = nx.read_edgelist(lines, data=(('weight', float), ('Direction', str)))
+    # Count the nodes of every pathway with every node property at once as the product of a node-by-pathway matrix
+    # and a boolean node-by-property matrix over the same node index
+    # Assumption: property columns only contain NA, boolean, numeric data
+    # If the property contains numeric data, count the nodes with property values that are not NA and > 0
+    # If the property contains boolean data, count the nodes with property values that are True
+    node_matrix = PathwayNodeMatrix.from_node_lists(file_paths, [nw_nodes for nw_nodes, _ in statistics])
+    property_counts = node_matrix.overlap_counts(node_matrix.property_mask(node_table, property_columns))
 
-        # Save the network name, number of nodes, number edges, and number of connected components
+    # Iterate through each network file path
+    for index, (file_path, (_, nw_stats)) in enumerate(zip(file_paths, statistics, strict=True)):
+        # Save the network name, number of nodes, number edges, number of connected components,
+        # density, max/median degree, max diameter, and average path length
+        # directed or mixed graphs are summarized as an undirected graph
         nw_name = str(file_path)
-        number_nodes = nw.number_of_nodes()
-        number_edges = nw.number_of_edges()
-        ncc = nx.number_connected_components(nw)
-
-        # Save the max/median degree, average clustering coefficient, and density
-        if number_nodes == 0:
-            max_degree = 0
-            median_degree = 0.0
-            density = 0.0
-        else:
-            degrees = [deg for _, deg in nw.degree()]
-            max_degree = max(degrees)
-            median_degree = median(degrees)
-            density = nx.density(nw)
-
-        cc = list(nx.connected_components(nw))
-        # Save the max diameter
-        # Use diameter only for components with ≥2 nodes (singleton components have diameter 0)
-        diameters = [
-            nx.diameter(nw.subgraph(c).copy()) if len(c) > 1 else 0
-            for c in cc
-        ]
-        max_diameter = max(diameters, default=0)
-
-        # Save the average path lengths
-        # Compute average shortest path length only for components with ≥2 nodes (undefined for singletons, set to 0.0)
-        avg_path_lengths = [
-            nx.average_shortest_path_length(nw.subgraph(c).copy()) if len(c) > 1 else 0.0
-            for c in cc
-        ]
-
-        if len(avg_path_lengths) != 0:
-            avg_path_len = sum(avg_path_lengths) / len(avg_path_lengths)
-        else:
-            avg_path_len = 0.0
-
-        # Initialize list to store current network information
-        cur_nw_info = [nw_name, number_nodes, number_edges, ncc, density, max_degree, median_degree, max_diameter, avg_path_len]
-
-        # Iterate through each node property and save the intersection with the current network
-        for node_list in nodes_by_col:
-            num_nodes = len(set(nw).intersection(node_list))
-            cur_nw_info.append(num_nodes)
-
-        # String split to access algorithm and hashcode: <algorithm>-params-<params_hash>
-        parts = algo_with_params[index].split('-')
-        algo = parts[0]
-        hashcode = parts[2]
-
-        # Algorithm parameters have format { algo : { hashcode : { parameter combos } } }
-        param_combo = algo_params[algo][hashcode]
-        del param_combo['_spras_run_name']
-        # We use json.dumps to properly serialize enums as strings,
-        # and sort parameters to provide stable summary table output.
-        cur_nw_info.append(json.dumps(param_combo, sort_keys=True))
+        cur_nw_info = [nw_name, *nw_stats]
+
+        # Save the number of nodes of the current network with each node property
+        cur_nw_info.extend(property_counts[index].tolist())
+
+        # The parameter combination of the <algorithm>-params-<params_hash> label
+        cur_nw_info.append(parameter_table[algo_with_params[index]].params_json)
 
         # Save the current network information to the network summary list
         nw_info.append(cur_nw_info)
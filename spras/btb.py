@@ -2,7 +2,7 @@ from pathlib import Path
 
 from spras.config.container_schema import ProcessedContainerSettings
 from spras.config.util import Empty
-from spras.containers import prepare_volume, run_container_and_log
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.interactome import (
     convert_undirected_to_directed,
     reinsert_direction_col_directed,
@@ -82,23 +82,17 @@ class BowTieBuilder(PRM[Empty]):
 
         work_dir = '/btb'
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, source_file = prepare_volume(inputs["sources"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, target_file = prepare_volume(inputs["targets"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, edges_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
+        source_file = volumes.add(inputs["sources"])
+        target_file = volumes.add(inputs["targets"])
+        edges_file = volumes.add(inputs["edges"])
 
         # Use its --output argument to set the output file prefix to specify an absolute path and prefix
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
         mapped_out_prefix = mapped_out_dir + '/raw-pathway.txt'  # Use posix path inside the container
 
         command = ['python',
@@ -116,7 +110,7 @@ class BowTieBuilder(PRM[Empty]):
         run_container_and_log('BowTieBuilder',
                               container_suffix,
                               command,
-                              volumes,
+                              volumes.binds,
                               work_dir,
                               out_dir,
                               container_settings)
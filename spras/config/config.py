@@ -23,9 +23,11 @@ import numpy as np
 import yaml
 
 from spras.config.container_schema import ProcessedContainerSettings
+from spras.config.params import RUN_NAME_KEY, ParameterTable, RunCatalog
 from spras.config.revision import attach_spras_revision, spras_revision
 from spras.config.schema import DatasetSchema, RawConfig
 from spras.config.util import AlgorithmName, get_valid_algorithm_names
+from spras.runner import get_algorithm
 from spras.util import LoosePathLike, NpHashEncoder, hash_params_sha1_base32
 
 config = None
@@ -63,23 +65,42 @@ class Config:
         # Container settings used by PRMs.
         self.container_settings = ProcessedContainerSettings.from_container_settings(parsed_raw_config.containers, self.hash_length)
 
-        # Validate that all keys in containers.images are recognized algorithm names
-        if self.container_settings.images:
-            valid_names = get_valid_algorithm_names()
-            for key in self.container_settings.images:
-                try:
-                    AlgorithmName(key)
-                except ValueError as err:
-                    raise ValueError(
-                        f"Unknown algorithm name '{key}' in configured containers.images. Is there a typo? "
-                        f"Valid algorithm names are: {sorted(valid_names)}"
-                    ) from err
+        # Validate that all keys in containers.images and containers.execution are recognized algorithm names
+        for option, settings in [('images', self.container_settings.images),
+                                 ('execution', self.container_settings.execution)]:
+            if settings:
+                valid_names = get_valid_algorithm_names()
+                for key in settings:
+                    try:
+                        AlgorithmName(key)
+                    except ValueError as err:
+                        raise ValueError(
+                            f"Unknown algorithm name '{key}' in configured containers.{option}. Is there a typo? "
+                            f"Valid algorithm names are: {sorted(valid_names)}"
+                        ) from err
+
+        # Validate that all keys in containers.backends are recognized algorithm names that support the backend
+        for key, backend in self.container_settings.backends.items():
+            try:
+                algorithm = get_algorithm(key)
+            except NotImplementedError as err:
+                raise ValueError(
+                    f"Unknown algorithm name '{key}' in configured containers.backends. Is there a typo? "
+                    f"Valid algorithm names are: {sorted(get_valid_algorithm_names())}"
+                ) from err
+            if backend not in algorithm.backends:
+                raise ValueError(f"The {backend.value} backend configured in containers.backends is not available for '{key}'. "
+                                 f"Available backends are: {[b.value for b in algorithm.backends]}")
 
         # The list of algorithms to run in the workflow. Each is a dict with 'name' as an expected key.
         self.algorithms = None
         # A nested dict mapping algorithm names to dicts that map parameter hashes to parameter combinations.
         # Only includes algorithms that are set to be run with 'include: true'.
         self.algorithm_params: dict[str, dict[str, Any]] = dict()
+        # The metadata of every parameter combination in algorithm_params, shared by the analyses
+        self.parameter_table = ParameterTable({})
+        # The pathway reconstruction runs of every dataset and parameter combination, shared by the analyses
+        self.run_catalog = RunCatalog('', [], self.parameter_table)
         # A dict with the analysis settings
         self.analysis_params = parsed_raw_config.analysis
         # A dict with the evaluation settings
@@ -92,6 +113,8 @@ class Config:
         self.pca_params = None
         # A dict with the hierarchical clustering settings
         self.hac_params = None
+        # A dict with the summary table settings
+        self.summary_params = None
         # A Boolean specifying whether to run the summary analysis
         self.analysis_include_summary = None
         # A Boolean specifying whether to run the Cytoscape analysis
@@ -104,8 +127,14 @@ class Config:
         self.analysis_include_ml_aggregate_algo = None
         # A Boolean specifying whether to run the evaluation per algorithm analysis
         self.analysis_include_evaluation_aggregate_algo = None
+        # A Boolean specifying whether to run the resource usage analysis
+        self.analysis_include_resources = None
+        # The resource model file used to set the resources of reconstruct jobs, if any
+        self.resource_model = parsed_raw_config.reconstruction_settings.resource_model
         # Specifies whether the files should be OSDF-immutable (i.e. the file names change when the file itself changes)
         self.immutable_files = parsed_raw_config.immutable_files
+        # Specifies whether the time spent in each workflow stage should be recorded
+        self.enable_tracing = parsed_raw_config.enable_tracing
 
         self.process_config(parsed_raw_config)
 
@@ -230,10 +259,13 @@ class Config:
 
                     # We preserve the run name as it carries useful information for the parameter log,
                     # and is useful for configuration testing.
-                    run_dict["_spras_run_name"] = run_name
+                    run_dict[RUN_NAME_KEY] = run_name
 
                     self.algorithm_params[alg.name][params_hash] = run_dict
 
+        self.parameter_table = ParameterTable(self.algorithm_params)
+        self.run_catalog = RunCatalog(self.out_dir, self.datasets, self.parameter_table)
+
     def process_analysis(self, raw_config: RawConfig):
         if not raw_config.analysis:
             return
@@ -251,10 +283,23 @@ class Config:
             "metric": self.ml_params.metric
         }
 
+        self.summary_params = {
+            "path_lengths": raw_config.analysis.summary.path_lengths,
+            "sampling_cutoff": raw_config.analysis.summary.sampling_cutoff,
+            "path_length_samples": raw_config.analysis.summary.path_length_samples,
+            "processes": raw_config.analysis.summary.processes
+        }
+
         self.analysis_include_summary = raw_config.analysis.summary.include
         self.analysis_include_cytoscape = raw_config.analysis.cytoscape.include
         self.analysis_include_ml = raw_config.analysis.ml.include
         self.analysis_include_evaluation = raw_config.analysis.evaluation.include
+        self.analysis_include_resources = raw_config.analysis.resources.include
+
+        # The resource analysis aggregates the usage profiles written by profiled containers
+        if self.analysis_include_resources and not self.container_settings.enable_profiling:
+            warnings.warn("resources analysis is set to true, but containers.enable_profiling is false. "
+                          "The resource usage table will be empty.", stacklevel=2)
 
         # Only run ML aggregate per algorithm if analysis include ML is set to True
         if self.ml_params.aggregate_per_algorithm and self.analysis_include_ml:
@@ -298,8 +343,8 @@ class Config:
     def process_config(self, raw_config: RawConfig):
         self.out_dir = raw_config.reconstruction_settings.locations.reconstruction_dir
 
-        if raw_config.containers.enable_profiling and raw_config.containers.framework not in ["singularity", "apptainer"]:
-            warnings.warn("enable_profiling is set to true, but the container framework is not singularity/apptainer. This setting will have no effect.", stacklevel=2)
+        if raw_config.containers.enable_profiling and raw_config.containers.framework not in ["singularity", "apptainer", "docker"]:
+            warnings.warn("enable_profiling is set to true, but the container framework is not singularity/apptainer/docker. This setting will have no effect.", stacklevel=2)
 
         self.process_datasets(raw_config)
         self.process_algorithms(raw_config)
@@ -10,7 +10,7 @@ import warnings
 from dataclasses import dataclass, field
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PositiveFloat, PositiveInt
 
 from spras.config.util import CaseInsensitiveEnum
 
@@ -27,6 +27,12 @@ class ContainerFramework(CaseInsensitiveEnum):
         """True for both 'singularity' and 'apptainer', which are treated as synonyms."""
         return self in (ContainerFramework.singularity, ContainerFramework.apptainer)
 
+class ExecutionBackend(CaseInsensitiveEnum):
+    container = 'container'
+    "Run the algorithm inside its container"
+    native = 'native'
+    "Run an in-process implementation of the algorithm, which is only available for some algorithms"
+
 class ContainerRegistry(BaseModel):
     base_url: str = "docker.io"
     "The domain of the registry"
@@ -36,17 +42,48 @@ class ContainerRegistry(BaseModel):
 
     model_config = ConfigDict(extra='forbid', use_attribute_docstrings=True)
 
+class ExecutionSettings(BaseModel):
+    processes: PositiveInt = 1
+    "The number of processes an algorithm can use to run its replicates in parallel"
+
+    threads: PositiveInt = 1
+    "The number of threads each of those processes can use"
+
+    visualization: bool = True
+    """
+    Whether an algorithm renders visualizations of its output, such as the DOMINO module HTML pages. They do not change
+    the reconstructed pathway, so turning them off only saves time.
+    """
+
+    model_config = ConfigDict(extra='forbid', use_attribute_docstrings=True)
+
+    @property
+    def cores(self) -> int:
+        """The number of cores a reconstruction job needs to run all processes and threads at once"""
+        return self.processes * self.threads
+
 class ContainerSettings(BaseModel):
     framework: ContainerFramework = ContainerFramework.docker
     unpack_singularity: bool = False
 
     enable_profiling: bool = False
-    "A Boolean indicating whether to enable container runtime profiling (apptainer/singularity only)"
+    "A Boolean indicating whether to enable container runtime profiling (apptainer/singularity and docker)"
+    profiling_interval: PositiveFloat = 1.0
+    "Seconds between the resource usage samples written to 'usage-timeseries.tsv' when profiling is enabled"
     registry: ContainerRegistry
 
     images: dict[str, str] = {}
     "Per-algorithm container image overrides. Keys are algorithm names; values are image references or local .sif file paths."
 
+    backends: dict[str, ExecutionBackend] = {}
+    "Per-algorithm execution backends. Keys are algorithm names; algorithms that are not listed run in their container."
+
+    execution: dict[str, ExecutionSettings] = {}
+    """
+    Per-algorithm processes and threads. Keys are algorithm names; algorithms that are not listed use one of each.
+    These are not algorithm parameters, so they do not change the parameter hashes or the output directories.
+    """
+
     model_config = ConfigDict(extra='forbid', use_attribute_docstrings=True)
 
 @dataclass
@@ -56,6 +93,7 @@ class ProcessedContainerSettings:
     base_url: str = "docker.io"
     prefix: str = DEFAULT_CONTAINER_PREFIX
     enable_profiling: bool = False
+    profiling_interval: float = 1.0
     hash_length: int = 7
     """
     The hash length for container-specific usage. This does not appear in
@@ -70,6 +108,18 @@ class ProcessedContainerSettings:
     """Per-algorithm container image overrides from config."""
     image_override: Optional[str] = None
     """Resolved image override for the current algorithm. Set at runtime by runner.run()."""
+    backends: dict[str, ExecutionBackend] = field(default_factory=dict)
+    """Per-algorithm execution backends from config."""
+    backend: ExecutionBackend = ExecutionBackend.container
+    """Resolved execution backend for the current algorithm. Set at runtime by runner.run()."""
+    execution: dict[str, ExecutionSettings] = field(default_factory=dict)
+    """Per-algorithm processes and threads from config."""
+    processes: int = 1
+    """Resolved number of processes for the current algorithm. Set at runtime by runner.run()."""
+    threads: int = 1
+    """Resolved number of threads per process for the current algorithm. Set at runtime by runner.run()."""
+    visualization: bool = True
+    """Resolved visualization setting for the current algorithm. Set at runtime by runner.run()."""
 
     @staticmethod
     def from_container_settings(settings: ContainerSettings, hash_length: int) -> "ProcessedContainerSettings":
@@ -95,6 +145,10 @@ class ProcessedContainerSettings:
             unpack_singularity=unpack_singularity,
             base_url=container_base_url,
             prefix=container_prefix,
+            enable_profiling=settings.enable_profiling,
+            profiling_interval=settings.profiling_interval,
             hash_length=hash_length,
             images=dict(settings.images),
+            backends=dict(settings.backends),
+            execution=dict(settings.execution),
         )
@@ -0,0 +1,222 @@
+"""
+Metadata about the configured parameter combinations and pathway reconstruction runs that the analyses share.
+"""
+
+import json
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+from spras.util import LoosePathLike
+
+# The key the config adds to each parameter combination to record the name of the run it came from
+RUN_NAME_KEY = '_spras_run_name'
+
+
+class ParameterCombination(NamedTuple):
+    """
+    One parameter combination of an algorithm
+    """
+    algorithm: str
+    params_hash: str
+    run_name: str
+    params_json: str
+    """
+    The parameters as JSON with sorted keys and without the run name
+    """
+
+    @property
+    def label(self) -> str:
+        """
+        The <algorithm>-params-<params_hash> label used in output directory names
+        """
+        return f'{self.algorithm}-params-{self.params_hash}'
+
+    @property
+    def params(self) -> dict[str, Any]:
+        """
+        A new dict of the parameters, without the run name
+        """
+        return json.loads(self.params_json)
+
+
+class ParameterTable:
+    """
+    An immutable table of every parameter combination, built once from Config.algorithm_params and shared instead
+    of reading and copying the nested parameter dicts in each analysis.
+    """
+
+    def __init__(self, algorithm_params: dict[str, dict[str, dict[str, Any]]]):
+        """
+        @param algorithm_params: a nested dict mapping algorithm names to dicts that map parameter hashes to parameter
+        combinations. It is not modified.
+        """
+        combinations = []
+        for algorithm, param_combos in algorithm_params.items():
+            for params_hash, params in param_combos.items():
+                # We use json.dumps to properly serialize enums as strings,
+                # and sort parameters to provide stable output.
+                params_json = json.dumps({k: v for k, v in params.items() if k != RUN_NAME_KEY}, sort_keys=True)
+                combinations.append(ParameterCombination(algorithm, params_hash, params.get(RUN_NAME_KEY, ''),
+                                                         params_json))
+        self._combinations = tuple(combinations)
+        self._by_label = MappingProxyType({combination.label: combination for combination in combinations})
+
+    @staticmethod
+    def of(algorithm_params: 'dict[str, dict[str, dict[str, Any]]] | ParameterTable') -> 'ParameterTable':
+        """
+        The parameter table of algorithm_params, which can already be a ParameterTable
+        """
+        if isinstance(algorithm_params, ParameterTable):
+            return algorithm_params
+        return ParameterTable(algorithm_params)
+
+    def __iter__(self) -> Iterator[ParameterCombination]:
+        return iter(self._combinations)
+
+    def __len__(self) -> int:
+        return len(self._combinations)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._by_label
+
+    def __getitem__(self, label: str) -> ParameterCombination:
+        """
+        The parameter combination with a <algorithm>-params-<params_hash> label
+        """
+        return self._by_label[label]
+
+    def get(self, algorithm: str, params_hash: str) -> ParameterCombination:
+        """
+        The parameter combination of an algorithm with a parameter hash
+        """
+        return self._by_label[f'{algorithm}-params-{params_hash}']
+
+    @property
+    def labels(self) -> list[str]:
+        """
+        The <algorithm>-params-<params_hash> labels in config order
+        """
+        return list(self._by_label)
+
+    @property
+    def algorithms(self) -> list[str]:
+        """
+        The algorithms that have parameter combinations, in config order
+        """
+        return list(dict.fromkeys(combination.algorithm for combination in self._combinations))
+
+
+class PathwayRun(NamedTuple):
+    """
+    One pathway reconstruction run, which is a parameter combination of an algorithm run on a dataset
+    """
+    dataset: str
+    combination: ParameterCombination
+    out_dir: str
+
+    @property
+    def algorithm(self) -> str:
+        return self.combination.algorithm
+
+    @property
+    def params_hash(self) -> str:
+        return self.combination.params_hash
+
+    @property
+    def name(self) -> str:
+        """
+        The <dataset>-<algorithm>-params-<params_hash> name of the run output directory
+        """
+        return f'{self.dataset}-{self.combination.label}'
+
+    @property
+    def directory(self) -> str:
+        return f'{self.out_dir}/{self.name}'
+
+    @property
+    def pathway(self) -> str:
+        """
+        The pathway file of the run in the universal output format
+        """
+        return f'{self.directory}/pathway.txt'
+
+
+class RunCatalog:
+    """
+    An in-memory index of every pathway reconstruction run, which maps datasets, algorithms and parameter hashes to
+    the run output files. It is built once from the config so that selecting and labeling the pathways of an algorithm
+    are lookups instead of parsing the output file names, which breaks on names that contain '-'.
+    """
+
+    def __init__(self, out_dir: str, dataset_labels: Iterable[str], parameter_table: ParameterTable):
+        """
+        @param out_dir: the output directory of the runs
+        @param dataset_labels: the dataset labels
+        @param parameter_table: the parameter combinations run on each dataset
+        """
+        runs = [PathwayRun(dataset, combination, str(out_dir))
+                for dataset in dataset_labels for combination in parameter_table]
+        self._runs = tuple(runs)
+        self._by_name = MappingProxyType({run.name: run for run in runs})
+        by_selection: dict[tuple[Optional[str], Optional[str]], list[PathwayRun]] = {}
+        for run in runs:
+            for key in [(None, None), (run.dataset, None), (None, run.algorithm), (run.dataset, run.algorithm)]:
+                by_selection.setdefault(key, []).append(run)
+        self._by_selection = MappingProxyType({key: tuple(selection) for key, selection in by_selection.items()})
+
+    def __iter__(self) -> Iterator[PathwayRun]:
+        return iter(self._runs)
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._by_name
+
+    def __getitem__(self, name: str) -> PathwayRun:
+        """
+        The run with a <dataset>-<algorithm>-params-<params_hash> name
+        """
+        return self._by_name[name]
+
+    def select(self, dataset: Optional[str] = None, algorithm: Optional[str] = None) -> list[PathwayRun]:
+        """
+        The runs of a dataset, of an algorithm or of both, in the order of the dataset labels and then the config
+        """
+        return list(self._by_selection.get((dataset, algorithm), ()))
+
+    def pathways(self, dataset: Optional[str] = None, algorithm: Optional[str] = None) -> list[str]:
+        """
+        The pathway files of the runs of a dataset, of an algorithm or of both
+        """
+        return [run.pathway for run in self.select(dataset, algorithm)]
+
+    def find(self, run: LoosePathLike) -> PathwayRun:
+        """
+        The run with a name, an output directory or an output file such as its pathway file
+        """
+        path = Path(run)
+        for name in (str(run), path.name, path.parent.name):
+            if name in self._by_name:
+                return self._by_name[name]
+        raise KeyError(f'{run} is not the output of a run in the run catalog')
+
+
+def run_algorithms(runs: Iterable[LoosePathLike], run_catalog: Optional[RunCatalog] = None) -> list[str]:
+    """
+    The algorithm of each run
+    @param runs: run names, output directories or output files as accepted by RunCatalog.find
+    @param run_catalog: the run catalog to look up the runs in. Without a catalog, the algorithm is parsed from the
+    <dataset>-<algorithm>-params-<params_hash> run name, which requires that the dataset label does not contain '-'.
+    """
+    if run_catalog is not None:
+        return [run_catalog.find(run).algorithm for run in runs]
+
+    algorithms = []
+    for run in runs:
+        path = Path(run)
+        # Output files have a suffix, and run names and output directories do not
+        name = path.parent.name if path.suffix else path.name
+        algorithms.append(name.split('-', 1)[-1].rsplit('-params-', 1)[0])
+    return algorithms
@@ -10,9 +10,9 @@ We declare models using two classes here:
 - `CaseInsensitiveEnum` (see ./util.py)
 """
 
-from typing import Annotated
+from typing import Annotated, Optional
 
-from pydantic import AfterValidator, BaseModel, ConfigDict
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 
 from spras.config.algorithms import AlgorithmUnion
 from spras.config.container_schema import ContainerSettings
@@ -23,8 +23,28 @@ from spras.config.util import CaseInsensitiveEnum, label_validator
 # which is meant to make disabling parts of the configuration easier.
 # When an option does not have a default, it means that it must be set by the user.
 
+class SummaryPathLengths(CaseInsensitiveEnum):
+    exact = 'exact'
+    "Search from every node to compute the max diameter and average path length"
+    sampled = 'sampled'
+    "Search from a sample of the nodes of connected components with more than sampling_cutoff nodes"
+
 class SummaryAnalysis(BaseModel):
     include: bool
+    path_lengths: SummaryPathLengths = SummaryPathLengths.exact
+    sampling_cutoff: int = Field(default=10000, ge=2)
+    """
+    The largest connected component whose path lengths are always computed exactly.
+    """
+    path_length_samples: int = Field(default=500, ge=1)
+    """
+    The number of nodes to search from in each sampled connected component.
+    """
+    processes: int = Field(default=1, ge=1)
+    """
+    The number of processes that summarize pathways in parallel, which is also the number of threads the summary
+    table job requests from Snakemake.
+    """
 
     # We prefer to never allow extra keys, to prevent
     # any user mistypes.
@@ -64,6 +84,20 @@ class MlAnalysis(BaseModel):
 class EvaluationAnalysis(BaseModel):
     include: bool
     aggregate_per_algorithm: bool = False
+    pca_chosen_top_n: int = Field(default=1, ge=1)
+    """
+    The number of pathways closest to the KDE peak that PCA-chosen evaluation selects, for each algorithm in the per
+    algorithm evaluation.
+    """
+
+    model_config = ConfigDict(extra='forbid')
+
+class ResourceAnalysis(BaseModel):
+    include: bool
+    headroom: float = Field(default=1.25, ge=1.0)
+    """
+    The factor that the memory and runtime predicted by the resource model are multiplied by.
+    """
 
     model_config = ConfigDict(extra='forbid')
 
@@ -72,6 +106,7 @@ class Analysis(BaseModel):
     cytoscape: CytoscapeAnalysis = CytoscapeAnalysis(include=False)
     ml: MlAnalysis = MlAnalysis(include=False)
     evaluation: EvaluationAnalysis = EvaluationAnalysis(include=False)
+    resources: ResourceAnalysis = ResourceAnalysis(include=False)
 
     model_config = ConfigDict(extra='forbid')
 
@@ -93,9 +128,13 @@ class Locations(BaseModel):
 
     model_config = ConfigDict(extra='forbid')
 
-# NOTE: This setting doesn't have any uses past setting the output_dir as of now.
 class ReconstructionSettings(BaseModel):
     locations: Locations
+    resource_model: Optional[str] = None
+    """
+    The path to a resource-model.json file written by the resources analysis of an earlier run.
+    If set, the reconstruct jobs request the memory, runtime, and threads the model predicts for them.
+    """
 
     model_config = ConfigDict(extra='forbid')
 
@@ -114,6 +153,13 @@ class RawConfig(BaseModel):
     hash_length: int = DEFAULT_HASH_LENGTH
     "The length of the hash used to identify a parameter combination"
 
+    enable_tracing: bool = False
+    """
+    If enabled, the time spent in each stage of merging, preparing, running, and parsing is appended to
+    'logs/trace.jsonl' in the output directory. When the workflow succeeds, the trace is also exported to
+    'logs/trace.json', which can be opened with https://ui.perfetto.dev or chrome://tracing.
+    """
+
     # See algorithms.py for more information about AlgorithmUnion
     algorithms: list[AlgorithmUnion] # type: ignore - pydantic allows this.
     datasets: list[DatasetSchema]
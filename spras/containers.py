@@ -3,6 +3,7 @@ import platform
 import re
 import subprocess
 import textwrap
+import time
 import warnings
 from dataclasses import dataclass
 from pathlib import Path, PurePath, PurePosixPath
@@ -13,7 +14,17 @@ import docker.errors
 
 from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
 from spras.logging import indent
-from spras.profiling import create_apptainer_container_stats, create_peer_cgroup
+from spras.profiling import (
+    CgroupSampler,
+    DockerStatsSampler,
+    ProcessCgroupSampler,
+    create_apptainer_container_stats,
+    create_delegated_scope_command,
+    create_peer_cgroup,
+    create_sampled_container_stats,
+    write_usage_timeseries,
+)
+from spras.tracing import span
 from spras.util import hash_filename
 
 
@@ -176,6 +187,17 @@ def env_to_items(environment: dict[str, str]) -> Iterator[str]:
     return (f"{key}={value}" for key, value in environment.items())
 
 
+def unique_bind_paths(volumes: List[Tuple[PurePath, PurePath]]) -> List[str]:
+    """
+    Formats volumes as bind strings for Docker and Singularity.
+    Volumes that appear more than once, e.g. from several files in one directory mapped by a VolumePlanner or
+    prepare_volume on the same file, are only bound once.
+    @param volumes: a list of volumes to mount where each item is a (source, destination) tuple
+    @return: the unique 'source:destination' strings in their original order
+    """
+    return list(dict.fromkeys(f'{prepare_path_docker(src)}:{dest}' for src, dest in volumes))
+
+
 @dataclass(frozen=True)
 class ResolvedImage:
     """Result of resolve_container_image().
@@ -275,15 +297,16 @@ def run_container(container_suffix: str, command: List[str], volumes: List[Tuple
     @param volumes: a list of volumes to mount where each item is a (source, destination) tuple
     @param working_dir: the working directory in the container
     @param container_settings: the settings to use to run the container
-    @param out_dir: output directory for the rule's artifacts. Only passed into run_container_singularity for the purpose of profiling.
+    @param out_dir: output directory for the rule's artifacts. Only used by the docker and singularity runners for the purpose of profiling.
     @param environment: environment variables to set in the container
     @param network_disabled: Disables the network on the container. Only works for docker for now. This acts as a 'runtime assertion' that a container works w/o networking.
     @return: output from Singularity execute or Docker run
     """
-    resolved = resolve_container_image(container_suffix, container_settings)
+    with span('resolve_image', 'container', container=container_suffix):
+        resolved = resolve_container_image(container_suffix, container_settings)
 
     if container_settings.framework == ContainerFramework.docker:
-        return run_container_docker(resolved.image, command, volumes, working_dir, environment, network_disabled)
+        return run_container_docker(resolved.image, command, volumes, working_dir, environment, network_disabled, out_dir=out_dir, config=container_settings)
     elif container_settings.framework.is_singularity_family:
         return run_container_singularity(resolved, command, volumes, working_dir, out_dir, container_settings, environment)
     elif container_settings.framework == ContainerFramework.dsub:
@@ -340,7 +363,7 @@ def run_container_and_log(name: str, container_suffix: str, command: List[str],
         raise ContainerError(message, err.exit_status, stdout, stderr) from None
 
 # TODO any issue with creating a new client each time inside this function?
-def run_container_docker(container: str, command: List[str], volumes: List[Tuple[PurePath, PurePath]], working_dir: str, environment: Optional[dict[str, str]] = None, network_disabled=False):
+def run_container_docker(container: str, command: List[str], volumes: List[Tuple[PurePath, PurePath]], working_dir: str, environment: Optional[dict[str, str]] = None, network_disabled=False, out_dir: Optional[str | os.PathLike] = None, config: Optional[ProcessedContainerSettings] = None):
     """
     Runs a command in the container using Docker.
     Attempts to automatically correct file owner and group for new files created by the container, setting them to the
@@ -351,6 +374,8 @@ def run_container_docker(container: str, command: List[str], volumes: List[Tuple
     @param volumes: a list of volumes to mount where each item is a (source, destination) tuple
     @param working_dir: the working directory in the container
     @param environment: environment variables to set in the container
+    @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
+    @param config: the container settings, which determine whether the container is profiled
     @return: output from Docker run, or will error if the container errored.
     """
 
@@ -363,49 +388,59 @@ def run_container_docker(container: str, command: List[str], volumes: List[Tuple
     except Exception as err:
         err.add_note("An error occurred when fetching the docker daemon: is docker installed and is dockerd running?")
         raise err
+    # On Unix, files written by the Docker run command will be owned by root and cannot be modified
+    # outside the container by a non-root user, so their owner is reset after the run
+    # There is nothing to reset on non-Unix systems or when already running as root
+    fix_ownership = hasattr(os, 'getuid') and os.getuid() != 0
+
     # Track the contents of the local directories that will be bound so that new files added can have their owner
     # changed
     pre_volume_contents = {}
     src_dest_map = {}
-    for src, dest in volumes:
-        src_path = Path(src)
-        # The same source path can be in volumes more than once if there were multiple input or output files
-        # in the same directory
-        # Only check each unique source path once and track which of the possible destination paths was used
-        if src_path not in pre_volume_contents:
-            # Only list files in the directory, do not walk recursively because it could include
-            # a massive number of files
-            pre_volume_contents[src_path] = set(src_path.iterdir())
-            src_dest_map[src_path] = dest
-
-    bind_paths = [f'{prepare_path_docker(src)}:{dest}' for src, dest in volumes]
-
-    out = client.containers.run(container,
-                                command,
-                                stderr=True,
-                                volumes=bind_paths,
-                                working_dir=working_dir,
-                                network_disabled=network_disabled,
-                                environment=environment).decode('utf-8')
+    if fix_ownership:
+        with span('list_volumes', 'container'):
+            for src, dest in volumes:
+                src_path = Path(src)
+                # The same source path can be in volumes more than once if there were multiple input or output files
+                # in the same directory
+                # Only check each unique source path once and track which of the possible destination paths was used
+                if src_path not in pre_volume_contents:
+                    # Only list files in the directory, do not walk recursively because it could include
+                    # a massive number of files
+                    pre_volume_contents[src_path] = set(src_path.iterdir())
+                    src_dest_map[src_path] = dest
+
+    bind_paths = unique_bind_paths(volumes)
+
+    with span('container_run', 'container', framework='docker', container=container):
+        if config is not None and config.enable_profiling and out_dir is not None:
+            out = run_profiled_container_docker(client, container, command, bind_paths, working_dir, out_dir,
+                                                config.profiling_interval, environment, network_disabled)
+        else:
+            out = client.containers.run(container,
+                                        command,
+                                        stderr=True,
+                                        volumes=bind_paths,
+                                        working_dir=working_dir,
+                                        network_disabled=network_disabled,
+                                        environment=environment).decode('utf-8')
 
     # TODO does this cleanup need to still run even if there was an error in the above run command?
-    # On Unix, files written by the above Docker run command will be owned by root and cannot be modified
-    # outside the container by a non-root user
     # Reset the file owner and the group inside the container
-    try:
-        # Only available on Unix
+    if fix_ownership:
         uid = os.getuid()
         gid = os.getgid()
 
         all_modified_volume_contents = set()
-        for src_path in pre_volume_contents.keys():
-            # Assumes the Docker run call is the only process that modified the contents
-            # Only considers files that were added, not files that were modified
-            post_volume_contents = set(src_path.iterdir())
-            modified_volume_contents = post_volume_contents - pre_volume_contents[src_path]
-            modified_volume_contents = [str(convert_docker_path(src_path, src_dest_map[src_path], p)) for p in
-                                        modified_volume_contents]
-            all_modified_volume_contents.update(modified_volume_contents)
+        with span('list_volumes', 'container'):
+            for src_path in pre_volume_contents.keys():
+                # Assumes the Docker run call is the only process that modified the contents
+                # Only considers files that were added, not files that were modified
+                post_volume_contents = set(src_path.iterdir())
+                modified_volume_contents = post_volume_contents - pre_volume_contents[src_path]
+                modified_volume_contents = [str(convert_docker_path(src_path, src_dest_map[src_path], p)) for p in
+                                            modified_volume_contents]
+                all_modified_volume_contents.update(modified_volume_contents)
 
         # This command changes the ownership of output files so we don't
         # get a permissions error when snakemake or the user try to touch the files
@@ -415,17 +450,14 @@ def run_container_docker(container: str, command: List[str], volumes: List[Tuple
             chown_command = ['chown', f'{uid}:{gid}', '--recursive']
             chown_command.extend(all_modified_volume_contents)
             chown_command = ' '.join(chown_command)
-            client.containers.run(container,
-                                chown_command,
-                                stderr=True,
-                                volumes=bind_paths,
-                                working_dir=working_dir,
-                                network_disabled=network_disabled,
-                                environment=environment).decode('utf-8')
-
-    # Raised on non-Unix systems
-    except AttributeError:
-        pass
+            with span('chown', 'container', files=len(all_modified_volume_contents)):
+                client.containers.run(container,
+                                    chown_command,
+                                    stderr=True,
+                                    volumes=bind_paths,
+                                    working_dir=working_dir,
+                                    network_disabled=network_disabled,
+                                    environment=environment).decode('utf-8')
 
     # TODO: Not sure whether this is needed or where to close the client
     client.close()
@@ -435,6 +467,43 @@ def run_container_docker(container: str, command: List[str], volumes: List[Tuple
     return out
 
 
+def run_profiled_container_docker(client: docker.DockerClient, container: str, command: List[str], bind_paths: List[str], working_dir: str, out_dir: str | os.PathLike, interval: float, environment: dict[str, str], network_disabled=False) -> str:
+    """
+    Runs a command in a detached Docker container so that its resource usage can be sampled through the Docker stats
+    API while it runs. The samples are written to 'usage-timeseries.tsv' in out_dir and summarized in
+    'usage-profile.tsv' in the same format as apptainer profiling.
+    Mirrors the blocking client.containers.run call, including raising docker.errors.ContainerError on a non-zero
+    exit status.
+    @param client: the Docker client
+    @param container: name of the DockerHub container without the 'docker://' prefix
+    @param command: command to run in the container
+    @param bind_paths: the volumes to mount formatted as Docker bind strings
+    @param working_dir: the working directory in the container
+    @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
+    @param interval: seconds between resource usage samples
+    @param environment: environment variables to set in the container
+    @param network_disabled: Disables the network on the container
+    @return: the combined stdout and stderr of the container
+    """
+    running = client.containers.run(container,
+                                     command,
+                                     detach=True,
+                                     volumes=bind_paths,
+                                     working_dir=working_dir,
+                                     network_disabled=network_disabled,
+                                     environment=environment)
+
+    with DockerStatsSampler(running, interval) as sampler:
+        exit_status = running.wait()['StatusCode']
+    write_usage_timeseries(sampler.samples, str(out_dir))
+    create_sampled_container_stats(sampler, str(out_dir))
+
+    if exit_status != 0:
+        raise docker.errors.ContainerError(running, exit_status, command, container,
+                                           running.logs(stdout=False, stderr=True))
+    return running.logs(stdout=True, stderr=True).decode('utf-8')
+
+
 def _prepare_singularity_image(resolved: ResolvedImage, config: ProcessedContainerSettings):
     """
     Prepare the image that apptainer/singularity should run.
@@ -517,7 +586,7 @@ def run_container_singularity(resolved: ResolvedImage, command: List[str], volum
     # See https://stackoverflow.com/questions/3095071/in-python-what-happens-when-you-import-inside-of-a-function
     from spython.main import Client
 
-    bind_paths = [f'{prepare_path_docker(src)}:{dest}' for src, dest in volumes]
+    bind_paths = unique_bind_paths(volumes)
 
     # TODO is try/finally needed for Singularity?
     # To debug a container add the execute arguments: singularity_options=['--debug'], quiet=False
@@ -533,44 +602,76 @@ def run_container_singularity(resolved: ResolvedImage, command: List[str], volum
     # https://docs.sylabs.io/guides/3.7/user-guide/environment_and_metadata.html#env-option
     singularity_options.extend(['--env', ",".join(env_to_items(environment))])
 
-    image_to_run = _prepare_singularity_image(resolved, config)
-
-    if config.enable_profiling:
-        # We won't end up using the spython client if profiling is enabled because
-        # we need to run everything manually to set up the cgroup
-        # Build the apptainer run command, which gets passed to the cgroup wrapper script
-        singularity_cmd = [
-            "apptainer", "exec"
-        ]
-        for bind in bind_paths:
-            singularity_cmd.extend(["--bind", bind])
-        singularity_cmd.extend(singularity_options)
-        singularity_cmd.append(image_to_run)
-        singularity_cmd.extend(command)
-
-        my_cgroup = create_peer_cgroup()
-        # The wrapper script is packaged with spras, and should be located in the same directory
-        # as `containers.py`.
-        wrapper = os.path.join(os.path.dirname(__file__), "cgroup_wrapper.sh")
-        cmd = [wrapper, my_cgroup] + singularity_cmd
-        proc = subprocess.run(cmd, capture_output=True, text=True, stderr=subprocess.STDOUT)
-
-        print("Reading memory and CPU stats from cgroup")
-        create_apptainer_container_stats(my_cgroup, out_dir)
-
-        result = proc.stdout
-    else:
-        result = Client.execute(
-            image=image_to_run,
-            command=command,
-            options=singularity_options,
-            bind=bind_paths
-        )
+    with span('prepare_image', 'container', image=resolved.image):
+        image_to_run = _prepare_singularity_image(resolved, config)
+
+    with span('container_run', 'container', framework=str(config.framework), container=resolved.image):
+        my_cgroup = None
+        scope_cmd = None
+        if config.enable_profiling:
+            my_cgroup = create_peer_cgroup()
+            if my_cgroup is None:
+                # Outside of HTCondor, the current process usually cannot create a peer cgroup,
+                # so ask systemd for a transient scope with a delegated cgroup instead
+                unit = f"spras-{os.getpid()}-{time.monotonic_ns()}"
+                scope_cmd = create_delegated_scope_command(unit)
+                if scope_cmd is None:
+                    warnings.warn(
+                        "Profiling is enabled, but neither a peer cgroup nor a systemd scope could be created. "
+                        "Running the container without profiling.",
+                        stacklevel=2
+                    )
+
+        if my_cgroup is not None or scope_cmd is not None:
+            # We won't end up using the spython client if profiling is enabled because
+            # we need to run everything manually to set up the cgroup
+            # Build the apptainer run command, which gets passed to the cgroup wrapper script
+            singularity_cmd = [
+                "apptainer", "exec"
+            ]
+            for bind in bind_paths:
+                singularity_cmd.extend(["--bind", bind])
+            singularity_cmd.extend(singularity_options)
+            singularity_cmd.append(image_to_run)
+            singularity_cmd.extend(command)
+
+            if my_cgroup is not None:
+                # The wrapper script is packaged with spras, and should be located in the same directory
+                # as `containers.py`.
+                wrapper = os.path.join(os.path.dirname(__file__), "cgroup_wrapper.sh")
+                cmd = [wrapper, my_cgroup] + singularity_cmd
+                # Poll the cgroup while the container runs to record how its resource usage changes over time
+                with CgroupSampler(my_cgroup, config.profiling_interval) as sampler:
+                    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                write_usage_timeseries(sampler.samples, out_dir)
+
+                print("Reading memory and CPU stats from cgroup")
+                create_apptainer_container_stats(my_cgroup, out_dir)
+                output, return_code = proc.stdout, proc.returncode
+            else:
+                proc = subprocess.Popen(scope_cmd + singularity_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                # The scope is removed as soon as the container exits, so all statistics come from the samples
+                with ProcessCgroupSampler(proc.pid, f"{unit}.scope", config.profiling_interval) as sampler:
+                    output, _ = proc.communicate()
+                write_usage_timeseries(sampler.samples, out_dir)
+                create_sampled_container_stats(sampler, out_dir)
+                return_code = proc.returncode
+
+            # Match the spython message format so run_container_and_log reports a non-zero exit status
+            result = {'message': [output], 'return_code': return_code}
+        else:
+            result = Client.execute(
+                image=image_to_run,
+                command=command,
+                options=singularity_options,
+                bind=bind_paths
+            )
 
     return result
 
 
 # Because this is called independently for each file, the same local path can be mounted to multiple volumes
+# Use a VolumePlanner to bind each local directory once
 def prepare_volume(filename: Union[str, os.PathLike], volume_base: Union[str, PurePath], config: ProcessedContainerSettings) -> Tuple[Tuple[PurePath, PurePath], str]:
     """
     Makes a file on the local file system accessible within a container by mapping the local (source) path to a new
@@ -590,23 +691,79 @@ def prepare_volume(filename: Union[str, os.PathLike], volume_base: Union[str, Pu
     if isinstance(filename, os.PathLike):
         filename = str(filename)
 
-    filename_hash = hash_filename(filename, config.hash_length)
-    dest = PurePosixPath(base_path, filename_hash)
+    with span('prepare_volume', 'container', filename=filename):
+        filename_hash = hash_filename(filename, config.hash_length)
+        dest = PurePosixPath(base_path, filename_hash)
 
-    abs_filename = Path(filename).resolve()
-    container_filename = str(PurePosixPath(dest, abs_filename.name))
-    if abs_filename.is_dir():
-        dest = PurePosixPath(dest, abs_filename.name)
-        src = abs_filename
-    else:
-        parent = abs_filename.parent
-        if parent.as_posix() == '.':
-            parent = Path.cwd()
-        src = parent
+        abs_filename = Path(filename).resolve()
+        container_filename = str(PurePosixPath(dest, abs_filename.name))
+        if abs_filename.is_dir():
+            dest = PurePosixPath(dest, abs_filename.name)
+            src = abs_filename
+        else:
+            parent = abs_filename.parent
+            if parent.as_posix() == '.':
+                parent = Path.cwd()
+            src = parent
 
     return (src, dest), container_filename
 
 
+class VolumePlanner:
+    """
+    Plans the volumes of a container so that each local directory is mounted once, no matter how many of its files
+    the container uses.
+    Unlike prepare_volume, the destination path is derived from the local directory rather than the filename, so all
+    files in the same directory share a single bind and their container paths are computed once per directory.
+    An example mapped filename looks like '/spras/MVGU7LF/prepared/oi1-edges.txt'.
+    """
+
+    def __init__(self, volume_base: Union[str, PurePath], config: ProcessedContainerSettings):
+        """
+        @param volume_base: The base directory in the container, which must be an absolute directory
+        @param config: the container settings, which set the length of the destination hash
+        """
+        self.base_path = PurePosixPath(volume_base)
+        if not self.base_path.is_absolute():
+            raise ValueError(f'Volume base must be an absolute path: {volume_base}')
+        self.hash_length = config.hash_length
+        # Maps each local (source) directory to its container (destination) directory
+        self._binds: dict[Path, PurePosixPath] = {}
+
+    def _bind(self, src: Path) -> PurePosixPath:
+        dest = self._binds.get(src)
+        if dest is None:
+            # Like prepare_volume, hash the path relative to the working directory so the container paths are the
+            # same in every checkout. Directories outside the working directory can only be hashed by absolute path.
+            try:
+                hashed_path = src.relative_to(Path.cwd()).as_posix()
+            except ValueError:
+                hashed_path = src.as_posix()
+            dest = PurePosixPath(self.base_path, hash_filename(hashed_path, self.hash_length), src.name)
+            self._binds[src] = dest
+        return dest
+
+    def add(self, filename: Union[str, os.PathLike]) -> str:
+        """
+        Makes a file or directory on the local file system accessible within the container.
+        Files are accessed through a bind of their parent directory and directories are bound directly.
+        @param filename: The file or directory on the local file system to map
+        @return: the path of the file or directory inside the container
+        """
+        with span('prepare_volume', 'container', filename=str(filename)):
+            abs_filename = Path(filename).resolve()
+            if abs_filename.is_dir():
+                return str(self._bind(abs_filename))
+            return str(PurePosixPath(self._bind(abs_filename.parent), abs_filename.name))
+
+    @property
+    def binds(self) -> List[Tuple[PurePath, PurePath]]:
+        """
+        The volumes to mount, where each item is a (source, destination) tuple, in the order they were first used
+        """
+        return list(self._binds.items())
+
+
 def run_container_dsub(container: str, command: List[str], volumes: List[Tuple[PurePath, PurePath]], working_dir: str, environment: Optional[dict[str, str]] = None) -> str:
     """
     Runs a command in the Google Cloud using dsub.
@@ -130,6 +130,8 @@ class Dataset:
                 f"Edge file {interactome_loc} must have three or four columns but found {num_cols}"
             )
 
+        self.node_universe = Dataset.interactome_nodes(self.interactome)
+
         node_set = set(self.interactome.Interactor1.unique())
         node_set = node_set.union(set(self.interactome.Interactor2.unique()))
 
@@ -161,6 +163,17 @@ class Dataset:
         self.node_table.insert(0, "NODEID", self.node_table.pop("NODEID"))
         self.other_files = dataset_params.other_files
 
+    @staticmethod
+    def interactome_nodes(interactome: pd.DataFrame) -> pd.Index:
+        """
+        The distinct nodes of an interactome, in sorted order when the node identifiers can be sorted
+        """
+        nodes = pd.Index(pd.unique(pd.concat([interactome["Interactor1"], interactome["Interactor2"]], ignore_index=True)))
+        try:
+            return nodes.sort_values()
+        except TypeError:
+            return nodes
+
     def get_node_columns(self, col_names: list[str]) -> pd.DataFrame:
         """
         @param scope: The name of the algorithm (or a more general 'scope' like SPRAS)
@@ -234,3 +247,11 @@ class Dataset:
             raise ValueError("interactome is None: can't copy a non-existent interactome.")
         return self.interactome.copy(deep = True)
 
+    def get_node_universe(self) -> pd.Index:
+        """
+        The distinct interactome nodes, which are computed once when the dataset is merged
+        """
+        # Datasets pickled before the node universe was stored compute it from the interactome
+        if getattr(self, "node_universe", None) is None:
+            self.node_universe = Dataset.interactome_nodes(self.interactome)
+        return self.node_universe
@@ -2,13 +2,14 @@ from pathlib import Path
 
 from pydantic import BaseModel, ConfigDict
 
-from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import ContainerError, prepare_volume, run_container_and_log
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
+from spras.containers import ContainerError, VolumePlanner, run_container_and_log
 from spras.dataset import Dataset
 from spras.interactome import (
     convert_directed_to_undirected,
     reinsert_direction_col_undirected,
 )
+from spras.native.diamond import find_module, write_module
 from spras.prm import PRM
 from spras.util import duplicate_edges, raw_pathway_df, shrink_rank_column
 
@@ -35,6 +36,7 @@ class DIAMOnD(PRM[DIAMOnDParams]):
     """
     required_inputs = ['seeds', 'network']
     dois = ["10.1371/journal.pcbi.1004120"]
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data, filename_map):
@@ -67,22 +69,22 @@ class DIAMOnD(PRM[DIAMOnDParams]):
         if not container_settings: container_settings = ProcessedContainerSettings()
         DIAMOnD.validate_required_run_args(inputs)
 
-        work_dir = '/diamond'
+        if container_settings.backend == ExecutionBackend.native:
+            DIAMOnD.run_native(inputs, output_file, args)
+            return
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        work_dir = '/diamond'
 
-        bind_path, seeds_file = prepare_volume(inputs["seeds"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, network_file = prepare_volume(inputs["network"], work_dir, container_settings)
-        volumes.append(bind_path)
+        seeds_file = volumes.add(inputs["seeds"])
+        network_file = volumes.add(inputs["network"])
 
         # Create the parent directories for the output file if needed
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_file = prepare_volume(output_file, work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_file = volumes.add(output_file)
 
         command = ['python',
                    '/DIAMOnD.py',
@@ -97,7 +99,7 @@ class DIAMOnD(PRM[DIAMOnDParams]):
             run_container_and_log('DIAMOND',
                                 container_suffix,
                                 command,
-                                volumes,
+                                volumes.binds,
                                 work_dir,
                                 out_dir,
                                 container_settings)
@@ -109,6 +111,19 @@ class DIAMOnD(PRM[DIAMOnDParams]):
                                    f"a 'nix' KeyError:") from err
             raise err # Miscellaneous error we don't know how to handle yet.
 
+    @staticmethod
+    def run_native(inputs, output_file, args):
+        """
+        Run DIAMOnD in process with spras.native.diamond instead of the DIAMOnD container.
+        The output file has the same format as the container output. Runs with different n and the same alpha reuse the
+        nodes that were already added.
+        """
+        try:
+            added_nodes = find_module(inputs["network"], inputs["seeds"], args.n, args.alpha)
+        except RuntimeError as err:
+            raise RuntimeError(f"DIAMOnD had too many iterations ({args.n}) with a small network!") from err
+        write_module(added_nodes, output_file)
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         df = raw_pathway_df(raw_pathway_file, sep='\t', header=0)
@@ -1,13 +1,16 @@
 import json
+import os
+import uuid
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
 from spras.config.container_schema import ProcessedContainerSettings
 from spras.config.util import BaseModel
-from spras.containers import ContainerError, prepare_volume, run_container_and_log
+from spras.containers import ContainerError, VolumePlanner, run_container_and_log
 from spras.interactome import (
     add_constant,
     reinsert_direction_col_undirected,
@@ -15,7 +18,7 @@ from spras.interactome import (
 from spras.prm import PRM
 from spras.util import duplicate_edges
 
-__all__ = ['DOMINO', 'DominoParams', 'pre_domino_id_transform', 'post_domino_id_transform']
+__all__ = ['DOMINO', 'DominoParams', 'pre_domino_id_transform', 'post_domino_id_transform', 'write_module_edges']
 
 ID_PREFIX = 'ENSG0'
 ID_PREFIX_LEN = len(ID_PREFIX)
@@ -40,6 +43,7 @@ Interactor1     ppi     Interactor2
 """
 class DOMINO(PRM[DominoParams]):
     required_inputs = ['network', 'active_genes']
+    optional_inputs = ['slices']
     dois = ["10.15252/msb.20209593"]
 
     @staticmethod
@@ -58,7 +62,7 @@ class DOMINO(PRM[DominoParams]):
         node_df = node_df[node_df['active'] == True]
 
         # Transform each node id with a prefix
-        node_df['NODEID'] = node_df['NODEID'].apply(pre_domino_id_transform)
+        node_df['NODEID'] = ID_PREFIX + node_df['NODEID']
 
         # Create active_genes file
         node_df.to_csv(filename_map['active_genes'], sep='\t', index=False, columns=['NODEID'], header=False)
@@ -72,8 +76,8 @@ class DOMINO(PRM[DominoParams]):
         edges_df = add_constant(edges_df, 'ppi', 'ppi')
 
         # Transform each node id with a prefix
-        edges_df['Interactor1'] = edges_df['Interactor1'].apply(pre_domino_id_transform)
-        edges_df['Interactor2'] = edges_df['Interactor2'].apply(pre_domino_id_transform)
+        edges_df['Interactor1'] = ID_PREFIX + edges_df['Interactor1']
+        edges_df['Interactor2'] = ID_PREFIX + edges_df['Interactor2']
 
         edges_df.to_csv(filename_map['network'], sep='\t', index=False, columns=['Interactor1', 'ppi', 'Interactor2'],
                         header=['ID_interactor_A', 'ppi', 'ID_interactor_B'])
@@ -86,56 +90,36 @@ class DOMINO(PRM[DominoParams]):
 
         work_dir = '/spras'
 
-        # Each volume is a tuple (source, destination)
-        volumes = list()
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, network_file = prepare_volume(inputs["network"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, node_file = prepare_volume(inputs["active_genes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        network_file = volumes.add(inputs["network"])
+        node_file = volumes.add(inputs["active_genes"])
 
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
-
-        slices_file = Path(out_dir, 'slices.txt')
-        bind_path, mapped_slices_file = prepare_volume(str(slices_file), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
 
-        # Make the Python command to run within the container
-        slicer_command = ['slicer',
-                          '--network_file', network_file,
-                          '--output_file', mapped_slices_file]
+        # The slices only depend on the network, so the workflow slices each dataset's network once and passes the
+        # slices to every run on that dataset
+        if inputs.get('slices'):
+            slices_file = Path(inputs['slices'])
+        else:
+            slices_file = Path(out_dir, Path(inputs['network']).stem + '-slices.txt')
+            DOMINO.slice_network(inputs['network'], slices_file, container_settings)
+        mapped_slices_file = volumes.add(str(slices_file))
 
         container_suffix = "domino"
-        try:
-            run_container_and_log('slicer',
-                                container_suffix,
-                                slicer_command,
-                                volumes,
-                                work_dir,
-                                out_dir,
-                                container_settings)
-        except ContainerError as err:
-            # Occurs when DOMINO gets passed some empty dataframe from network_file.
-            # This counts as an empty input, so we return an empty output.
-            if err.streams_contain("pandas.errors.EmptyDataError: No columns to parse from file"):
-                pass
-            else:
-                raise err
 
         # Make the Python command to run within the container
-        # Let visualization be always true, parallelization be always 1 thread, and use_cache be always false.
         domino_command = ['domino',
                           '--active_genes_files', node_file,
                           '--network_file', network_file,
                           '--slices_file', mapped_slices_file,
                           '--output_folder', mapped_out_dir,
                           '--use_cache', 'false',
-                          '--parallelization', '1',
-                          '--visualization', 'true']
+                          '--parallelization', str(container_settings.threads),
+                          '--visualization', str(container_settings.visualization).lower()]
 
         # Add optional arguments
         if args.slice_threshold is not None:
@@ -148,7 +132,7 @@ class DOMINO(PRM[DominoParams]):
             run_container_and_log('DOMINO',
                                   container_suffix,
                                   domino_command,
-                                  volumes,
+                                  volumes.binds,
                                   work_dir,
                                   out_dir,
                                   container_settings)
@@ -165,22 +149,68 @@ class DOMINO(PRM[DominoParams]):
             else:
                 raise err
 
-        # DOMINO creates a new folder in out_dir to output its modules HTML files into called active_genes
-        # The filename is determined by the input active_genes and cannot be configured
-        # Leave these HTML files for user inspection
-        out_modules_dir = Path(out_dir, 'active_genes')
-
-        # Concatenate each produced module HTML file into one file
-        with open(output_file, 'w') as f:
-            for html_file in out_modules_dir.glob('module_*.html'):
-                with open(html_file, 'r') as fi:
-                    f.write(fi.read())
+        # DOMINO creates a new folder in out_dir to output its modules into, which is named after the active_genes
+        # file and cannot be configured
+        # Leave the module HTML files for user inspection
+        out_modules_dir = Path(out_dir, Path(inputs['active_genes']).stem)
+
+        if container_settings.visualization:
+            # Concatenate each produced module HTML file into one file
+            with open(output_file, 'w') as f:
+                for html_file in out_modules_dir.glob('module_*.html'):
+                    with open(html_file, 'r') as fi:
+                        f.write(fi.read())
+        else:
+            write_module_edges(inputs['network'], Path(out_modules_dir, 'modules.out'), output_file)
 
-        # Clean up DOMINO intermediate and pickle files
-        slices_file.unlink(missing_ok=True)
+        # Clean up the DOMINO pickle files
         Path(out_dir, 'network.slices.pkl').unlink(missing_ok=True)
         Path(str(inputs['network']) + '.pkl').unlink(missing_ok=True)
 
+    @staticmethod
+    def slice_network(network_file, slices_file, container_settings=None):
+        """
+        Run the DOMINO slicer, which partitions the network into the slices DOMINO searches for modules
+        The slices only depend on the network, so they can be shared by all DOMINO runs on the same network
+        @param network_file: the network file written by generate_inputs
+        @param slices_file: the slices file to write
+        @param container_settings: the container settings to run the slicer with
+        """
+        if not container_settings: container_settings = ProcessedContainerSettings()
+
+        work_dir = '/spras'
+        volumes = VolumePlanner(work_dir, container_settings)
+
+        slices_file = Path(slices_file)
+        slices_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # The slicer writes to its own file and the finished slices replace the slices file at once, so an
+        # interrupted run never leaves partial slices behind
+        partial_slices_file = Path(slices_file.parent, f'{slices_file.stem}-{uuid.uuid4().hex}.partial')
+
+        # Make the Python command to run within the container
+        slicer_command = ['slicer',
+                          '--network_file', volumes.add(str(network_file)),
+                          '--output_file', volumes.add(str(partial_slices_file))]
+
+        try:
+            run_container_and_log('slicer',
+                                  'domino',
+                                  slicer_command,
+                                  volumes.binds,
+                                  work_dir,
+                                  slices_file.parent,
+                                  container_settings)
+        except ContainerError as err:
+            # Occurs when DOMINO gets passed some empty dataframe from network_file.
+            # This counts as an empty input, so we write empty slices.
+            if err.streams_contain("pandas.errors.EmptyDataError: No columns to parse from file"):
+                partial_slices_file.touch()
+            else:
+                raise err
+
+        os.replace(partial_slices_file, slices_file)
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         """
@@ -188,7 +218,8 @@ class DOMINO(PRM[DominoParams]):
         @param raw_pathway_file: the merged HTML modules file
         @param standardized_pathway_file: the edges from the modules written in the universal format
         """
-        edges_df = pd.DataFrame()
+        sources = []
+        targets = []
 
         with open(raw_pathway_file, 'r') as file:
             for line in file:
@@ -198,32 +229,23 @@ class DOMINO(PRM[DominoParams]):
                     clean_line = clean_line.replace('let data = ', '')  # Start of the line
                     clean_line = clean_line.replace(';', '')  # End of the line
 
-                    data = json.loads(clean_line)
-
-                    entries = []
-                    # Iterate over the JSON entries, which contain both node information and edge information
-                    for entry in data:
-                        entries.append(entry['data'])
-
-                    # Create a dataframe with all the data from the JSON row, keep only the source and target
-                    # columns that indicate edges
-                    # Dropping the other rows eliminates the node information
-                    module_df = pd.DataFrame(entries)
-                    try:
-                        module_df = module_df.loc[:, ['source', 'target']].dropna()
-                    except KeyError:
-                        module_df = pd.DataFrame()
-                    # Add the edges from this module to the cumulative pathway edges
-                    edges_df = pd.concat([edges_df, module_df], axis=0)
+                    # The JSON entries contain both node information and edge information
+                    # Only the entries with a source and target are edges
+                    for entry in json.loads(clean_line):
+                        data = entry['data']
+                        source = data.get('source')
+                        target = data.get('target')
+                        if source is not None and target is not None:
+                            sources.append(source)
+                            targets.append(target)
 
         # DOMINO produces empty output files in some settings such as when it is run with small input files
         # and generates a ValueError
-        if len(edges_df) > 0:
-            edges_df['rank'] = 1  # Adds in a rank column of 1s because the edges are not ranked
-
+        if len(sources) > 0:
             # Remove the prefix
-            edges_df['source'] = edges_df['source'].apply(post_domino_id_transform)
-            edges_df['target'] = edges_df['target'].apply(post_domino_id_transform)
+            edges_df = pd.DataFrame({'source': pd.Series(sources, dtype=str).str.removeprefix(ID_PREFIX),
+                                     'target': pd.Series(targets, dtype=str).str.removeprefix(ID_PREFIX)})
+            edges_df['rank'] = 1  # Adds in a rank column of 1s because the edges are not ranked
             edges_df = reinsert_direction_col_undirected(edges_df)
             edges_df.columns = ['Node1', 'Node2', 'Rank', 'Direction']
         else:
@@ -253,3 +275,41 @@ def post_domino_id_transform(node_id):
     @return the node id without the prefix, if it was present, otherwise the original node id
     """
     return node_id.removeprefix(ID_PREFIX)
+
+
+def write_module_edges(network_file, modules_file, output_file):
+    """
+    Write the edges of the DOMINO modules in the form parse_output reads from the module HTML files: one 'let data'
+    line per module listing its edges. This is used when DOMINO does not render the HTML files.
+    Each module has the network edges between its nodes, which are the edges the HTML files show.
+    @param network_file: the network file written by generate_inputs
+    @param modules_file: the modules.out file DOMINO writes, with the nodes of one module on each line like '[A, B]'
+    @param output_file: the raw pathway file
+    """
+    modules = []
+    if Path(modules_file).exists():
+        with open(modules_file) as f:
+            for line in f:
+                nodes = line.strip().removeprefix('[').removesuffix(']')
+                if nodes:
+                    modules.append([node.strip() for node in nodes.split(',')])
+
+    module_edges = pd.DataFrame(columns=['Module', 'source', 'target'])
+    if modules and os.path.getsize(network_file) > 0:
+        network = pd.read_csv(network_file, sep='\t', header=0, usecols=[0, 2], dtype=str, keep_default_na=False)
+        network.columns = ['source', 'target']
+        network['Edge'] = range(len(network))
+        # A node can be in more than one module, so the edges are matched to modules by joining on both endpoints
+        node_modules = pd.DataFrame({'Module': np.repeat(np.arange(len(modules)), [len(m) for m in modules]),
+                                     'Node': np.concatenate(modules)}).drop_duplicates()
+        module_edges = network.merge(node_modules.rename(columns={'Node': 'source'}), on='source')
+        module_edges = module_edges.merge(node_modules.rename(columns={'Node': 'target'}), on=['target', 'Module'])
+        module_edges = module_edges.sort_values(['Module', 'Edge'], kind='stable')
+
+    edges_per_module = dict(tuple(module_edges.groupby('Module', sort=False)))
+    with open(output_file, 'w') as f:
+        for module in range(len(modules)):
+            edges = edges_per_module.get(module, module_edges.iloc[0:0])
+            data = [{'data': {'source': source, 'target': target}}
+                    for source, target in zip(edges['source'], edges['target'], strict=True)]
+            f.write(f'let data = {json.dumps(data)};\n')
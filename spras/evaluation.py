@@ -2,25 +2,25 @@ import os
 import pickle as pkl
 from os import PathLike
 from pathlib import Path
-from typing import Iterable, TypedDict, Union
+from typing import Iterable, Optional, TypedDict, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    average_precision_score,
-    precision_recall_curve,
-    precision_score,
-    recall_score,
-)
 
+from spras.analysis.incidence import EdgeKeyEncoder, PathwayNodeMatrix
 from spras.analysis.ml import create_palette
+from spras.config.params import RunCatalog, run_algorithms
 from spras.interactome import (
     convert_directed_to_undirected,
     convert_undirected_to_directed,
     sort_and_deduplicate_undirected,
 )
 
+# The name of the ensemble pathway file of all algorithms, which the ensemble file of each algorithm prefixes with the
+# algorithm name
+ENSEMBLE_FILE = 'ensemble-pathway.txt'
+
 
 class GoldStandardDict(TypedDict):
     label: str
@@ -149,7 +149,8 @@ class Evaluation:
 
 
     @staticmethod
-    def node_precision_and_recall(file_paths: Iterable[Union[str, PathLike]], node_table: pd.DataFrame) -> pd.DataFrame:
+    def node_precision_and_recall(file_paths: Iterable[Union[str, PathLike]], node_table: pd.DataFrame,
+                                  node_matrix: Optional[PathwayNodeMatrix] = None) -> pd.DataFrame:
         """
         Computes node-level precision and recall for each pathway reconstruction output file.
 
@@ -158,29 +159,34 @@ class Evaluation:
         It compares the set of predicted nodes (from both columns Node1 and Node2) to a provided gold standard node table
         and computes precision and recall per file.
 
+        All files are evaluated at once from a sparse node-by-pathway matrix: the true positives of every pathway are
+        one product of the matrix with the gold standard node mask.
+
         @param file_paths: list of file paths of pathway reconstruction algorithm outputs
         @param node_table: the gold standard nodes
+        @param node_matrix: a node-by-pathway matrix that contains the file_paths, which is read from the files if it
+        is not provided
         @return: A DataFrame with the following columns:
                 - 'Pathway': Path object corresponding to each pathway file
                 - 'Precision': Precision of predicted nodes vs. gold standard nodes
                 - 'Recall': Recall of predicted nodes vs. gold standard nodes
         """
-        y_true = set(node_table['NODEID'])
-        results = []
-        for f in file_paths:
-            df = pd.read_table(f, sep='\t', header=0, usecols=['Node1', 'Node2'])
-            y_pred = set(df['Node1']).union(set(df['Node2']))
-            all_nodes = y_true.union(y_pred)
-            y_true_binary = [1 if node in y_true else 0 for node in all_nodes]
-            y_pred_binary = [1 if node in y_pred else 0 for node in all_nodes]
-            # default to 0.0 if there is a divide by 0 error
-            # not using precision_recall_curve because thresholds are binary (0 or 1); rather we are directly
-            # calculating precision and recall per pathway
-            precision = precision_score(y_true_binary, y_pred_binary, zero_division=0.0)
-            recall = recall_score(y_true_binary, y_pred_binary, zero_division=0.0)
-            results.append({'Pathway': f, 'Precision': precision, 'Recall': recall})
-
-        pr_df = pd.DataFrame(results)
+        file_paths = list(file_paths)
+        if node_matrix is None:
+            node_matrix = PathwayNodeMatrix.from_files(file_paths)
+        else:
+            node_matrix = node_matrix.select(file_paths)
+
+        gold_standard_nodes = pd.unique(node_table['NODEID'])
+        true_positives = node_matrix.overlap_counts(node_matrix.node_mask(gold_standard_nodes))
+        predicted = node_matrix.pathway_sizes()
+        # default to 0.0 if there is a divide by 0 error
+        # not using precision_recall_curve because thresholds are binary (0 or 1); rather we are directly
+        # calculating precision and recall per pathway
+        precision = np.divide(true_positives, predicted, out=np.zeros(len(file_paths)), where=predicted > 0)
+        recall = true_positives / len(gold_standard_nodes) if len(gold_standard_nodes) > 0 else np.zeros(len(file_paths))
+
+        pr_df = pd.DataFrame({'Pathway': file_paths, 'Precision': precision, 'Recall': recall})
         return pr_df
 
     @staticmethod
@@ -235,7 +241,8 @@ class Evaluation:
         pr_df.to_csv(output_file, sep='\t', index=False)
 
     @staticmethod
-    def precision_and_recall_per_pathway(pr_df: pd.DataFrame, output_file: str | PathLike, output_png: str | PathLike, aggregate_per_algorithm: bool = False):
+    def precision_and_recall_per_pathway(pr_df: pd.DataFrame, output_file: str | PathLike, output_png: str | PathLike, aggregate_per_algorithm: bool = False,
+                                         run_catalog: Optional[RunCatalog] = None):
         """
         Function for visualizing per pathway precision and recall across all algorithms. Each point in the plot represents
         a single pathway reconstruction. If `aggregate_per_algorithm` is set to True, the plot is restricted to a single
@@ -245,9 +252,10 @@ class Evaluation:
         @param output_file: the filename to save the precision and recall of each pathway
         @param output_png: the filename to plot the precision and recall of each pathway (not a PRC)
         @param aggregate_per_algorithm: Boolean indicating if function is used per algorithm (Default False)
+        @param run_catalog: the run catalog used to look up the algorithm of each pathway (Default None, which parses it from the pathway directory)
         """
         if not pr_df.empty:
-            pr_df['Algorithm'] = pr_df['Pathway'].apply(lambda p: Path(p).parent.name.split('-')[1])
+            pr_df['Algorithm'] = run_algorithms(pr_df['Pathway'], run_catalog)
             pr_df.sort_values(by=['Recall', 'Pathway'], axis=0, ascending=True, inplace=True)
 
             if aggregate_per_algorithm:
@@ -264,7 +272,8 @@ class Evaluation:
             raise ValueError("No pathways were provided to evaluate and visulize on. This likely means no algorithms or parameter combinations were run.")
 
     @staticmethod
-    def precision_and_recall_pca_chosen_pathway(pr_df: pd.DataFrame, output_file: str | PathLike, output_png: str | PathLike, aggregate_per_algorithm: bool = False):
+    def precision_and_recall_pca_chosen_pathway(pr_df: pd.DataFrame, output_file: str | PathLike, output_png: str | PathLike, aggregate_per_algorithm: bool = False,
+                                                run_catalog: Optional[RunCatalog] = None):
         """
 
         Function for visualizing the precision and recall of the single parameter combination selected via PCA,
@@ -276,11 +285,12 @@ class Evaluation:
         @param output_file: the filename to save the precision and recall of each pathway
         @param output_png: the filename to plot the precision and recall of each pathway (not a PRC)
         @param aggregate_per_algorithm: Boolean indicating if function is used per algorithm (Default False)
+        @param run_catalog: the run catalog used to look up the algorithm of each pathway (Default None, which parses it from the pathway directory)
         """
         # TODO update to add in the pathways for the algorithms that do not provide a pca chosen pathway https://github.com/Reed-CompBio/spras/issues/341
 
         if not pr_df.empty:
-            pr_df['Algorithm'] = pr_df['Pathway'].apply(lambda p: Path(p).parent.name.split('-')[1])
+            pr_df['Algorithm'] = run_algorithms(pr_df['Pathway'], run_catalog)
             pr_df.sort_values(by=['Recall', 'Pathway'], axis=0, ascending=True, inplace=True)
 
             if aggregate_per_algorithm:
@@ -305,55 +315,78 @@ class Evaluation:
                 plt.close()
 
     @staticmethod
-    def pca_chosen_pathway(coordinates_files: Iterable[Union[str, PathLike]], pathway_summary_file: str, output_dir: str):
+    def ensemble_label(ensemble_file: Union[str, PathLike]) -> str:
+        """
+        The label of an ensemble file, which is the algorithm of an <algorithm>-ensemble-pathway.txt file and
+        'ensemble' for the ensemble-pathway.txt file of all algorithms. Algorithm names can contain '-'.
+        Other files are labeled by the part of their name before the first '-'.
+        """
+        name = Path(ensemble_file).name
+        if name.endswith(f'-{ENSEMBLE_FILE}'):
+            return name[:-len(ENSEMBLE_FILE) - 1]
+        return name.split('-')[0]
+
+    @staticmethod
+    def pca_chosen_pathway(coordinates_files: Iterable[Union[str, PathLike]], pathway_summary_file: str, output_dir: str,
+                           top_n: int = 1):
         """
         Identifies the pathway closest to a specified highest kernel density estimated (KDE) peak based on PCA
         coordinates
-        Calculates the Euclidean distance from each data point to the KDE peak, then selects the closest pathway as the
-        representative pathway.
+        Calculates the Euclidean distance from each data point to the KDE peak, or to the centroid if the coordinates
+        have no KDE peak, then selects the closest pathway as the representative pathway.
         If there is more than one representative pathway, a tiebreaker will be used
             1) choose smallest pathway (smallest number of edges and nodes)
             2) end all be all, choose the first one based on name
         Returns a list of file paths for the representative pathway associated with the closest data point to the
         centroid.
+        The coordinates files are stacked so the distances of all of them are computed at once, and the summary file
+        is read once.
 
         @param coordinates_files: a list of PCA coordinates files for a dataset or specific algorithm in a dataset
         @param pathway_summary_file: a file for each file per dataset about its network statistics
         @param output_dir: the main reconstruction directory
+        @param top_n: the number of closest pathways to choose from each coordinates file, which is each algorithm for
+        the per algorithm coordinates files (Default 1)
         """
          # TODO update to add in the pathways for the algorithms that do not provide a pca chosen pathway https://github.com/Reed-CompBio/spras/issues/341
-
-        rep_pathways = []
-
-        for coordinates_file in coordinates_files:
-            coord_df = pd.read_csv(coordinates_file, delimiter='\t', header=0)
-
-            kde_peak_row = coord_df[coord_df['datapoint_labels'] == 'kde_peak']
-            kde_peak = kde_peak_row.iloc[0, 1:].tolist()
-            coord_df = coord_df[~coord_df['datapoint_labels'].isin(['kde_peak', 'centroid'])]
-
-            pc_columns = [col for col in coord_df.columns if col.startswith('PC')]
-            coord_df['Distance To KDE peak'] = np.sqrt(sum((coord_df[pc] - kde_peak[i]) ** 2 for i, pc in enumerate(pc_columns))).round(8)
-            min_distance = coord_df['Distance To KDE peak'].min()
-            candidates = coord_df[coord_df['Distance To KDE peak'] == min_distance]
-
-            if len(candidates) == 1:
-                closest_to_kde_peak = candidates.iloc[0]
-            else:
-                # add in summary stats file
-                summary_stats_df = pd.read_csv(pathway_summary_file, sep='\t', header=0)
-                summary_stats_df['Name'] = summary_stats_df['Name'].apply(lambda x: x.split('/')[-2])
-
-                merged_df = candidates.merge(summary_stats_df, left_on='datapoint_labels', right_on='Name', how='inner')[['datapoint_labels', 'PC1', 'PC2', 'Distance To KDE peak', 'Number of edges', 'Number of nodes']]
-                merged_df = merged_df.sort_values(by=['Number of edges', 'Number of nodes', 'datapoint_labels'], ascending=[True, True, True])
-
-                # pick first one after full sorting
-                closest_to_kde_peak = merged_df.iloc[0]
-
-            rep_pathway = os.path.join(output_dir, f"{closest_to_kde_peak['datapoint_labels']}", "pathway.txt")
-            rep_pathways.append(rep_pathway)
-
-        return rep_pathways
+        if top_n < 1:
+            raise ValueError(f"top_n={top_n} must be at least 1")
+
+        coordinates_files = list(coordinates_files)
+        coord_dfs = [pd.read_csv(coordinates_file, delimiter='\t', header=0) for coordinates_file in coordinates_files]
+        if not coord_dfs:
+            return []
+        coord_df = pd.concat(coord_dfs, keys=range(len(coord_dfs)), names=['File', None]).reset_index(level='File')
+        coord_df.reset_index(drop=True, inplace=True)
+        pc_columns = [col for col in coord_df.columns if col.startswith('PC')]
+
+        # The KDE peak of each coordinates file, or its centroid if PCA was run without a KDE
+        labels = coord_df['datapoint_labels']
+        references = pd.concat([coord_df[labels == 'centroid'], coord_df[labels == 'kde_peak']])
+        references = references.drop_duplicates('File', keep='last').set_index('File')[pc_columns]
+        missing = sorted(set(range(len(coord_dfs))) - set(references.index))
+        if missing:
+            raise ValueError(f"PCA coordinates files {[coordinates_files[index] for index in missing]} have neither a KDE peak nor a centroid")
+
+        coord_df = coord_df[~labels.isin(['kde_peak', 'centroid'])].copy()
+        # Files with fewer components than others have missing coordinates, and a KDE peak only has the first two
+        differences = coord_df[pc_columns].to_numpy(dtype=float) - references.loc[coord_df['File'], pc_columns].to_numpy(dtype=float)
+        coord_df['Distance To KDE peak'] = np.linalg.norm(np.nan_to_num(differences), axis=1).round(8)
+
+        # add in summary stats file, indexed by the name of the pathway directory
+        summary_stats_df = pd.read_csv(pathway_summary_file, sep='\t', header=0, usecols=['Name', 'Number of nodes', 'Number of edges'])
+        summary_stats_df['Name'] = summary_stats_df['Name'].map(lambda name: Path(name).parent.name)
+        summary_stats_df = summary_stats_df.drop_duplicates('Name').set_index('Name')
+        sizes = summary_stats_df.reindex(coord_df['datapoint_labels'])
+        coord_df['Number of edges'] = sizes['Number of edges'].to_numpy()
+        coord_df['Number of nodes'] = sizes['Number of nodes'].to_numpy()
+
+        # pick the first ones of each coordinates file after full sorting
+        coord_df = coord_df.sort_values(by=['File', 'Distance To KDE peak', 'Number of edges', 'Number of nodes', 'datapoint_labels'],
+                                        kind='stable')
+        chosen = coord_df.groupby('File', sort=False).head(top_n)
+
+        return [os.path.join(output_dir, f"{label}", "pathway.txt") for label in chosen['datapoint_labels']]
 
     @staticmethod
     def edge_frequency_node_ensemble(node_table: pd.DataFrame, ensemble_files: Iterable[Union[str, PathLike]], dataset_file: str) -> dict:
@@ -366,10 +399,12 @@ class Evaluation:
             - Answers "Did the algorithm(s) select the correct nodes from the entire network?"
             - It measures whether the algorithm(s) can distinguish relevant gold standard nodes
             from the full "universe" of possible nodes present in the input network.
+            - The distinct interactome nodes are stored with the merged dataset, so the node universe is built once
+            for all of the ensemble files.
         2. For each edge ensemble file:
             a. Read edges and their frequencies.
-            b. Convert edges frequencies into node-level frequencies for Node1 and Node2.
-            c. Merge with the default node set and group by node, taking the maximum frequency per node.
+            b. Scatter the edge frequencies into the node universe for Node1 and Node2, keeping the maximum
+            frequency per node.
         3. Store the resulting node-frequency ensemble under the corresponding ensemble source (label).
 
         If the interactome or gold standard table is empty, a ValueError is raised.
@@ -382,10 +417,10 @@ class Evaluation:
 
         node_ensembles_dict = dict()
 
-        pickle = Evaluation.from_file(dataset_file)
-        interactome = pickle.get_interactome()
+        dataset = Evaluation.from_file(dataset_file)
+        interactome_nodes = dataset.get_node_universe()
 
-        if interactome.empty:
+        if interactome_nodes.empty:
             raise ValueError(
                 f"Cannot compute PR curve or generate node ensemble. Input network for dataset \"{dataset_file.split('-')[0]}\" is empty."
             )
@@ -394,33 +429,74 @@ class Evaluation:
                 f"Cannot compute PR curve or generate node ensemble. Gold standard associated with dataset \"{dataset_file.split('-')[0]}\" is empty."
             )
 
-        # set the initial default frequencies to 0 for all interactome and gold standard nodes
-        node1_interactome = interactome[['Interactor1']].rename(columns={'Interactor1': 'Node'})
-        node1_interactome['Frequency'] = 0.0
-        node2_interactome = interactome[['Interactor2']].rename(columns={'Interactor2': 'Node'})
-        node2_interactome['Frequency'] = 0.0
-        gs_nodes = node_table[[Evaluation.NODE_ID]].rename(columns={Evaluation.NODE_ID: 'Node'})
-        gs_nodes['Frequency'] = 0.0
-
-        # combine gold standard and network nodes
-        other_nodes = pd.concat([node1_interactome, node2_interactome, gs_nodes])
+        # the gold standard and network nodes, which have a default frequency of 0
+        node_universe = Evaluation._add_nodes(interactome_nodes, node_table[Evaluation.NODE_ID])
 
         for ensemble_file in ensemble_files:
-            label = Path(ensemble_file).name.split('-')[0]
+            label = Evaluation.ensemble_label(ensemble_file)
             ensemble_df = pd.read_table(ensemble_file, sep='\t', header=0)
 
-            if not ensemble_df.empty:
-                node1 = ensemble_df[['Node1', 'Frequency']].rename(columns={'Node1': 'Node'})
-                node2 = ensemble_df[['Node2', 'Frequency']].rename(columns={'Node2': 'Node'})
-                all_nodes = pd.concat([node1, node2, other_nodes])
-                node_ensemble = all_nodes.groupby(['Node']).max().reset_index()
-            else:
-                node_ensemble = other_nodes.groupby(['Node']).max().reset_index()
+            nodes = node_universe
+            endpoints = pd.concat([ensemble_df['Node1'], ensemble_df['Node2']], ignore_index=True)
+            positions = nodes.get_indexer(endpoints)
+            if (positions < 0).any():
+                # ensemble nodes that are not in the interactome are still scored
+                nodes = Evaluation._add_nodes(nodes, endpoints[positions < 0])
+                positions = nodes.get_indexer(endpoints)
 
-            node_ensembles_dict[label] = node_ensemble
+            frequencies = np.zeros(len(nodes))
+            np.maximum.at(frequencies, positions, np.tile(ensemble_df['Frequency'].to_numpy(dtype=float), 2))
+            node_ensembles_dict[label] = pd.DataFrame({'Node': nodes, 'Frequency': frequencies})
 
         return node_ensembles_dict
 
+    @staticmethod
+    def _add_nodes(nodes: pd.Index, new_nodes: Iterable) -> pd.Index:
+        """
+        The sorted union of a sorted node index and more nodes
+        """
+        missing = pd.Index(pd.unique(pd.Series(list(new_nodes), dtype=object))).difference(nodes, sort=False)
+        if missing.empty:
+            return nodes
+        nodes = nodes.append(missing)
+        try:
+            return nodes.sort_values()
+        except TypeError:
+            return nodes
+
+    @staticmethod
+    def precision_recall_curve(y_true: np.ndarray, y_scores: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        """
+        The precision-recall curve and average precision of scores against binary labels, with the same values as
+        scikit-learn's precision_recall_curve and average_precision_score.
+        The scores are sorted once for both, instead of once by each scikit-learn function.
+
+        @param y_true: a vector of 0 and 1 labels
+        @param y_scores: the score of each label
+        @return: the precision, recall, thresholds and average precision in the scikit-learn format, where the
+        thresholds increase and precision and recall end with the (1, 0) point that has no threshold
+        """
+        y_true = np.asarray(y_true, dtype=np.int64)
+        y_scores = np.asarray(y_scores, dtype=float)
+        order = np.argsort(y_scores, kind='mergesort')[::-1]
+        y_scores = y_scores[order]
+
+        # the last position of each distinct score, from the highest score to the lowest
+        threshold_positions = np.r_[np.flatnonzero(np.diff(y_scores)), len(y_scores) - 1]
+        true_positives = np.cumsum(y_true[order])[threshold_positions]
+        predicted = threshold_positions + 1
+        precision = true_positives / predicted
+        if true_positives[-1] == 0:
+            # scikit-learn sets recall to 1 for all thresholds if there are no positive labels
+            recall = np.ones(len(true_positives))
+        else:
+            recall = true_positives / true_positives[-1]
+
+        precision = np.r_[precision[::-1], 1.0]
+        recall = np.r_[recall[::-1], 0.0]
+        average_precision = float(max(0.0, -np.sum(np.diff(recall) * precision[:-1])))
+        return precision, recall, y_scores[threshold_positions][::-1], average_precision
+
     @staticmethod
     def precision_recall_curve_node_ensemble(node_ensembles: dict, node_table: pd.DataFrame, output_png: str | PathLike,
                                              output_file: str | PathLike, aggregate_per_algorithm: bool = False):
@@ -438,7 +514,12 @@ class Evaluation:
         average precision
         @param aggregate_per_algorithm: Boolean indicating if function is used per algorithm (Default False)
         """
-        gold_standard_nodes = set(node_table[Evaluation.NODE_ID])
+        # label the nodes of all ensembles with one membership test against the gold standard nodes
+        gold_standard_nodes = pd.unique(node_table[Evaluation.NODE_ID])
+        ensemble_sizes = [len(node_ensemble) for node_ensemble in node_ensembles.values()]
+        is_gold_standard = pd.concat([node_ensemble['Node'] for node_ensemble in node_ensembles.values()],
+                                     ignore_index=True).isin(gold_standard_nodes).to_numpy(dtype=np.int64)
+        y_trues = np.split(is_gold_standard, np.cumsum(ensemble_sizes)[:-1])
 
         # make color palette per ensemble label name
         label_names = list(node_ensembles.keys())
@@ -451,13 +532,11 @@ class Evaluation:
 
         baseline = None
 
-        for label, node_ensemble in node_ensembles.items():
+        for (label, node_ensemble), y_true in zip(node_ensembles.items(), y_trues, strict=True):
             if not node_ensemble.empty:
-                y_true = [1 if node in gold_standard_nodes else 0 for node in node_ensemble['Node']]
-                y_scores = node_ensemble['Frequency'].tolist()
-                precision, recall, thresholds = precision_recall_curve(y_true, y_scores)
+                y_scores = node_ensemble['Frequency'].to_numpy(dtype=float)
                 # avg precision summarizes a precision-recall curve as the weighted mean of precisions achieved at each threshold
-                avg_precision = average_precision_score(y_true, y_scores)
+                precision, recall, thresholds, avg_precision = Evaluation.precision_recall_curve(y_true, y_scores)
 
                 # only set baseline precision once
                 # the same for every algorithm per dataset/goldstandard pair
@@ -468,7 +547,7 @@ class Evaluation:
                 plt.plot(recall, precision, color=color_palette[label], marker='o',
                          label=f'{label.capitalize()} (AP: {avg_precision:.4f})')
 
-                # Dropping last elements because scikit-learn adds (1, 0) to precision/recall for plotting, not tied to real thresholds
+                # Dropping last elements because precision_recall_curve adds (1, 0) to precision/recall for plotting, as scikit-learn does, not tied to real thresholds
                 # https://scikit-learn.org/stable/modules/generated/sklearn.metrics.precision_recall_curve.html#sklearn.metrics.precision_recall_curve:~:text=Returns%3A-,precision,predictions%20with%20score%20%3E%3D%20thresholds%5Bi%5D%20and%20the%20last%20element%20is%200.,-thresholds
                 prc_data = {
                     'Threshold': thresholds,
@@ -519,24 +598,250 @@ class Evaluation:
         complete_df.loc[not_last_rows, ['Average_Precision', 'Baseline']] = None
         complete_df.to_csv(output_file, index=False, sep='\t')
 
+    def edge_tables(self) -> dict[str, pd.DataFrame]:
+        """
+        The edge gold standard treated as mixed, fully undirected and fully directed, by edge directionality
+        """
+        return {'mixed': self.mixed_edge_table, 'undirected': self.undirected_edge_table,
+                'directed': self.directed_edge_table}
+
     @staticmethod
-    def edge_dummy_function(mixed_edge_table: pd.DataFrame, undirected_edge_table: pd.DataFrame, directed_edge_table: pd.DataFrame, dummy_file: str):
-        """
-        Temporary function to test edge file implementation.
-        Will be removed from SPRAS's evaluation code in the future.
-
-        Takes in the different edge table versions (mixed, fully directed, fully undirected)
-        for a specific edge gold standard dataset and writes them to a file.
-
-        @param mixed_edge_table: Edge gold standard treated as mixed directionality.
-        @param undirected_edge_table: Edge gold standard treated as fully undirected.
-        @param directed_edge_table: Edge gold standard treated as fully directed.
-        @param dummy_file: Filename to save the edge tables.
-        """
-        with open(dummy_file, "w") as f:
-            f.write("Mixed Edge Table\n")
-            mixed_edge_table.to_csv(f, index=False)
-            f.write("\n\nUndirected Edge Table\n")
-            undirected_edge_table.to_csv(f, index=False)
-            f.write("\n\nDirected Edge Table\n")
-            directed_edge_table.to_csv(f, index=False)
+    def _gold_standard_edge_keys(encoder: EdgeKeyEncoder, edge_table: pd.DataFrame, directionality: str) -> np.ndarray:
+        """
+        The distinct keys of the gold standard edges in an edge table with the columns 'Interactor1', 'Interactor2'
+        and 'Direction'
+        """
+        keys, _ = encoder.keys(edge_table['Interactor1'].astype(str), edge_table['Interactor2'].astype(str),
+                               (edge_table['Direction'] == 'D').to_numpy(), directionality)
+        return np.unique(keys)
+
+    @staticmethod
+    def edge_precision_and_recall(file_paths: Iterable[Union[str, PathLike]], edge_tables: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Computes edge-level precision and recall for each pathway reconstruction output file and each way of treating
+        the directions of the edges.
+
+        Every edge of the pathways and the gold standard is encoded as an integer key over one shared node index, in
+        which undirected edges do not depend on the order of their nodes. The distinct edges of all pathways are
+        counted at once, so the true positives of every pathway are one membership test of the keys against the gold
+        standard keys followed by a count per pathway.
+
+        @param file_paths: list of file paths of pathway reconstruction algorithm outputs, each with the columns
+        'Node1', 'Node2', 'Rank', and 'Direction'
+        @param edge_tables: the gold standard edges by edge directionality, as returned by Evaluation.edge_tables.
+        In the directed comparison an undirected pathway edge predicts both of its directions and in the undirected
+        comparison directed pathway edges between the same nodes are one edge.
+        @return: A DataFrame with the following columns:
+                - 'Pathway': Path object corresponding to each pathway file
+                - 'Edge_Directionality': how the edge directions were compared (mixed, undirected, or directed)
+                - 'Precision': Precision of predicted edges vs. gold standard edges
+                - 'Recall': Recall of predicted edges vs. gold standard edges
+        """
+        file_paths = list(file_paths)
+        pathways = [pd.read_table(file_path, sep='\t', header=0, usecols=['Node1', 'Node2', 'Direction'], dtype=str)
+                    for file_path in file_paths]
+        edges = pd.concat(pathways, ignore_index=True) if pathways else pd.DataFrame(columns=['Node1', 'Node2', 'Direction'], dtype=str)
+        pathway_of_edge = np.repeat(np.arange(len(file_paths)), [len(p) for p in pathways])
+
+        encoder = EdgeKeyEncoder(pd.concat([edges['Node1'], edges['Node2'],
+                                            *[table[column].astype(str) for table in edge_tables.values()
+                                              for column in ['Interactor1', 'Interactor2']]]))
+
+        pr_dfs = []
+        for directionality, edge_table in edge_tables.items():
+            gold_standard_keys = Evaluation._gold_standard_edge_keys(encoder, edge_table, directionality)
+            keys, positions = encoder.keys(edges['Node1'], edges['Node2'], (edges['Direction'] == 'D').to_numpy(), directionality)
+            pathway_of_key = pathway_of_edge[positions]
+
+            # keep each distinct edge once per pathway
+            order = np.lexsort((keys, pathway_of_key))
+            keys, pathway_of_key = keys[order], pathway_of_key[order]
+            first = np.ones(len(keys), dtype=bool)
+            first[1:] = (keys[1:] != keys[:-1]) | (pathway_of_key[1:] != pathway_of_key[:-1])
+            keys, pathway_of_key = keys[first], pathway_of_key[first]
+
+            predicted = np.bincount(pathway_of_key, minlength=len(file_paths))
+            true_positives = np.bincount(pathway_of_key[np.isin(keys, gold_standard_keys)], minlength=len(file_paths))
+            # default to 0.0 if there is a divide by 0 error
+            precision = np.divide(true_positives, predicted, out=np.zeros(len(file_paths)), where=predicted > 0)
+            recall = true_positives / len(gold_standard_keys) if len(gold_standard_keys) > 0 else np.zeros(len(file_paths))
+            pr_dfs.append(pd.DataFrame({'Pathway': file_paths, 'Edge_Directionality': directionality,
+                                        'Precision': precision, 'Recall': recall}))
+
+        return pd.concat(pr_dfs, ignore_index=True)
+
+    @staticmethod
+    def precision_and_recall_per_pathway_edges(pr_df: pd.DataFrame, output_file: str | PathLike, output_png: str | PathLike,
+                                               run_catalog: Optional[RunCatalog] = None):
+        """
+        Function for visualizing the edge-level precision and recall of each pathway across all algorithms, with one
+        panel per edge directionality. Each point in a panel represents a single pathway reconstruction.
+
+        @param pr_df: Dataframe of calculated edge precision and recall for each pathway file and edge directionality
+        @param output_file: the filename to save the precision and recall of each pathway
+        @param output_png: the filename to plot the precision and recall of each pathway (not a PRC)
+        @param run_catalog: the run catalog used to look up the algorithm of each pathway (Default None, which parses it from the pathway directory)
+        """
+        if pr_df.empty:
+            raise ValueError("No pathways were provided to evaluate and visulize on. This likely means no algorithms or parameter combinations were run.")
+
+        pr_df['Algorithm'] = run_algorithms(pr_df['Pathway'], run_catalog)
+        pr_df.sort_values(by=['Edge_Directionality', 'Recall', 'Pathway'], axis=0, ascending=True, inplace=True)
+        color_palette = create_palette(pr_df['Algorithm'].tolist())
+        directionalities = pr_df['Edge_Directionality'].unique()
+
+        fig, axes = plt.subplots(1, len(directionalities), figsize=(7 * len(directionalities), 7), squeeze=False)
+        for ax, directionality in zip(axes[0], directionalities, strict=True):
+            for algorithm, subset in pr_df[pr_df['Edge_Directionality'] == directionality].groupby('Algorithm'):
+                ax.plot(subset['Recall'], subset['Precision'], color=color_palette[algorithm], marker='o',
+                        linestyle='', label=algorithm.capitalize())
+            ax.set_title(f'{directionality.capitalize()} edges')
+            ax.set_xlabel('Recall')
+            ax.set_ylabel('Precision')
+            ax.set_xlim(-0.05, 1.05)
+            ax.set_ylim(-0.05, 1.05)
+            ax.legend()
+            ax.grid(True)
+        fig.suptitle('Edge Precision and Recall Plot Per Pathway Per Algorithm')
+        fig.savefig(output_png)
+        plt.close(fig)
+
+        pr_df.drop(columns=['Algorithm'], inplace=True)
+        pr_df.to_csv(output_file, sep='\t', index=False)
+
+    @staticmethod
+    def edge_frequency_edge_ensemble(edge_tables: dict[str, pd.DataFrame], ensemble_files: Iterable[Union[str, PathLike]], dataset_file: str) -> dict:
+        """
+        Generates a dictionary of edge ensembles from a list of ensemble files, which can contain an aggregated
+        ensemble or algorithm-specific ensembles per dataset.
+
+        Like the node ensembles, every interactome and gold standard edge is in each edge ensemble with frequency 0
+        unless the ensemble has it, so the PR curves measure whether the algorithm(s) can distinguish the gold
+        standard edges from all of the edges of the input network. Edges are compared as integer keys for each edge
+        directionality and an edge that appears more than once under a directionality keeps its highest frequency.
+
+        @param edge_tables: the gold standard edges by edge directionality, as returned by Evaluation.edge_tables
+        @param ensemble_files: list of file paths containing edge ensemble outputs
+        @param dataset_file: path to the dataset file used to load the interactome
+        @return: dictionary mapping each ensemble source to its edge ensemble DataFrame with the columns
+        'Edge_Directionality', 'Node1', 'Node2', 'Direction', 'Frequency' and 'Gold_Standard'
+        """
+        interactome = Evaluation.from_file(dataset_file).get_interactome()
+
+        if interactome.empty:
+            raise ValueError(
+                f"Cannot compute PR curve or generate edge ensemble. Input network for dataset \"{dataset_file.split('-')[0]}\" is empty."
+            )
+        if all(table.empty for table in edge_tables.values()):
+            raise ValueError(
+                f"Cannot compute PR curve or generate edge ensemble. Gold standard associated with dataset \"{dataset_file.split('-')[0]}\" is empty."
+            )
+
+        ensembles = {Evaluation.ensemble_label(ensemble_file): pd.read_table(ensemble_file, sep='\t', header=0, dtype={'Node1': str, 'Node2': str})
+                     for ensemble_file in ensemble_files}
+        interactome_node1 = interactome['Interactor1'].astype(str)
+        interactome_node2 = interactome['Interactor2'].astype(str)
+        interactome_directed = (interactome['Direction'] == 'D').to_numpy()
+
+        encoder = EdgeKeyEncoder(pd.concat([interactome_node1, interactome_node2,
+                                            *[table[column].astype(str) for table in edge_tables.values()
+                                              for column in ['Interactor1', 'Interactor2']],
+                                            *[ensemble[column] for ensemble in ensembles.values()
+                                              for column in ['Node1', 'Node2']]]))
+
+        # the default edges with frequency 0 are shared by all ensembles
+        default_keys = {}
+        gold_standard_keys = {}
+        for directionality, edge_table in edge_tables.items():
+            gold_standard_keys[directionality] = Evaluation._gold_standard_edge_keys(encoder, edge_table, directionality)
+            interactome_keys, _ = encoder.keys(interactome_node1, interactome_node2, interactome_directed, directionality)
+            default_keys[directionality] = np.union1d(interactome_keys, gold_standard_keys[directionality])
+
+        edge_ensembles_dict = dict()
+        for label, ensemble_df in ensembles.items():
+            edge_ensembles = []
+            for directionality in edge_tables:
+                ensemble_keys, positions = encoder.keys(ensemble_df['Node1'], ensemble_df['Node2'],
+                                                        (ensemble_df['Direction'] == 'D').to_numpy(), directionality)
+                keys, inverse = np.unique(np.concatenate([default_keys[directionality], ensemble_keys]), return_inverse=True)
+                frequency = np.zeros(len(keys))
+                np.maximum.at(frequency, inverse[len(default_keys[directionality]):],
+                              ensemble_df['Frequency'].to_numpy(dtype=float)[positions])
+
+                edge_ensemble = encoder.decode(keys)
+                edge_ensemble.insert(0, 'Edge_Directionality', directionality)
+                edge_ensemble['Frequency'] = frequency
+                edge_ensemble['Gold_Standard'] = np.isin(keys, gold_standard_keys[directionality])
+                edge_ensembles.append(edge_ensemble)
+            edge_ensembles_dict[label] = pd.concat(edge_ensembles, ignore_index=True)
+
+        return edge_ensembles_dict
+
+    @staticmethod
+    def precision_recall_curve_edge_ensemble(edge_ensembles: dict, output_png: str | PathLike, output_file: str | PathLike):
+        """
+        Plots precision-recall (PR) curves for a set of edge ensembles evaluated against an edge gold standard, with
+        one panel per edge directionality.
+
+        @param edge_ensembles: dict of the pre-computed edge ensemble(s) from edge_frequency_edge_ensemble
+        @param output_png: filename to save the precision and recall curves as a .png image
+        @param output_file: filename to save the precision, recall, threshold values, average precision, and baseline
+        average precision per ensemble source and edge directionality
+        """
+        label_names = list(edge_ensembles.keys())
+        color_palette = create_palette(label_names)
+        directionalities = pd.unique(pd.concat([e['Edge_Directionality'] for e in edge_ensembles.values()])) if edge_ensembles else []
+
+        fig, axes = plt.subplots(1, max(len(directionalities), 1), figsize=(7 * max(len(directionalities), 1), 7), squeeze=False)
+        prc_dfs = []
+
+        for ax, directionality in zip(axes[0], directionalities, strict=False):
+            baseline = None
+            for label, edge_ensemble in edge_ensembles.items():
+                edge_ensemble = edge_ensemble[edge_ensemble['Edge_Directionality'] == directionality]
+                if edge_ensemble.empty:
+                    raise ValueError(
+                        "Cannot compute PR curve: the ensemble network is empty."
+                        f"This should not happen unless the input network for pathway reconstruction is empty."
+                    )
+                y_true = edge_ensemble['Gold_Standard'].to_numpy(dtype=np.int64)
+                y_scores = edge_ensemble['Frequency'].to_numpy(dtype=float)
+                precision, recall, thresholds, avg_precision = Evaluation.precision_recall_curve(y_true, y_scores)
+
+                # the baseline is the same for every ensemble with this directionality
+                if baseline is None:
+                    baseline = y_true.mean()
+                    ax.axhline(y=baseline, color='black', linestyle='--', label=f'Baseline: {baseline:.4f}')
+
+                ax.plot(recall, precision, color=color_palette[label], marker='o',
+                        label=f'{label.capitalize()} (AP: {avg_precision:.4f})')
+
+                # Dropping last elements because precision_recall_curve adds (1, 0) to precision/recall for plotting, as scikit-learn does, not tied to real thresholds
+                prc_df = pd.DataFrame({
+                    'Ensemble_Source': label.capitalize() if label != 'ensemble' else 'Aggregated',
+                    'Edge_Directionality': directionality,
+                    'Threshold': thresholds,
+                    'Precision': precision[:-1],
+                    'Recall': recall[:-1],
+                    'Average_Precision': None,
+                    'Baseline': None,
+                })
+                # only the first row of each ensemble source and directionality has the metric values
+                prc_df.loc[0, ['Average_Precision', 'Baseline']] = [avg_precision, baseline]
+                prc_dfs.append(prc_df)
+
+            ax.set_title(f'{directionality.capitalize()} edges')
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+            ax.set_xlabel('Recall')
+            ax.set_ylabel('Precision')
+            ax.legend(loc='lower left')
+            ax.grid(True)
+
+        fig.suptitle('Edge Precision-Recall Curve for Ensembles')
+        fig.savefig(output_png, bbox_inches='tight')
+        plt.close(fig)
+
+        complete_df = pd.concat(prc_dfs, ignore_index=True) if prc_dfs else pd.DataFrame(
+            columns=['Ensemble_Source', 'Edge_Directionality', 'Threshold', 'Precision', 'Recall', 'Average_Precision', 'Baseline'])
+        complete_df.to_csv(output_file, index=False, sep='\t')
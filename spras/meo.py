@@ -5,7 +5,7 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict
 
 from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import prepare_volume, run_container_and_log
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.interactome import (
     add_directionality_constant,
     reinsert_direction_col_directed,
@@ -31,7 +31,7 @@ def write_properties(filename=Path('properties.txt'), edges=None, sources=None,
     See https://github.com/agitter/meo/blob/master/sample.props for property descriptions and the default values at
     https://github.com/agitter/meo/blob/master/src/alg/EOMain.java#L185-L199
     All file and directory names, except the filename argument, should be converted to container-friendly filenames with
-    util.prepare_volume before passing them to this function
+    a VolumePlanner before passing them to this function
     filename: the name of the properties file to write on the local file system
     """
     if edges is None or sources is None or targets is None or edge_output is None or path_output is None:
@@ -154,29 +154,22 @@ class MEO(PRM[MEOParams]):
 
         work_dir = '/spras'
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, edge_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, source_file = prepare_volume(inputs["sources"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, target_file = prepare_volume(inputs["targets"], work_dir, container_settings)
-        volumes.append(bind_path)
+        edge_file = volumes.add(inputs["edges"])
+        source_file = volumes.add(inputs["sources"])
+        target_file = volumes.add(inputs["targets"])
 
         out_dir = Path(output_file).parent
         # Maximum Edge Orientation requires that the output directory exist
         out_dir.mkdir(parents=True, exist_ok=True)
 
-        bind_path, mapped_output_file = prepare_volume(str(output_file), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_output_file = volumes.add(str(output_file))
 
         # Hard code the path output filename, which will be deleted
         path_output_file = Path(out_dir, 'path-output.txt')
-        bind_path, mapped_path_output = prepare_volume(str(path_output_file), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_path_output = volumes.add(str(path_output_file))
 
         properties_file = 'meo-properties.txt'
         properties_file_local = Path(out_dir, properties_file)
@@ -184,8 +177,7 @@ class MEO(PRM[MEOParams]):
                          edge_output=mapped_output_file, path_output=mapped_path_output,
                          max_path_length=args.max_path_length, local_search=args.local_search, rand_restarts=args.rand_restarts,
                          framework=container_settings.framework)
-        bind_path, properties_file = prepare_volume(str(properties_file_local), work_dir, container_settings)
-        volumes.append(bind_path)
+        properties_file = volumes.add(str(properties_file_local))
 
         command = ['java', '-jar', '/meo/EOMain.jar', properties_file]
 
@@ -193,7 +185,7 @@ class MEO(PRM[MEOParams]):
         run_container_and_log('Maximum Edge Orientation',
                              container_suffix,
                              command,
-                             volumes,
+                             volumes.binds,
                              work_dir,
                              out_dir,
                              container_settings)
@@ -3,17 +3,22 @@ from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
-from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import prepare_volume, run_container_and_log
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.interactome import (
     convert_undirected_to_directed,
     reinsert_direction_col_undirected,
 )
+from spras.native.flow import min_cost_flow
 from spras.prm import PRM
 from spras.util import add_rank_column, duplicate_edges, raw_pathway_df
 
 __all__ = ['MinCostFlow', 'MinCostFlowParams']
 
+# The flow and capacity the native backend uses when they are not set
+DEFAULT_FLOW = 1
+DEFAULT_CAPACITY = 1
+
 class MinCostFlowParams(BaseModel):
     flow: Optional[int] = None
     "amount of flow going through the graph"
@@ -41,6 +46,7 @@ class MinCostFlow(PRM[MinCostFlowParams]):
     # This version of MinCostFlow is inspired by the ResponseNet paper, but does not have
     # its own referenceable DOI.
     dois = ["10.1038/ng.337"]
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data, filename_map):
@@ -76,26 +82,24 @@ class MinCostFlow(PRM[MinCostFlowParams]):
         if not args: args = MinCostFlowParams()
         MinCostFlow.validate_required_run_args(inputs)
 
+        if container_settings.backend == ExecutionBackend.native:
+            MinCostFlow.run_native(inputs, output_file, args)
+            return
+
         # the data files will be mapped within this directory within the container
         work_dir = '/mincostflow'
 
-        # the tuple is for mapping the sources, targets, edges, and output
-        volumes = list()
-
-        bind_path, sources_file = prepare_volume(inputs["sources"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, targets_file = prepare_volume(inputs["targets"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, edges_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
+        sources_file = volumes.add(inputs["sources"])
+        targets_file = volumes.add(inputs["targets"])
+        edges_file = volumes.add(inputs["edges"])
 
         # Create a prefix for the output filename and ensure the directory exists
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
         mapped_out_prefix = mapped_out_dir + '/out'
 
         # Makes the Python command to run within in the container
@@ -119,7 +123,7 @@ class MinCostFlow(PRM[MinCostFlowParams]):
         run_container_and_log('MinCostFlow',
                              container_suffix,
                              command,
-                             volumes,
+                             volumes.binds,
                              work_dir,
                              out_dir,
                              container_settings)
@@ -137,6 +141,24 @@ class MinCostFlow(PRM[MinCostFlowParams]):
         else:
             raise RuntimeError('MinCostFlow did not produce an output network')
 
+    @staticmethod
+    def run_native(inputs, output_file, args):
+        """
+        Solve the min cost flow in process with spras.native.flow instead of the MinCostFlow container.
+        The output file has the same format as the container output. Runs with different amounts of flow on the same
+        inputs and capacity continue from the flow that was already found. When paths tie, the flow can take a
+        different path than in the container.
+        """
+        flow = args.flow if args.flow is not None else DEFAULT_FLOW
+        capacity = args.capacity if args.capacity is not None else DEFAULT_CAPACITY
+        try:
+            edges = min_cost_flow(inputs["edges"], inputs["sources"], inputs["targets"], flow, capacity)
+        except ValueError as err:
+            # The container does not write an output network when there is too much flow
+            raise RuntimeError(f'MinCostFlow did not produce an output network: {err}') from err
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        edges.to_csv(output_file, sep='\t', index=False, header=False, columns=['tail', 'head'])
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         """
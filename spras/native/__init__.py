@@ -0,0 +1,7 @@
+"""
+In-process implementations of pathway reconstruction algorithms.
+
+These are used by PRMs whose `backends` include ExecutionBackend.native when the native backend is selected for them
+with the containers.backends config option. They read the same prepared input files and write the same raw pathway
+files as the containers, so generate_inputs and parse_output do not depend on the backend.
+"""
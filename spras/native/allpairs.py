@@ -0,0 +1,126 @@
+"""
+A shortest path engine for the AllPairs PRM built on scipy.sparse.csgraph.
+
+The container runs one unweighted shortest path search for every source-target pair. Here the interactome is loaded
+into a single sparse matrix and one breadth first search per source reaches all of the targets at once. The paths
+are recovered from the predecessor of each node in the search tree of the source.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from spras.util import LoosePathLike
+
+__all__ = ['ShortestPathNetwork', 'read_network', 'read_node_types', 'shortest_path_edges', 'write_edges']
+
+class ShortestPathNetwork:
+    """
+    An unweighted network as a sparse adjacency matrix and the node labels that index it.
+    """
+
+    def __init__(self, edges: pd.DataFrame, directed: bool):
+        """
+        @param edges: a pandas DataFrame with the columns 'source' and 'target'
+        @param directed: whether edges can only be followed from source to target
+        """
+        self.nodes = pd.unique(edges[['source', 'target']].to_numpy().ravel())
+        self.index = pd.Index(self.nodes)
+        self.directed = directed
+        rows = self.index.get_indexer(edges['source'])
+        cols = self.index.get_indexer(edges['target'])
+        adjacency = sparse.csr_array((np.ones(len(rows)), (rows, cols)), shape=(len(self.nodes), len(self.nodes)))
+        # Undirected edges are stored in both directions once instead of letting csgraph symmetrize for every search
+        self.adjacency = adjacency if directed else sparse.csr_array(adjacency + adjacency.T)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def positions(self, nodes: list[str]) -> np.ndarray:
+        """
+        The matrix positions of the nodes that are in the network, in order and without repeats
+        """
+        positions = self.index.get_indexer(pd.unique(pd.Series(nodes, dtype=object)))
+        return positions[positions >= 0]
+
+
+def read_network(network_file: LoosePathLike, directed: bool) -> ShortestPathNetwork:
+    """
+    Read the network file written by AllPairs.generate_inputs.
+    Columns are separated by any whitespace and lines starting with '#' are skipped, as in the container.
+    @param network_file: the network file with the two interactors and a weight on each line
+    @param directed: whether the network is directed
+    """
+    edges = []
+    with open(network_file) as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            fields = line.split()
+            if fields:
+                edges.append(fields[:2])
+    return ShortestPathNetwork(pd.DataFrame(edges, columns=['source', 'target'], dtype=object), directed)
+
+
+def read_node_types(node_file: LoosePathLike) -> tuple[list[str], list[str]]:
+    """
+    Read the sources and targets from the node type file written by AllPairs.generate_inputs and
+    PathLinker.generate_inputs.
+    @param node_file: the tab-separated node type file with the columns '#Node' and 'Node type'
+    @return: the sources and the targets
+    """
+    node_types = pd.read_csv(node_file, sep='\t', dtype=str, keep_default_na=False)
+    node_column, type_column = node_types.columns[:2]
+    sources = node_types.loc[node_types[type_column] == 'source', node_column].tolist()
+    targets = node_types.loc[node_types[type_column] == 'target', node_column].tolist()
+    return sources, targets
+
+
+def shortest_path_edges(network: ShortestPathNetwork, sources: list[str], targets: list[str]) -> list[tuple[str, str]]:
+    """
+    Find the union of the edges on one shortest path from every source to every reachable target.
+    Sources and targets that are not in the network are ignored.
+    @param network: the network to search
+    @param sources: the source nodes
+    @param targets: the target nodes
+    @return: the edges in the order they are first found, each oriented along the first path that uses it
+    """
+    source_positions = network.positions(sources)
+    target_positions = network.positions(targets)
+    if source_positions.size == 0 or target_positions.size == 0:
+        return []
+
+    edges: dict[tuple[int, int], tuple[int, int]] = {}
+    for source in source_positions:
+        _, tree = csgraph.breadth_first_order(network.adjacency, source, directed=True, return_predecessors=True)
+        # Paths from the same source share the branches of its search tree, so each branch is walked only once
+        visited = {int(source)}
+        for target in target_positions:
+            node = int(target)
+            if tree[node] < 0:
+                # The target is the source or is unreachable
+                continue
+            path = []
+            while node not in visited:
+                visited.add(node)
+                parent = int(tree[node])
+                path.append((parent, node))
+                node = parent
+            for u, v in reversed(path):
+                # An undirected edge is kept once, whichever way its paths cross it
+                key = (u, v) if network.directed else (min(u, v), max(u, v))
+                edges.setdefault(key, (u, v))
+
+    return [(network.nodes[u], network.nodes[v]) for u, v in edges.values()]
+
+
+def write_edges(edges: list[tuple[str, str]], output_file: LoosePathLike):
+    """
+    Write the pathway edges in the container output format, one tab-separated edge per line
+    """
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        f.writelines(f'{u}\t{v}\n' for u, v in edges)
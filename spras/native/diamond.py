@@ -0,0 +1,200 @@
+"""
+An implementation of the DIAMOnD disease module detection algorithm for the DIAMOnD PRM.
+
+It follows DIAMOnD.py from https://github.com/dinaghiassian/DIAMOnD, including how alpha weights the links to the
+module and the connectivity p-values are computed from log gamma values, but it keeps the number of module
+neighbors of every node in a NumPy array that is updated when a node is added instead of recounting the neighbors of
+every candidate in every iteration.
+
+DIAMOnD.py breaks ties between candidates by the iteration order of Python sets of node names, which changes with
+string hashing between runs. Here ties are broken by the order the nodes first appear in the network file.
+"""
+
+import csv
+import functools
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.special import gammaln
+
+from spras.native.files import file_key
+from spras.util import LoosePathLike
+
+__all__ = ['DIAMOnDModule', 'find_module', 'read_network', 'read_seeds', 'write_module']
+
+
+def read_network(network_file: LoosePathLike) -> pd.DataFrame:
+    """
+    Read an undirected edge list.
+    Lines starting with '#' are skipped and the column delimiter is detected from the first edge, as in DIAMOnD.py.
+    @param network_file: the network file with two nodes on each line
+    @return: a pandas DataFrame with the columns 'node1' and 'node2'
+    """
+    delimiter = None
+    with open(network_file) as f:
+        for line in f:
+            if not line.startswith('#'):
+                delimiter = csv.Sniffer().sniff(line).delimiter
+                break
+    if delimiter is None:
+        return pd.DataFrame(columns=['node1', 'node2'], dtype=str)
+
+    edges = pd.read_csv(network_file, sep=delimiter, header=None, names=['node1', 'node2'], usecols=[0, 1], dtype=str,
+                        keep_default_na=False)
+    edges = edges[~edges['node1'].str.startswith('#')]
+    return edges.apply(lambda column: column.str.strip())
+
+
+def read_seeds(seeds_file: LoosePathLike) -> list[str]:
+    """
+    Read the seed nodes, which are the first tab-separated column of the lines that do not start with '#'
+    """
+    with open(seeds_file) as f:
+        return [line.strip().split('\t')[0] for line in f if not line.startswith('#')]
+
+
+class DIAMOnDModule:
+    """
+    The nodes DIAMOnD adds to a module grown from the seeds, in the order they are added.
+    """
+
+    def __init__(self, edges: pd.DataFrame, seeds: list[str], alpha: int):
+        """
+        @param edges: a pandas DataFrame with the columns 'node1' and 'node2'
+        @param seeds: the seed nodes. Seeds that are not in the network are ignored.
+        @param alpha: the weight of the links to the module
+        """
+        self.nodes = pd.unique(edges[['node1', 'node2']].to_numpy().ravel())
+        index = pd.Index(self.nodes)
+        n = len(self.nodes)
+        node1 = index.get_indexer(edges['node1'])
+        node2 = index.get_indexer(edges['node2'])
+
+        # The neighbors of each node, without repeated edges or self loops
+        loops = node1 == node2
+        adjacency = sparse.csr_array((np.ones(2 * np.count_nonzero(~loops)),
+                                      (np.concatenate([node1[~loops], node2[~loops]]),
+                                       np.concatenate([node2[~loops], node1[~loops]]))), shape=(n, n))
+        adjacency.sum_duplicates()
+        self._indptr = adjacency.indptr
+        self._neighbors = adjacency.indices
+        # As in networkx, a self loop adds 2 to the degree of its node
+        self._degree = np.diff(self._indptr).astype(np.int64)
+        self._degree[np.unique(node1[loops])] += 2
+
+        self.alpha = alpha
+        seed_positions = index.get_indexer(pd.unique(pd.Series(seeds, dtype=object)))
+        seed_positions = seed_positions[seed_positions >= 0]
+        self._in_module = np.zeros(n, dtype=bool)
+        self._module_links = np.zeros(n, dtype=np.int64)
+        self._candidate = np.zeros(n, dtype=bool)
+        for seed in seed_positions:
+            self._add(seed)
+
+        # The seeds are weighted by alpha in the module size and the network size. After the first node is added,
+        # DIAMOnD.py counts the module size without weights but keeps the weighted network size.
+        self._module_size = len(seed_positions) * alpha
+        self._network_size = n + (alpha - 1) * self._module_size
+        self._gammaln = gammaln(np.arange(self._network_size + 2))
+        self._pvalues: dict[tuple[int, int, int], float] = {}
+
+        self._added: list[tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, node: int):
+        neighbors = self._neighbors[self._indptr[node]:self._indptr[node + 1]]
+        self._in_module[node] = True
+        self._candidate[node] = False
+        self._module_links[neighbors] += 1
+        self._candidate[neighbors[~self._in_module[neighbors]]] = True
+
+    def _logchoose(self, n: int, k: np.ndarray) -> np.ndarray:
+        # DIAMOnD.py returns infinity instead of negative infinity when k > n
+        g = self._gammaln
+        valid = n - k + 1 > 0
+        k = np.where(valid, k, 0)
+        return np.where(valid, g[n + 1] - (g[n - k + 1] + g[k + 1]), np.inf)
+
+    def _pvalue(self, links: int, degree: int, module_size: int) -> float:
+        """
+        The chance that a node with this degree has at least this many links to a module of module_size nodes
+        """
+        key = (degree, links, module_size)
+        if key not in self._pvalues:
+            network_size = self._network_size
+            drawn = np.arange(links, min(degree, module_size) + 1)
+            terms = np.exp(self._logchoose(module_size, drawn) +
+                           self._logchoose(network_size - module_size, degree - drawn) -
+                           self._logchoose(network_size, np.array(degree)))
+            # Summed in order like DIAMOnD.py so that the p-values are the same
+            p = float(np.cumsum(terms)[-1]) if terms.size else 0.0
+            self._pvalues[key] = min(p, 1.0)
+        return self._pvalues[key]
+
+    def _next_node(self) -> tuple[int, float]:
+        candidates = np.flatnonzero(self._candidate)
+        if candidates.size == 0:
+            raise RuntimeError('There are no more nodes connected to the module')
+        links = self._module_links[candidates] * self.alpha
+        degrees = self._degree[candidates] + (self.alpha - 1) * self._module_links[candidates]
+
+        # Like DIAMOnD.py, only consider the lowest degree candidate for each number of links and then the candidate
+        # with the most links for each of those degrees
+        order = np.lexsort((candidates, degrees, links))
+        first = order[np.r_[True, links[order][1:] != links[order][:-1]]]
+        order = first[np.lexsort((candidates[first], -links[first], degrees[first]))]
+        reduced = order[np.r_[True, degrees[order][1:] != degrees[order][:-1]]]
+
+        pvalues = np.array([self._pvalue(int(links[i]), int(degrees[i]), self._module_size) for i in reduced])
+        choice = np.lexsort((candidates[reduced], pvalues))[0]
+        return int(candidates[reduced[choice]]), float(pvalues[choice])
+
+    def added_nodes(self, n: int) -> list[tuple[str, float]]:
+        """
+        The first n nodes added to the module.
+        Nodes are added lazily, so the nodes for a smaller n are a prefix of the nodes for a larger n.
+        @param n: the number of nodes
+        @return: the name and connectivity p-value of each added node
+        """
+        with self._lock:
+            while len(self._added) < n:
+                node, pvalue = self._next_node()
+                self._added.append((self.nodes[node], pvalue))
+                self._add(node)
+                self._module_size = int(np.count_nonzero(self._in_module))
+            return self._added[:n]
+
+
+@functools.lru_cache(maxsize=8)
+def _module(network_file: str, seeds_file: str, alpha: int, network_stat: tuple[int, int],
+            seeds_stat: tuple[int, int]) -> DIAMOnDModule:
+    return DIAMOnDModule(read_network(network_file), read_seeds(seeds_file), alpha)
+
+
+def find_module(network_file: LoosePathLike, seeds_file: LoosePathLike, n: int, alpha: int) -> list[tuple[str, float]]:
+    """
+    Run DIAMOnD on the input files written by DIAMOnD.generate_inputs.
+    Modules are cached by the input files and alpha, so runs with different n share the nodes added so far.
+    @param network_file: the network file
+    @param seeds_file: the seeds file
+    @param n: the number of nodes to add
+    @param alpha: the weight of the links to the module
+    @return: the name and connectivity p-value of each added node
+    """
+    network_path, network_stat = file_key(network_file)
+    seeds_path, seeds_stat = file_key(seeds_file)
+    return _module(network_path, seeds_path, alpha, network_stat, seeds_stat).added_nodes(n)
+
+
+def write_module(added_nodes: list[tuple[str, float]], output_file: LoosePathLike):
+    """
+    Write the added nodes in the DIAMOnD.py output format: the rank, node and p-value of each node
+    """
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        f.write('#rank\tDIAMOnD_node\tp_hyper\n')
+        for rank, (node, pvalue) in enumerate(added_nodes, 1):
+            f.write(f'{rank}\t{node}\t{pvalue}\n')
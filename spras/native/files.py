@@ -0,0 +1,21 @@
+"""
+Helpers for the caches the native engines keep of the prepared input files they have read.
+"""
+
+import os
+from pathlib import Path
+
+from spras.util import LoosePathLike
+
+__all__ = ['file_key']
+
+
+def file_key(filename: LoosePathLike) -> tuple[str, tuple[int, int]]:
+    """
+    Identify an input file for a cache by its resolved path and the modification time and size of its contents, so a
+    cached result is not reused once the file is rewritten.
+    @param filename: the input file
+    @return: the resolved path and a (modification time in nanoseconds, size) tuple
+    """
+    stat = os.stat(filename)
+    return str(Path(filename).resolve()), (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,262 @@
+"""
+A successive shortest path min cost flow engine for the MinCostFlow and ResponseNet PRMs.
+
+Both algorithms send flow from a super source connected to the sources to a super sink connected to the targets
+through edges whose cost is the negative log of their weight. MinCostFlow sends a fixed amount of flow at the lowest
+cost. ResponseNet subtracts gamma for every unit of flow from the cost, so it sends flow along every path that costs
+less than gamma.
+
+Successive shortest paths solves both by sending flow along the cheapest path in the residual network, one path at a
+time. The paths never get cheaper, so the optimal flow for an amount of flow or a gamma is a prefix of the paths found
+for a larger amount or gamma. The paths are found lazily and kept, so a sweep over flow or gamma on the same inputs
+only searches for paths it has not seen yet: each solve starts from the solution of the previous one. Every search is
+one scipy.sparse.csgraph.dijkstra call on the residual network with Johnson potentials, which keep the reduced costs
+nonnegative.
+"""
+
+import functools
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from spras.native.files import file_key
+from spras.native.rwr import read_nodes
+from spras.util import LoosePathLike
+
+__all__ = ['FlowNetwork', 'min_cost_flow', 'read_network', 'response_net']
+
+# The weights are bounded before the log transform so zero weight edges have a finite cost
+MIN_WEIGHT = 1.0e-9
+# Flow below this amount is treated as no flow
+FLOW_TOLERANCE = 1.0e-9
+
+
+def read_network(network_file: LoosePathLike, deduplicate: bool = False) -> pd.DataFrame:
+    """
+    Read a network file with a tail, head and weight separated by whitespace on each line.
+    @param network_file: the network file written by MinCostFlow.generate_inputs or ResponseNet.generate_inputs
+    @param deduplicate: whether a repeated edge keeps only its last weight, as in a networkx DiGraph, instead of
+    becoming parallel edges
+    @return: a pandas DataFrame with the columns 'tail', 'head' and 'weight'
+    """
+    if os.path.getsize(network_file) == 0:
+        return pd.DataFrame({'tail': pd.Series(dtype=str), 'head': pd.Series(dtype=str),
+                             'weight': pd.Series(dtype=float)})
+    edges = pd.read_csv(network_file, sep=r'\s+', header=None, names=['tail', 'head', 'weight'],
+                        dtype={'tail': str, 'head': str, 'weight': float}, keep_default_na=False, usecols=[0, 1, 2])
+    if deduplicate:
+        edges = edges.drop_duplicates(subset=['tail', 'head'], keep='last')
+    return edges.reset_index(drop=True)
+
+
+class FlowNetwork:
+    """
+    The flow from any source to any target found by successive shortest paths, one augmenting path at a time.
+    """
+
+    def __init__(self, edges: pd.DataFrame, sources: list[str], targets: list[str], capacity: float,
+                 terminal_capacity: float):
+        """
+        @param edges: a pandas DataFrame with the columns 'tail', 'head' and 'weight'
+        @param sources: the source nodes
+        @param targets: the target nodes
+        @param capacity: the capacity of every network edge
+        @param terminal_capacity: the capacity of the edges from the super source and to the super sink
+        """
+        self.edges = edges
+        nodes = pd.unique(np.concatenate([edges[['tail', 'head']].to_numpy().ravel(),
+                                          np.asarray(sources, dtype=object), np.asarray(targets, dtype=object)]))
+        index = pd.Index(nodes)
+        source_positions = index.get_indexer(pd.unique(pd.Series(sources, dtype=object)))
+        target_positions = index.get_indexer(pd.unique(pd.Series(targets, dtype=object)))
+
+        # The super source and super sink are the last two nodes
+        n = len(nodes)
+        self.n = n + 2
+        self.super_source = n
+        self.super_sink = n + 1
+
+        # Weights above 1 would give negative costs and possibly negative cycles, which the searches do not support
+        costs = np.maximum(-np.log(np.maximum(edges['weight'].to_numpy(dtype=float), MIN_WEIGHT)), 0.0)
+        tails = np.concatenate([index.get_indexer(edges['tail']), np.full(len(source_positions), n), target_positions])
+        heads = np.concatenate([index.get_indexer(edges['head']), source_positions, np.full(len(target_positions), n + 1)])
+        capacities = np.concatenate([np.full(len(edges), float(capacity)),
+                                     np.full(len(source_positions) + len(target_positions), float(terminal_capacity))])
+        costs = np.concatenate([costs, np.zeros(len(source_positions) + len(target_positions))])
+
+        # Arc 2i is edge i and arc 2i + 1 is its residual reverse arc
+        self._tails = np.empty(2 * len(tails), dtype=np.int64)
+        self._heads = np.empty(2 * len(tails), dtype=np.int64)
+        self._costs = np.empty(2 * len(tails))
+        self._tails[0::2], self._tails[1::2] = tails, heads
+        self._heads[0::2], self._heads[1::2] = heads, tails
+        self._costs[0::2], self._costs[1::2] = costs, -costs
+        self._residual = np.zeros(2 * len(tails))
+        self._residual[0::2] = capacities
+
+        # Arcs grouped by their tail and head, so the search uses the cheapest of the parallel residual arcs
+        self._order = np.lexsort((self._heads, self._tails))
+        pairs = self._tails[self._order] * self.n + self._heads[self._order]
+        self._group_starts = np.flatnonzero(np.r_[True, pairs[1:] != pairs[:-1]])
+        self._group_sizes = np.diff(np.r_[self._group_starts, len(pairs)])
+
+        self._potentials = np.zeros(self.n)
+        # Each augmenting path as its cost per unit of flow, the amount of flow and its arcs
+        self._paths: list[tuple[float, float, np.ndarray]] = []
+        self._exhausted = False
+        self._lock = threading.Lock()
+
+    def _augment(self) -> bool:
+        """
+        Send as much flow as possible along the cheapest path from the super source to the super sink.
+        @return: whether there was a path
+        """
+        if self._exhausted or len(self._tails) == 0:
+            self._exhausted = True
+            return False
+
+        # Rounding can leave reduced costs slightly below zero
+        reduced = np.maximum(self._costs + self._potentials[self._tails] - self._potentials[self._heads], 0.0)
+        usable = np.where(self._residual > FLOW_TOLERANCE, reduced, np.inf)[self._order]
+        best = np.minimum.reduceat(usable, self._group_starts)
+        group = np.repeat(np.arange(len(self._group_starts)), self._group_sizes)
+        candidates = np.flatnonzero((usable == best[group]) & np.isfinite(usable))
+        first = np.r_[True, group[candidates][1:] != group[candidates][:-1]] if candidates.size else candidates
+        arcs = self._order[candidates[first]]
+
+        # csgraph keeps the explicit zeros of the zero cost arcs as edges
+        residual_graph = sparse.csr_array((reduced[arcs], (self._tails[arcs], self._heads[arcs])),
+                                          shape=(self.n, self.n))
+        distances, predecessors = csgraph.dijkstra(residual_graph, directed=True, indices=self.super_source,
+                                                   return_predecessors=True)
+        if not np.isfinite(distances[self.super_sink]):
+            self._exhausted = True
+            return False
+
+        # The arc between each pair of nodes on the path
+        arc_lookup = pd.Series(arcs, index=self._tails[arcs] * self.n + self._heads[arcs])
+        path_nodes = [self.super_sink]
+        while path_nodes[-1] != self.super_source:
+            path_nodes.append(int(predecessors[path_nodes[-1]]))
+        path_nodes.reverse()
+        path_nodes = np.asarray(path_nodes, dtype=np.int64)
+        path_arcs = arc_lookup.loc[path_nodes[:-1] * self.n + path_nodes[1:]].to_numpy()
+
+        amount = float(self._residual[path_arcs].min())
+        self._residual[path_arcs] -= amount
+        self._residual[path_arcs ^ 1] += amount
+        self._potentials += np.minimum(distances, distances[self.super_sink])
+        self._paths.append((float(self._costs[path_arcs].sum()), amount, path_arcs))
+        return True
+
+    def _edge_flows(self, paths: list[tuple[float, np.ndarray]]) -> pd.DataFrame:
+        """
+        The network edges with flow after sending the given amounts along the given paths
+        """
+        arc_flows = np.zeros(len(self._tails))
+        for amount, arcs in paths:
+            np.add.at(arc_flows, arcs, amount)
+            np.add.at(arc_flows, arcs ^ 1, -amount)
+        # The flow on an edge is its forward arc flow, and the super source and super sink edges come last
+        edge_flows = arc_flows[0::2][:len(self.edges)]
+        edges = self.edges[['tail', 'head']].assign(flow=edge_flows)
+        return edges[edges['flow'] > FLOW_TOLERANCE].reset_index(drop=True)
+
+    def flow_of_value(self, value: float) -> pd.DataFrame:
+        """
+        The cheapest flow that sends value units from the sources to the targets.
+        @param value: the amount of flow
+        @return: the edges with flow, with the columns 'tail', 'head' and 'flow'
+        @raises ValueError: if the network cannot carry that much flow
+        """
+        with self._lock:
+            sent = 0.0
+            paths = []
+            for _, amount, arcs in self._paths_while(lambda total, _: total < value - FLOW_TOLERANCE):
+                paths.append((min(amount, value - sent), arcs))
+                sent += amount
+            if sent < value - FLOW_TOLERANCE:
+                raise ValueError(f'The network can carry at most {sent:g} units of flow, not {value:g}')
+            return self._edge_flows(paths)
+
+    def flow_below_cost(self, gamma: float) -> pd.DataFrame:
+        """
+        The flow that minimizes its cost minus gamma for every unit of flow, which uses every path that costs less
+        than gamma per unit.
+        @param gamma: the reward for each unit of flow
+        @return: the edges with flow, with the columns 'tail', 'head' and 'flow'
+        """
+        with self._lock:
+            paths = [(amount, arcs) for _, amount, arcs in self._paths_while(lambda _, cost: cost < gamma)]
+            return self._edge_flows(paths)
+
+    def _paths_while(self, keep_going):
+        """
+        Yield the augmenting paths in order, finding more as needed, until keep_going(the flow sent before the path,
+        the cost of the last path) is false or there are no more paths
+        """
+        total = 0.0
+        cost = -math.inf
+        i = 0
+        while keep_going(total, cost):
+            if i == len(self._paths) and not self._augment():
+                return
+            cost, amount, arcs = self._paths[i]
+            if not keep_going(total, cost):
+                return
+            yield self._paths[i]
+            total += amount
+            i += 1
+
+
+@functools.lru_cache(maxsize=8)
+def _flow_network(edges_file: str, sources_file: str, targets_file: str, capacity: float, terminal_capacity: float,
+                  deduplicate: bool, stats: tuple[tuple[int, int], ...]) -> FlowNetwork:
+    return FlowNetwork(read_network(edges_file, deduplicate), read_nodes(sources_file), read_nodes(targets_file),
+                       capacity, terminal_capacity)
+
+
+def _cached_network(edges_file: LoosePathLike, sources_file: LoosePathLike, targets_file: LoosePathLike,
+                    capacity: float, terminal_capacity: float, deduplicate: bool) -> FlowNetwork:
+    keys = [file_key(filename) for filename in (edges_file, sources_file, targets_file)]
+    return _flow_network(*(path for path, _ in keys), capacity, terminal_capacity, deduplicate,
+                         tuple(stat for _, stat in keys))
+
+
+def min_cost_flow(edges_file: LoosePathLike, sources_file: LoosePathLike, targets_file: LoosePathLike, flow: float,
+                  capacity: float) -> pd.DataFrame:
+    """
+    Find the cheapest flow of the given amount for the MinCostFlow input files.
+    The super source and super sink edges have no capacity limit. Networks are cached by the input files and the
+    capacity, so runs with different amounts of flow start from the paths found so far.
+    @param edges_file: the edges file written by MinCostFlow.generate_inputs
+    @param sources_file: the sources file
+    @param targets_file: the targets file
+    @param flow: the amount of flow
+    @param capacity: the capacity of every edge
+    @return: the edges with flow, with the columns 'tail', 'head' and 'flow'
+    """
+    network = _cached_network(edges_file, sources_file, targets_file, capacity, math.inf, False)
+    return network.flow_of_value(flow)
+
+
+def response_net(edges_file: LoosePathLike, sources_file: LoosePathLike, targets_file: LoosePathLike,
+                 gamma: float) -> pd.DataFrame:
+    """
+    Find the ResponseNet flow for the ResponseNet input files.
+    Every edge, including the super source and super sink edges, has a capacity of 1 and repeated edges keep their
+    last weight. Networks are cached by the input files, so runs with different gammas start from the paths found so
+    far.
+    @param edges_file: the edges file written by ResponseNet.generate_inputs
+    @param sources_file: the sources file
+    @param targets_file: the targets file
+    @param gamma: the reward for each unit of flow
+    @return: the edges with flow, with the columns 'tail', 'head' and 'flow'
+    """
+    network = _cached_network(edges_file, sources_file, targets_file, 1.0, 1.0, True)
+    return network.flow_below_cost(gamma)
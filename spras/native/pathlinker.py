@@ -0,0 +1,223 @@
+"""
+A k shortest paths engine for the PathLinker PRM.
+
+Like PathLinker, the network is read as a directed graph whose edge costs are the negative log of the edge weights.
+Edges into sources and out of targets are removed, and a super source and super sink are connected to every source
+and target. The k shortest simple paths between the super nodes are found with Yen's algorithm, where every spur path
+is an A* search guided by the exact distance to the super sink so that it only explores the nodes near the shortest
+completions. The graph is stored as CSR arrays instead of a networkx DiGraph.
+
+Paths are found lazily and kept, so the output for a smaller k is a prefix of the output for a larger k. Repeated
+runs on the same inputs in one process, such as a sweep over k, only search for the paths they have not seen yet.
+"""
+
+import functools
+import heapq
+import itertools
+import math
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from spras.native.allpairs import read_node_types
+from spras.native.files import file_key
+from spras.util import LoosePathLike
+
+__all__ = ['KShortestPaths', 'find_paths', 'read_network', 'write_ranked_edges']
+
+# PathLinker bounds the weights before the log transform so zero weight edges have a finite cost
+MIN_WEIGHT = 1.0e-9
+
+
+def read_network(network_file: LoosePathLike) -> pd.DataFrame:
+    """
+    Read the tab-separated network file written by PathLinker.generate_inputs.
+    Lines starting with '#' are skipped. As in a networkx DiGraph, a repeated edge keeps its last weight.
+    @param network_file: the network file with a tail, head and weight on each line
+    @return: a pandas DataFrame with the columns 'tail', 'head' and 'weight'
+    """
+    edges = pd.read_csv(network_file, sep='\t', header=None, names=['tail', 'head', 'weight'],
+                        dtype={'tail': str, 'head': str}, keep_default_na=False, usecols=[0, 1, 2])
+    edges = edges[~edges['tail'].str.startswith('#')]
+    edges['weight'] = pd.to_numeric(edges['weight'])
+    return edges.drop_duplicates(subset=['tail', 'head'], keep='last')
+
+
+class KShortestPaths:
+    """
+    The k shortest simple paths from any source to any target, found in order of increasing cost.
+    """
+
+    def __init__(self, edges: pd.DataFrame, sources: list[str], targets: list[str]):
+        """
+        @param edges: a pandas DataFrame with the columns 'tail', 'head' and 'weight'
+        @param sources: the source nodes
+        @param targets: the target nodes
+        """
+        self.nodes = pd.unique(np.concatenate([edges[['tail', 'head']].to_numpy().ravel(),
+                                               np.asarray(sources, dtype=object), np.asarray(targets, dtype=object)]))
+        index = pd.Index(self.nodes)
+        source_positions = index.get_indexer(pd.unique(pd.Series(sources, dtype=object)))
+        target_positions = index.get_indexer(pd.unique(pd.Series(targets, dtype=object)))
+
+        tails = index.get_indexer(edges['tail'])
+        heads = index.get_indexer(edges['head'])
+        # Weights above 1 would give negative costs, which shortest path searches do not support
+        costs = np.maximum(-np.log10(np.maximum(edges['weight'].to_numpy(dtype=float), MIN_WEIGHT)), 0.0)
+        # Remove self loops, edges into sources and edges out of targets
+        keep = (tails != heads) & ~np.isin(heads, source_positions) & ~np.isin(tails, target_positions)
+        tails, heads, costs = tails[keep], heads[keep], costs[keep]
+
+        # The super source and super sink are the last two nodes
+        n = len(self.nodes)
+        self.super_source = n
+        self.super_sink = n + 1
+        tails = np.concatenate([tails, np.full(len(source_positions), n), target_positions])
+        heads = np.concatenate([heads, source_positions, np.full(len(target_positions), n + 1)])
+        costs = np.concatenate([costs, np.zeros(len(source_positions) + len(target_positions))])
+        # CSR arrays of the edges out of each node, held as lists for fast access in the searches
+        order = np.lexsort((heads, tails))
+        self._indptr = np.concatenate([[0], np.cumsum(np.bincount(tails, minlength=n + 2))]).tolist()
+        self._heads = heads[order].tolist()
+        self._costs = costs[order].tolist()
+
+        # The exact distance from every node to the super sink is the A* heuristic
+        # csgraph keeps the explicit zeros of the zero cost edges as edges
+        reverse = sparse.csr_array((costs, (heads, tails)), shape=(n + 2, n + 2))
+        self._to_sink = csgraph.dijkstra(reverse, directed=True, indices=n + 1).tolist()
+
+        # Found paths with their cost, the cost of each prefix and the position where they deviate from their parent
+        self._paths: list[tuple[float, list[int], list[float], int]] = []
+        self._candidates: list[tuple[float, int, list[int], list[float], int]] = []
+        self._seen: set[tuple[int, ...]] = set()
+        self._exhausted = False
+        self._lock = threading.Lock()
+
+    def _spur_path(self, spur: int, blocked_nodes: set[int], blocked_heads: set[int]) -> Optional[tuple[list[int], list[float]]]:
+        """
+        Find the shortest path from spur to the super sink with A*.
+        @param spur: the node to start from
+        @param blocked_nodes: nodes the path cannot visit
+        @param blocked_heads: nodes the path cannot step to directly from spur
+        @return: the path and the cost of each of its prefixes, or None if the super sink cannot be reached
+        """
+        indptr, heads, costs, to_sink = self._indptr, self._heads, self._costs, self._to_sink
+        best = {spur: 0.0}
+        previous = {}
+        heap = [(to_sink[spur], 0.0, spur)]
+        while heap:
+            _, distance, node = heapq.heappop(heap)
+            if node == self.super_sink:
+                path = [node]
+                while node != spur:
+                    node = previous[node]
+                    path.append(node)
+                path.reverse()
+                return path, [best[node] for node in path]
+            if distance > best[node]:
+                continue
+            for position in range(indptr[node], indptr[node + 1]):
+                head = heads[position]
+                if head in blocked_nodes or (node == spur and head in blocked_heads):
+                    continue
+                remaining = to_sink[head]
+                if remaining == math.inf:
+                    continue
+                head_distance = distance + costs[position]
+                if head_distance < best.get(head, math.inf):
+                    best[head] = head_distance
+                    previous[head] = node
+                    heapq.heappush(heap, (head_distance + remaining, head_distance, head))
+        return None
+
+    def _push_candidate(self, path: list[int], prefix_costs: list[float], deviation: int):
+        key = tuple(path)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        heapq.heappush(self._candidates, (prefix_costs[-1], len(path), path, prefix_costs, deviation))
+
+    def _extend(self, k: int):
+        """
+        Find paths until k have been found or there are no more
+        """
+        if not self._paths and not self._exhausted:
+            first = self._spur_path(self.super_source, set(), set())
+            if first is None:
+                self._exhausted = True
+            else:
+                self._push_candidate(*first, 0)
+
+        while len(self._paths) < k and not self._exhausted:
+            if not self._candidates:
+                self._exhausted = True
+                break
+            cost, _, path, prefix_costs, deviation = heapq.heappop(self._candidates)
+            self._paths.append((cost, path, prefix_costs, deviation))
+
+            # Spur from each node of the new path at or after the node where it left its parent path
+            # Earlier spur nodes would only find candidates that the parent path already produced
+            for i in range(deviation, len(path) - 1):
+                root = path[:i + 1]
+                blocked_heads = {other[i + 1] for _, other, _, _ in self._paths if other[:i + 1] == root}
+                spur = self._spur_path(path[i], set(root[:-1]), blocked_heads)
+                if spur is None:
+                    continue
+                spur_nodes, spur_costs = spur
+                self._push_candidate(root + spur_nodes[1:],
+                                     prefix_costs[:i + 1] + [prefix_costs[i] + c for c in spur_costs[1:]], i)
+
+    def paths(self, k: int) -> list[tuple[float, list[str]]]:
+        """
+        The k shortest paths in order of increasing cost, or all of them if there are fewer than k.
+        @param k: the number of paths
+        @return: the cost and nodes of each path, without the super source and super sink
+        """
+        with self._lock:
+            self._extend(k)
+            return [(cost, [self.nodes[node] for node in path[1:-1]]) for cost, path, _, _ in self._paths[:k]]
+
+
+@functools.lru_cache(maxsize=8)
+def _path_finder(network_file: str, node_file: str, network_stat: tuple[int, int], node_stat: tuple[int, int]) -> KShortestPaths:
+    sources, targets = read_node_types(node_file)
+    return KShortestPaths(read_network(network_file), sources, targets)
+
+
+def find_paths(network_file: LoosePathLike, node_file: LoosePathLike, k: int) -> list[tuple[float, list[str]]]:
+    """
+    Find the k shortest paths for the PathLinker input files.
+    The path finder is cached by the paths and modification times of the input files, so runs with different k on the
+    same inputs share the paths found so far.
+    @param network_file: the network file written by PathLinker.generate_inputs
+    @param node_file: the node type file written by PathLinker.generate_inputs
+    @param k: the number of paths
+    @return: the cost and nodes of each path
+    """
+    network_path, network_stat = file_key(network_file)
+    node_path, node_stat = file_key(node_file)
+    return _path_finder(network_path, node_path, network_stat, node_stat).paths(k)
+
+
+def write_ranked_edges(paths: list[tuple[float, list[str]]], output_file: LoosePathLike):
+    """
+    Write the edges of the paths in the PathLinker ranked edges format.
+    Each edge is written once with the 1-based index of the first path that contains it and the cost of that path.
+    Like PathLinker, the path cost is written as the product of the edge weights rather than the sum of the log costs.
+    @param paths: the paths in order of increasing cost
+    @param output_file: the file to write
+    """
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    seen = set()
+    with open(output_file, 'w') as f:
+        f.write('#tail\thead\tKSP index\tpath cost\n')
+        for rank, (cost, nodes) in enumerate(paths, 1):
+            for edge in itertools.pairwise(nodes):
+                if edge not in seen:
+                    seen.add(edge)
+                    f.write(f'{edge[0]}\t{edge[1]}\t{rank}\t{10 ** -cost:0.5e}\n')
@@ -0,0 +1,166 @@
+"""
+A sparse random walk with restart (personalized PageRank) engine for the RWR and ST_RWR PRMs.
+
+The walk matches the PageRank implementation used in the rwr containers (networkx.pagerank): alpha is the chance of
+following an edge, the walk restarts at the restart nodes otherwise, and nodes without outgoing edges send their
+score back to the restart nodes. Every (alpha, restart vector) pair is one column of a block power iteration, so
+several alphas and restart vectors are solved with a single sparse matrix product per iteration. The workflow still
+runs one reconstruction job per alpha, so the RWR and ST_RWR runs each solve a single column.
+"""
+
+import functools
+import os
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from spras.native.files import file_key
+from spras.util import LoosePathLike
+
+__all__ = ['DEFAULT_ALPHA', 'RandomWalkNetwork', 'load_network', 'personalized_pagerank', 'read_nodes', 'write_scores']
+
+# The alpha the containers use when none is given
+DEFAULT_ALPHA = 0.85
+
+
+class RandomWalkNetwork:
+    """
+    A directed network in the form used by the power iteration: the nodes in order of their first appearance in the
+    edge list and the transposed row-normalized adjacency matrix.
+    """
+
+    def __init__(self, nodes: np.ndarray, adjacency: sparse.csr_array):
+        """
+        @param nodes: the node labels, which index the rows and columns of adjacency
+        @param adjacency: the unweighted adjacency matrix where row u column v is 1 for the edge u -> v
+        """
+        self.nodes = nodes
+        self.index = pd.Index(nodes)
+        out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        self.dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros_like(out_degree, dtype=float), where=~self.dangling)
+        # Transposed so the power iteration multiplies columns of scores
+        self.transition_t = sparse.csr_array((sparse.diags_array(inverse_degree) @ adjacency).T)
+        self._adjacency = adjacency
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @functools.cached_property
+    def reversed(self) -> "RandomWalkNetwork":
+        """
+        The same network with every edge reversed, which is used to walk backwards from targets
+        """
+        return RandomWalkNetwork(self.nodes, sparse.csr_array(self._adjacency.T))
+
+    def restart_matrix(self, restart_sets: Sequence[Iterable[str]]) -> np.ndarray:
+        """
+        Build the restart vectors for sets of restart nodes, weighting the nodes of a set equally.
+        Nodes that are not in the network are ignored.
+        @param restart_sets: one collection of restart nodes per restart vector
+        @return: an array with one normalized restart vector per column
+        """
+        restarts = np.zeros((len(self), len(restart_sets)))
+        for column, restart_nodes in enumerate(restart_sets):
+            positions = self.index.get_indexer(pd.unique(pd.Series(list(restart_nodes), dtype=object)))
+            positions = positions[positions >= 0]
+            if positions.size == 0:
+                raise ValueError('None of the restart nodes are in the network')
+            restarts[positions, column] = 1.0 / positions.size
+        return restarts
+
+
+def read_edges(network_file: LoosePathLike, sep: str = '|') -> pd.DataFrame:
+    """
+    Read a headerless two column edge list.
+    @param network_file: the edge list file
+    @param sep: the column separator
+    @return: a pandas DataFrame with the columns 'source' and 'target'
+    """
+    if os.path.getsize(network_file) == 0:
+        return pd.DataFrame(columns=['source', 'target'], dtype=str)
+    return pd.read_csv(network_file, sep=sep, header=None, names=['source', 'target'], dtype=str,
+                       keep_default_na=False)
+
+
+def read_nodes(node_file: LoosePathLike) -> list[str]:
+    """
+    Read a file with one node per line, skipping blank lines.
+    @param node_file: the node file
+    """
+    with open(node_file) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+@functools.lru_cache(maxsize=8)
+def _load_network(network_file: str, sep: str, network_stat: tuple[int, int]) -> RandomWalkNetwork:
+    edges = read_edges(network_file, sep)
+    # Nodes are ordered by their first appearance, reading each edge source before its target
+    nodes = pd.unique(edges[['source', 'target']].to_numpy().ravel())
+    index = pd.Index(nodes)
+    rows = index.get_indexer(edges['source'])
+    cols = index.get_indexer(edges['target'])
+    # Repeated edges count once, as in a networkx DiGraph
+    adjacency = sparse.csr_array((np.ones(len(rows)), (rows, cols)), shape=(len(nodes), len(nodes)))
+    adjacency.sum_duplicates()
+    adjacency.data[:] = 1.0
+    return RandomWalkNetwork(np.asarray(nodes, dtype=object), adjacency)
+
+
+def load_network(network_file: LoosePathLike, sep: str = '|') -> RandomWalkNetwork:
+    """
+    Load a directed edge list as a RandomWalkNetwork.
+    Networks are cached by path and modification time, so jobs that run in the same process, such as several alphas
+    on the same prepared network, only build the sparse matrices once.
+    @param network_file: the edge list file, where each line is 'source|target'
+    @param sep: the column separator
+    """
+    network_path, network_stat = file_key(network_file)
+    return _load_network(network_path, sep, network_stat)
+
+
+def personalized_pagerank(network: RandomWalkNetwork, restarts: np.ndarray, alphas: Sequence[float] | np.ndarray,
+                          tol: float = 1.0e-6, max_iter: int = 100) -> np.ndarray:
+    """
+    Solve personalized PageRank for many restart vectors and alphas with a block power iteration.
+    Each column starts from the uniform distribution and stops iterating once its L1 change is below
+    len(network) * tol, like networkx.pagerank.
+    @param network: the network to walk on
+    @param restarts: an array with one normalized restart vector per column
+    @param alphas: the chance of following an edge for each column, or a single alpha for every column
+    @param tol: the convergence tolerance
+    @param max_iter: the maximum number of iterations
+    @return: an array with the scores of each column
+    """
+    n, k = restarts.shape
+    alphas = np.broadcast_to(np.asarray(alphas, dtype=float), (k,))
+    scores = np.full((n, k), 1.0 / n)
+    active = np.arange(k)
+    for _ in range(max_iter):
+        current = scores[:, active]
+        restart = restarts[:, active]
+        alpha = alphas[active]
+        dangling_mass = current[network.dangling].sum(axis=0)
+        updated = alpha * (network.transition_t @ current + dangling_mass * restart) + (1 - alpha) * restart
+        error = np.abs(updated - current).sum(axis=0)
+        scores[:, active] = updated
+        # Converged columns are no longer updated
+        active = active[error >= n * tol]
+        if active.size == 0:
+            return scores
+    raise RuntimeError(f'Random walk with restart did not converge in {max_iter} iterations')
+
+
+def write_scores(network: RandomWalkNetwork, scores: np.ndarray, output_file: LoosePathLike):
+    """
+    Write node scores in the container output format: a 'Node' and 'Score' header followed by the nodes in order of
+    decreasing score, with ties in the reverse of the network node order.
+    @param network: the network the scores were computed on
+    @param scores: one score per network node
+    @param output_file: the file to write
+    """
+    df = pd.DataFrame({'Node': network.nodes, 'Score': scores}).iloc[::-1]
+    df = df.sort_values(by='Score', ascending=False, kind='stable')
+    df.to_csv(output_file, sep='\t', index=False)
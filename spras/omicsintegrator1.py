@@ -5,7 +5,7 @@ from pydantic import BaseModel, ConfigDict
 
 from spras.config.container_schema import ProcessedContainerSettings
 from spras.config.util import CaseInsensitiveEnum
-from spras.containers import prepare_volume, run_container_and_log
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.dataset import MissingDataError
 from spras.interactome import reinsert_direction_col_mixed
 from spras.prm import PRM
@@ -14,12 +14,14 @@ from spras.util import add_rank_column, duplicate_edges, raw_pathway_df
 __all__ = ['DummyMode', 'OmicsIntegrator1', 'OmicsIntegrator1Params', 'write_conf']
 
 
-# TODO decide on default number of processes and threads
-def write_conf(filename=Path('config.txt'), w=None, b=None, d=None, mu=None, noise=None, g=None, r=None):
+def write_conf(filename=Path('config.txt'), w=None, b=None, d=None, mu=None, noise=None, g=None, r=None,
+               processes=1, threads=1):
     """
     Write the configuration file for Omics Integrator 1
     See https://github.com/fraenkel-lab/OmicsIntegrator#required-inputs
     filename: the name of the configuration file to write
+    processes: the number of processes used to run the noisy edge, shuffled prize, and random terminal replicates
+    threads: the number of threads each msgsteiner process uses
     """
     if w is None or b is None or d is None:
         raise ValueError('Required Omics Integrator 1 configuration file arguments are missing')
@@ -38,8 +40,8 @@ def write_conf(filename=Path('config.txt'), w=None, b=None, d=None, mu=None, noi
             f.write(f'g = {g}\n') # not the same as g in Omics Integrator 2
         if r is not None:
             f.write(f'r = {r}\n')
-        f.write('processes = 1\n')
-        f.write('threads = 1\n')
+        f.write(f'processes = {processes}\n')
+        f.write(f'threads = {threads}\n')
 
 class DummyMode(CaseInsensitiveEnum):
     terminals = 'terminals'
@@ -160,36 +162,33 @@ class OmicsIntegrator1(PRM[OmicsIntegrator1Params]):
 
         work_dir = '/spras'
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, edge_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, prize_file = prepare_volume(inputs["prizes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        edge_file = volumes.add(inputs["edges"])
+        prize_file = volumes.add(inputs["prizes"])
 
         # add dummy node file to the volume if dummy_mode is not None and it is 'file'
         dummy_file = None
         if args.dummy_mode == DummyMode.file:
             if "dummy_nodes" not in inputs:
                 raise ValueError("dummy_nodes file is required when dummy_mode is set to 'file'")
-            bind_path, dummy_file = prepare_volume(inputs["dummy_nodes"], work_dir, container_settings)
-            volumes.append(bind_path)
+            dummy_file = volumes.add(inputs["dummy_nodes"])
 
         out_dir = Path(output_file).parent
         # Omics Integrator 1 requires that the output directory exist
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
 
         conf_file = 'oi1-configuration.txt'
         conf_file_local = Path(out_dir, conf_file)
         # Temporary file that will be deleted after running Omics Integrator 1
+        # The processes and threads come from the containers.execution config so that they do not change the
+        # parameter hash
         write_conf(conf_file_local, w=args.w, b=args.b, d=args.d, mu=args.mu,
-                   noise=args.noise, g=args.g, r=args.r)
-        bind_path, conf_file = prepare_volume(str(conf_file_local), work_dir, container_settings)
-        volumes.append(bind_path)
+                   noise=args.noise, g=args.g, r=args.r,
+                   processes=container_settings.processes, threads=container_settings.threads)
+        conf_file = volumes.add(str(conf_file_local))
 
         command = ['python', '/OmicsIntegrator/scripts/forest.py',
                    '--edge', edge_file,
@@ -223,7 +222,7 @@ class OmicsIntegrator1(PRM[OmicsIntegrator1Params]):
         run_container_and_log('Omics Integrator 1',
                              container_suffix,
                              command,
-                             volumes,
+                             volumes.binds,
                              work_dir,
                              out_dir,
                              container_settings,
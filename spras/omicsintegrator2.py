@@ -1,18 +1,21 @@
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
 from spras.config.container_schema import ProcessedContainerSettings
 from spras.config.util import CaseInsensitiveEnum
-from spras.containers import prepare_volume, run_container_and_log
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.dataset import Dataset, MissingDataError
 from spras.interactome import reinsert_direction_col_undirected
 from spras.prm import PRM
 from spras.util import add_rank_column, duplicate_edges
 
-__all__ = ['DummyMode', 'OmicsIntegrator2', 'OmicsIntegrator2Params']
+__all__ = ['DummyMode', 'OmicsIntegrator2', 'OmicsIntegrator2Params', 'merge_forests', 'replicate_runs']
 
 class DummyMode(CaseInsensitiveEnum):
     terminals = 'terminals'
@@ -49,6 +52,51 @@ class OmicsIntegrator2Params(BaseModel):
 
     model_config = ConfigDict(extra='forbid', use_attribute_docstrings=True)
 
+def replicate_runs(args: OmicsIntegrator2Params) -> list[tuple[int, int, int]]:
+    """
+    Split the randomization replicates into one run each, with a seed for every replicate derived from args.seed.
+    The seed of a replicate only depends on args.seed and the position of the replicate, so the replicates do not
+    depend on how many run at once. Without args.seed, the replicates have different random seeds.
+    @param args: the Omics Integrator 2 parameters
+    @return: the noisy_edges, random_terminals, and seed arguments for each replicate run
+    """
+    replicates = [(1, 0)] * args.noisy_edges + [(0, 1)] * args.random_terminals
+    seeds = np.random.SeedSequence(args.seed).spawn(len(replicates))
+    # Omics Integrator 2 seeds NumPy, which requires seeds below 2**32
+    return [(noisy_edges, random_terminals, int(seed.generate_state(1, dtype=np.uint32)[0]))
+            for (noisy_edges, random_terminals), seed in zip(replicates, seeds, strict=True)]
+
+
+def merge_forests(forest_files: list[Path], output_file: str | Path):
+    """
+    Merge the augmented forests written by several Omics Integrator 2 runs into one raw pathway file.
+    Omics Integrator 2 returns the union of the replicate forests, so an edge is in the merged solution if it is in the
+    solution of any run. Runs without a solution are skipped.
+    @param forest_files: the oi2.tsv files of the runs
+    @param output_file: the merged file, which has the same columns as oi2.tsv
+    """
+    columns = ['protein1', 'protein2', 'cost', 'in_solution']
+    forests = []
+    for forest_file in forest_files:
+        if sum(1 for _ in open(forest_file)) < 2:
+            continue
+        forest = pd.read_csv(forest_file, sep='\t', header=0)
+        if sorted(forest.columns) == sorted(columns):
+            forests.append(forest[columns])
+
+    if not forests:
+        # A header without edges, which parse_output reads as an empty pathway
+        pd.DataFrame(columns=columns).to_csv(output_file, sep='\t', index=False)
+        return
+
+    merged = pd.concat(forests, ignore_index=True)
+    # The edges are undirected and different runs may write them in different orders
+    merged['edge'] = [tuple(sorted(edge)) for edge in zip(merged['protein1'], merged['protein2'], strict=True)]
+    merged['in_solution'] = merged.groupby('edge')['in_solution'].transform('any')
+    merged = merged.drop_duplicates(subset='edge').drop(columns='edge')
+    merged.to_csv(output_file, sep='\t', index=False)
+
+
 """
 Omics Integrator 2 will construct a fully undirected graph from the provided input file
 - in the algorithm, it uses nx.Graph() objects, which are undirected
@@ -110,22 +158,66 @@ class OmicsIntegrator2(PRM[OmicsIntegrator2Params]):
         if not args: args = OmicsIntegrator2Params()
         OmicsIntegrator2.validate_required_run_args(inputs)
 
-        work_dir = '/spras'
+        out_dir = Path(output_file).parent
+        # Omics Integrator 2 requires that the output directory exist
+        out_dir.mkdir(parents=True, exist_ok=True)
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        replicates = replicate_runs(args)
+        if container_settings.processes > 1 and len(replicates) > 1:
+            OmicsIntegrator2.run_replicates(inputs, output_file, args, container_settings, replicates)
+            return
 
-        bind_path, edge_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
+        OmicsIntegrator2.run_container(inputs, out_dir, out_dir, args, container_settings,
+                                       args.noisy_edges, args.random_terminals, args.seed)
 
-        bind_path, prize_file = prepare_volume(inputs["prizes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # TODO do we want to retain other output files?
+        # TODO if deleting other output files, write them all to a tmp directory and copy
+        # the desired output file instead of using glob to delete files from the actual output directory
+        # Rename the primary output file to match the desired output filename
+        Path(output_file).unlink(missing_ok=True)
+        output_tsv = Path(out_dir, 'oi2.tsv')
+        output_tsv.rename(output_file)
+        # Remove the other output files
+        for oi2_output in out_dir.glob('*.html'):
+            oi2_output.unlink(missing_ok=True)
 
+    @staticmethod
+    def run_replicates(inputs, output_file, args, container_settings, replicates):
+        """
+        Run every randomization replicate in its own container, with container_settings.processes containers running
+        at once, and merge their forests into the raw pathway file.
+        Each replicate is seeded with the seed from replicate_runs, so the pathway does not depend on the number of
+        processes. It differs from running all replicates in one container, which draws them from one random stream.
+        """
         out_dir = Path(output_file).parent
-        # Omics Integrator 2 requires that the output directory exist
-        out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(out_dir, work_dir, container_settings)
-        volumes.append(bind_path)
+
+        def run_replicate(index, replicate):
+            replicate_dir = Path(out_dir, f'oi2-replicate-{index}')
+            replicate_dir.mkdir(exist_ok=True)
+            # Profiling data from every replicate is written to the output directory of the reconstruct job
+            OmicsIntegrator2.run_container(inputs, replicate_dir, out_dir, args, container_settings, *replicate)
+            return Path(replicate_dir, 'oi2.tsv')
+
+        with ThreadPoolExecutor(max_workers=container_settings.processes) as executor:
+            forest_files = list(executor.map(run_replicate, range(len(replicates)), replicates))
+
+        merge_forests(forest_files, output_file)
+        for forest_file in forest_files:
+            shutil.rmtree(forest_file.parent)
+
+    @staticmethod
+    def run_container(inputs, run_dir, out_dir, args, container_settings, noisy_edges, random_terminals, seed):
+        """
+        Run Omics Integrator 2 once in its container, which writes oi2.tsv to run_dir
+        """
+        work_dir = '/spras'
+
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
+
+        edge_file = volumes.add(inputs["edges"])
+        prize_file = volumes.add(inputs["prizes"])
+        mapped_out_dir = volumes.add(run_dir)
 
         command = ['OmicsIntegrator', '-e', edge_file, '-p', prize_file,
                    '-o', mapped_out_dir, '--filename', 'oi2']
@@ -139,37 +231,26 @@ class OmicsIntegrator2(PRM[OmicsIntegrator2Params]):
             command.extend(['-g', str(args.g)])
         if args.noise is not None:
             command.extend(['-noise', str(args.noise)])
-        if args.noisy_edges is not None:
-            command.extend(['--noisy_edges', str(args.noisy_edges)])
-        if args.random_terminals is not None:
-            command.extend(['--random_terminals', str(args.random_terminals)])
+        if noisy_edges is not None:
+            command.extend(['--noisy_edges', str(noisy_edges)])
+        if random_terminals is not None:
+            command.extend(['--random_terminals', str(random_terminals)])
         if args.dummy_mode is not None:
             # This argument does not follow the other naming conventions
             command.extend(['--dummyMode', args.dummy_mode.value])
-        if args.seed is not None:
-            command.extend(['--seed', str(args.seed)])
+        if seed is not None:
+            command.extend(['--seed', str(seed)])
 
         container_suffix = "omics-integrator-2:v3"
         run_container_and_log('Omics Integrator 2',
                              container_suffix,
                              command,
-                             volumes,
+                             volumes.binds,
                              work_dir,
                              out_dir,
                              container_settings,
                              network_disabled=True)
 
-        # TODO do we want to retain other output files?
-        # TODO if deleting other output files, write them all to a tmp directory and copy
-        # the desired output file instead of using glob to delete files from the actual output directory
-        # Rename the primary output file to match the desired output filename
-        Path(output_file).unlink(missing_ok=True)
-        output_tsv = Path(out_dir, 'oi2.tsv')
-        output_tsv.rename(output_file)
-        # Remove the other output files
-        for oi2_output in out_dir.glob('*.html'):
-            oi2_output.unlink(missing_ok=True)
-
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         """
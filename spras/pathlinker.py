@@ -3,13 +3,14 @@ from pathlib import Path
 
 from pydantic import BaseModel, ConfigDict
 
-from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import prepare_volume, run_container_and_log
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.dataset import Dataset
 from spras.interactome import (
     convert_undirected_to_directed,
     reinsert_direction_col_directed,
 )
+from spras.native.pathlinker import find_paths, write_ranked_edges
 from spras.prm import PRM
 from spras.util import duplicate_edges, raw_pathway_df
 
@@ -34,6 +35,7 @@ Interactor1   Interactor2   Weight
 class PathLinker(PRM[PathLinkerParams]):
     required_inputs = ['nodetypes', 'network']
     dois = ["10.1038/npjsba.2016.2", "10.1089/cmb.2012.0274"]
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data, filename_map):
@@ -78,24 +80,24 @@ class PathLinker(PRM[PathLinkerParams]):
         if not args: args = PathLinkerParams()
         PathLinker.validate_required_run_args(inputs)
 
-        work_dir = '/spras'
+        if container_settings.backend == ExecutionBackend.native:
+            PathLinker.run_native(inputs, output_file, args)
+            return
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        work_dir = '/spras'
 
-        bind_path, node_file = prepare_volume(inputs["nodetypes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, network_file = prepare_volume(inputs["network"], work_dir, container_settings)
-        volumes.append(bind_path)
+        node_file = volumes.add(inputs["nodetypes"])
+        network_file = volumes.add(inputs["network"])
 
         # PathLinker does not provide an argument to set the output directory
         # Use its --output argument to set the output file prefix to specify an absolute path and prefix
         out_dir = Path(output_file).parent
         # PathLinker requires that the output directory exist
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
         mapped_out_prefix = mapped_out_dir + '/out'  # Use posix path inside the container
 
         command = ['python',
@@ -110,7 +112,7 @@ class PathLinker(PRM[PathLinkerParams]):
         run_container_and_log('PathLinker',
                              container_suffix,
                              command,
-                             volumes,
+                             volumes.binds,
                              work_dir,
                              out_dir,
                              container_settings)
@@ -121,6 +123,16 @@ class PathLinker(PRM[PathLinkerParams]):
         output_edges = Path(next(out_dir.glob('out*-ranked-edges.txt')))
         output_edges.rename(output_file)
 
+    @staticmethod
+    def run_native(inputs, output_file, args):
+        """
+        Find the k shortest paths in process with spras.native.pathlinker instead of the PathLinker container.
+        The output file has the same format as the container's ranked edges file. Runs with different k on the same
+        inputs reuse the paths that were already found. When paths tie, their order can differ from the container's.
+        """
+        paths = find_paths(inputs["network"], inputs["nodetypes"], args.k)
+        write_ranked_edges(paths, output_file)
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         """
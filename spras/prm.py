@@ -5,7 +5,7 @@ from typing import Any, Generic, Mapping, Optional, TypeVar, cast, get_args
 
 from pydantic import BaseModel
 
-from spras.config.container_schema import ProcessedContainerSettings
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
 from spras.dataset import Dataset
 from spras.util import LoosePathLike
 
@@ -19,9 +19,13 @@ class PRM(ABC, Generic[T]):
     """
 
     required_inputs: list[str] = []
+    # Inputs run uses when they are provided but can produce itself, such as files shared by all runs on a dataset
+    optional_inputs: list[str] = []
     # DOIs aren't strictly required (e.g. local neighborhood),
     # but it should be explicitly declared that there are no DOIs by defining an empty list.
     dois: list[str] = cast(list[str], None)
+    # The execution backends run supports. Algorithms with an in-process implementation also list native.
+    backends: list[ExecutionBackend] = [ExecutionBackend.container]
 
     def __init_subclass__(cls):
         # modified from https://stackoverflow.com/a/58206480/7589775
@@ -128,7 +132,12 @@ class PRM(ABC, Generic[T]):
             if not path.exists():
                 raise OSError(f'Required input "{input_type}" is pointing to a missing file "{path}".')
 
-        # Then, check that all inputs are required inputs (to prevent typos / catch errors when inputs are updated)
+        # Optional inputs that are specified should point to existing files too
+        for input_type in cls.optional_inputs:
+            if input_type in inputs and not Path(inputs[input_type]).exists():
+                raise OSError(f'Optional input "{input_type}" is pointing to a missing file "{inputs[input_type]}".')
+
+        # Then, check that all inputs are required or optional inputs (to prevent typos / catch errors when inputs are updated)
         for input_type in inputs.keys():
-            if input_type not in cls.required_inputs:
+            if input_type not in cls.required_inputs and input_type not in cls.optional_inputs:
                 raise ValueError(f'Extra input "{input_type}" was provided but is not present in required inputs ({cls.required_inputs})')
@@ -1,8 +1,18 @@
 import csv
 import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
 
+# The columns of the time-series file written alongside 'usage-profile.tsv'.
+# Every sampler reports the same columns so that files from different container frameworks can be compared.
+TIMESERIES_HEADER = ["elapsed_sec", "memory_bytes", "cpu_usage_usec", "cpu_user_usec", "cpu_system_usec",
+                     "io_read_bytes", "io_write_bytes"]
 
-def create_peer_cgroup() -> str:
+
+def create_peer_cgroup() -> Optional[str]:
     """
     A helper function that creates a new peer cgroup for the current process.
     Apptainer/singularity containers are placed in this cgroup so that they
@@ -11,16 +21,13 @@ def create_peer_cgroup() -> str:
     in a two-level nested cgroup (introduced in HTCondor 24.8.0).
 
     Returns the path to the peer cgroup, which is needed by the cgroup_wrapper.sh script
-    to set up the cgroup for the container.
+    to set up the cgroup for the container, or None if the peer cgroup could not be created.
+    On plain Linux hosts, use create_delegated_scope_command instead.
     """
 
     # Get the current process's cgroup path
     # This assumes the cgroup is in the unified hierarchy
-    with open("/proc/self/cgroup") as f:
-        first_line = next(f).strip()
-        cgroup_rel = first_line.split(":")[-1].strip()
-
-    mycgroup = os.path.join("/sys/fs/cgroup", cgroup_rel.lstrip("/"))
+    mycgroup = get_process_cgroup("self")
     peer_cgroup = os.path.join(os.path.dirname(mycgroup), f"spras-peer-{os.getpid()}")
 
     # Create the peer cgroup directory
@@ -28,10 +35,266 @@ def create_peer_cgroup() -> str:
         os.makedirs(peer_cgroup, exist_ok=True)
     except Exception as e:
         print(f"Failed to create cgroup: {e}")
+        return None
 
     return peer_cgroup
 
 
+def get_process_cgroup(pid: int | str) -> str:
+    """
+    Get the cgroup v2 directory that a process belongs to.
+    @param pid: the process ID, or 'self' for the current process
+    @return: the absolute path to the cgroup directory under /sys/fs/cgroup
+    """
+    with open(f"/proc/{pid}/cgroup") as f:
+        first_line = next(f).strip()
+        cgroup_rel = first_line.split(":")[-1].strip()
+    return os.path.join("/sys/fs/cgroup", cgroup_rel.lstrip("/"))
+
+
+def create_delegated_scope_command(unit: str) -> Optional[list[str]]:
+    """
+    Builds a command prefix that runs a command in a new transient systemd scope with its cgroup delegated
+    to the current user. This lets plain Linux hosts, where the current process cannot create a peer cgroup,
+    still isolate the resource usage of apptainer containers.
+    The scope cgroup is named '<unit>.scope' and is removed by systemd once the command exits.
+    @param unit: the name of the transient systemd unit
+    @return: the command prefix, or None if systemd-run is not available
+    """
+    if shutil.which("systemd-run") is None:
+        return None
+    # Root uses the system manager, everyone else needs a user manager that supports delegation
+    manager = [] if os.geteuid() == 0 else ["--user"]
+    return ["systemd-run", *manager, "--scope", "--quiet", "--collect", "-p", "Delegate=yes", "--unit", unit]
+
+
+def read_flat_keyed_file(path: str) -> dict[str, str]:
+    """
+    Parses a cgroup 'flat keyed' file such as cpu.stat, where every line is a '<key> <value>' pair.
+    See https://www.kernel.org/doc/html/latest/admin-guide/cgroup-v2.html#format
+    @param path: path to the cgroup interface file
+    @return: a dictionary from keys to their (unparsed) values
+    """
+    values = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) != 2:
+                continue
+            key, value = parts
+            values[key] = value
+    return values
+
+
+def read_io_stat(path: str) -> tuple[int, int]:
+    """
+    Parses a cgroup 'nested keyed' io.stat file, where every line is a device followed by '<key>=<value>' pairs.
+    @param path: path to the io.stat file
+    @return: the total bytes read and written summed over all devices
+    """
+    read_bytes = write_bytes = 0
+    with open(path) as f:
+        for line in f:
+            # The first entry is the device as <major>:<minor>
+            for entry in line.strip().split()[1:]:
+                key, _, value = entry.partition("=")
+                if key == "rbytes":
+                    read_bytes += int(value)
+                elif key == "wbytes":
+                    write_bytes += int(value)
+    return read_bytes, write_bytes
+
+
+class ResourceSampler(ABC):
+    """
+    Polls the resource usage of a running container on a background thread.
+    Subclasses implement `sample`, which returns one time-series row (without the elapsed time) or None
+    if no measurement is currently available.
+    Use as a context manager around the code that waits for the container to finish.
+    """
+
+    def __init__(self, interval: float):
+        """
+        @param interval: seconds to wait between consecutive samples
+        """
+        if interval <= 0:
+            raise ValueError(f"The profiling interval must be positive, not {interval}")
+        self.interval = interval
+        self.samples: list[list] = []
+        # The highest memory usage observed, which can exceed every sampled memory value if the sampler can read
+        # a high-water mark such as memory.peak
+        self.peak_memory: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._start_time = 0.0
+
+    @abstractmethod
+    def sample(self) -> Optional[list]:
+        raise NotImplementedError
+
+    def _record(self):
+        try:
+            row = self.sample()
+        except Exception as e:
+            # The container may exit (and its stats disappear) between two samples
+            print(f"Failed to sample container resource usage: {e}")
+            return
+        if row is not None:
+            self.samples.append([round(time.monotonic() - self._start_time, 3)] + row)
+            self._update_peak_memory(int(row[0]))
+
+    def _update_peak_memory(self, memory: int):
+        if self.peak_memory is None or memory > self.peak_memory:
+            self.peak_memory = memory
+
+    def _poll(self):
+        # Event.wait returns False on timeout, which is when the next sample is due
+        self._record()
+        while not self._stop_event.wait(self.interval):
+            self._record()
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class CgroupSampler(ResourceSampler):
+    """
+    Samples memory.current, cpu.stat, and io.stat from a cgroup v2 directory.
+    """
+
+    def __init__(self, cgroup_path: str, interval: float):
+        """
+        @param cgroup_path: path to the cgroup directory for the container
+        @param interval: seconds to wait between consecutive samples
+        """
+        super().__init__(interval)
+        self.cgroup_path = cgroup_path
+
+    def resolve_cgroup(self) -> Optional[str]:
+        return self.cgroup_path
+
+    def sample(self) -> Optional[list]:
+        cgroup_path = self.resolve_cgroup()
+        # The cgroup is created before the container starts, but it has no processes until the wrapper script joins it
+        if cgroup_path is None or not os.path.exists(os.path.join(cgroup_path, "memory.current")):
+            return None
+        with open(os.path.join(cgroup_path, "memory.current")) as f:
+            memory = f.read().strip()
+        # memory.peak is only available on Linux 5.19 and later
+        peak_path = os.path.join(cgroup_path, "memory.peak")
+        if os.path.exists(peak_path):
+            with open(peak_path) as f:
+                self._update_peak_memory(int(f.read().strip()))
+        cpu_stat = read_flat_keyed_file(os.path.join(cgroup_path, "cpu.stat"))
+        # The io controller is not always enabled for the cgroup
+        io_read = io_write = "N/A"
+        io_stat_path = os.path.join(cgroup_path, "io.stat")
+        if os.path.exists(io_stat_path):
+            io_read, io_write = read_io_stat(io_stat_path)
+        return [memory, cpu_stat.get("usage_usec", "N/A"), cpu_stat.get("user_usec", "N/A"),
+                cpu_stat.get("system_usec", "N/A"), io_read, io_write]
+
+
+class ProcessCgroupSampler(CgroupSampler):
+    """
+    Samples the cgroup that a process moves itself into after it starts, such as a transient systemd scope.
+    The cgroup is looked up from /proc on every sample and is only used once its directory name matches
+    the expected name, so the parent's cgroup is never measured by mistake.
+    """
+
+    def __init__(self, pid: int, cgroup_name: str, interval: float):
+        """
+        @param pid: the process ID of the process that joins the cgroup
+        @param cgroup_name: the expected name of the cgroup directory, e.g. 'spras-123.scope'
+        @param interval: seconds to wait between consecutive samples
+        """
+        super().__init__("", interval)
+        self.pid = pid
+        self.cgroup_name = cgroup_name
+
+    def resolve_cgroup(self) -> Optional[str]:
+        try:
+            cgroup_path = get_process_cgroup(self.pid)
+        except OSError:
+            # The process has already exited
+            return None
+        if os.path.basename(cgroup_path) != self.cgroup_name:
+            return None
+        self.cgroup_path = cgroup_path
+        return cgroup_path
+
+
+class DockerStatsSampler(ResourceSampler):
+    """
+    Samples a running Docker container through the Docker stats API.
+    CPU times are converted from nanoseconds to microseconds to match the cgroup units.
+    """
+
+    def __init__(self, container, interval: float):
+        """
+        @param container: a docker.models.containers.Container that has already been started
+        @param interval: seconds to wait between consecutive samples
+        """
+        super().__init__(interval)
+        self.container = container
+
+    def sample(self) -> Optional[list]:
+        # one_shot skips the second measurement Docker otherwise takes to compute CPU percentages
+        stats = self.container.stats(stream=False, one_shot=True)
+        memory_stats = stats.get("memory_stats") or {}
+        if "usage" not in memory_stats:
+            # The container has exited, so there is nothing left to measure
+            return None
+        # max_usage is only reported on cgroup v1 hosts
+        if "max_usage" in memory_stats:
+            self._update_peak_memory(memory_stats["max_usage"])
+        cpu_usage = (stats.get("cpu_stats") or {}).get("cpu_usage") or {}
+
+        def to_usec(key):
+            return cpu_usage[key] // 1000 if key in cpu_usage else "N/A"
+
+        io_read = io_write = 0
+        for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+            op = entry.get("op", "").lower()
+            if op == "read":
+                io_read += entry.get("value", 0)
+            elif op == "write":
+                io_write += entry.get("value", 0)
+        return [memory_stats["usage"], to_usec("total_usage"), to_usec("usage_in_usermode"),
+                to_usec("usage_in_kernelmode"), io_read, io_write]
+
+
+def write_usage_timeseries(samples: list[list], out_dir: str):
+    """
+    Writes the samples collected by a ResourceSampler to 'usage-timeseries.tsv' in the calling rule's output
+    directory, next to 'usage-profile.tsv'. Rows are appended so that multiple containers run by the same rule
+    are all recorded, each starting from an elapsed time of 0.
+    @param samples: rows in the TIMESERIES_HEADER format
+    @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
+    """
+    timeseries_path = os.path.join(out_dir, "usage-timeseries.tsv")
+
+    write_header = not os.path.exists(timeseries_path) or os.path.getsize(timeseries_path) == 0
+    with open(timeseries_path, "a", newline="") as out_f:
+        writer = csv.writer(out_f, delimiter="\t")
+        if write_header:
+            writer.writerow(TIMESERIES_HEADER)
+        writer.writerows(samples)
+
+
 def create_apptainer_container_stats(cgroup_path: str, out_dir: str):
     """
     Reads the contents of the provided cgroup's memory.peak and cpu.stat files.
@@ -45,8 +308,6 @@ def create_apptainer_container_stats(cgroup_path: str, out_dir: str):
     @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
     """
 
-    profile_path = os.path.join(out_dir, "usage-profile.tsv")
-
     peak_mem = "N/A"
     try:
         with open(os.path.join(cgroup_path, "memory.peak")) as f:
@@ -56,27 +317,46 @@ def create_apptainer_container_stats(cgroup_path: str, out_dir: str):
 
     cpu_usage = cpu_user = cpu_system = "N/A"
     try:
-        with open(os.path.join(cgroup_path, "cpu.stat")) as f:
-            # Parse out the contents of the cpu.stat file
-            # You can find these fields by searching "cpu.stat" in the cgroup documentation:
-            # https://www.kernel.org/doc/html/latest/admin-guide/cgroup-v2.html
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) != 2:
-                    continue
-                key, value = parts
-                if key == "usage_usec":
-                    cpu_usage = value
-                elif key == "user_usec":
-                    cpu_user = value
-                elif key == "system_usec":
-                    cpu_system = value
+        # Parse out the contents of the cpu.stat file
+        # You can find these fields by searching "cpu.stat" in the cgroup documentation:
+        # https://www.kernel.org/doc/html/latest/admin-guide/cgroup-v2.html
+        cpu_stat = read_flat_keyed_file(os.path.join(cgroup_path, "cpu.stat"))
+        cpu_usage = cpu_stat.get("usage_usec", cpu_usage)
+        cpu_user = cpu_stat.get("user_usec", cpu_user)
+        cpu_system = cpu_stat.get("system_usec", cpu_system)
     except Exception as e:
         print(f"Failed to read cpu.stat from cgroup: {e}")
 
+    write_usage_profile([peak_mem, cpu_usage, cpu_user, cpu_system], out_dir)
+
+
+def create_sampled_container_stats(sampler: ResourceSampler, out_dir: str):
+    """
+    Summarizes the samples collected by a ResourceSampler into the calling rule's 'usage-profile.tsv'.
+    This is used when the container's cgroup no longer exists after it exits, as is the case for Docker
+    containers and transient systemd scopes, so the CPU times are those of the last sample and can slightly
+    undercount the container's total usage.
+    @param sampler: a sampler that has been stopped
+    @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
+    """
+    peak_mem = sampler.peak_memory if sampler.peak_memory is not None else "N/A"
+    cpu_usage = cpu_user = cpu_system = "N/A"
+    if sampler.samples:
+        # Skip the elapsed time and memory columns
+        cpu_usage, cpu_user, cpu_system = sampler.samples[-1][2:5]
+    write_usage_profile([peak_mem, cpu_usage, cpu_user, cpu_system], out_dir)
+
+
+def write_usage_profile(row: list, out_dir: str):
+    """
+    Appends one row of peak memory and CPU usage to 'usage-profile.tsv' in the calling rule's output directory.
+    @param row: the peak memory in bytes, followed by the total, user, and system CPU time in microseconds
+    @param out_dir: output directory for the rule's artifacts -- used here to store profiling data
+    """
+    profile_path = os.path.join(out_dir, "usage-profile.tsv")
+
     # Set up the header for the TSV file
     header = ["peak_memory_bytes", "cpu_usage_usec", "cpu_user_usec", "cpu_system_usec"]
-    row = [peak_mem, cpu_usage, cpu_user, cpu_system]
 
     # Write the contents of the file
     write_header = not os.path.exists(profile_path) or os.path.getsize(profile_path) == 0
@@ -87,4 +367,3 @@ def create_apptainer_container_stats(cgroup_path: str, out_dir: str):
         if write_header:
             writer.writerow(header)
         writer.writerow(row)
-
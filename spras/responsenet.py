@@ -2,12 +2,13 @@ from pathlib import Path
 
 from pydantic import BaseModel, ConfigDict
 
-from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import prepare_volume, run_container_and_log
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.interactome import (
     convert_undirected_to_directed,
     reinsert_direction_col_undirected,
 )
+from spras.native.flow import response_net
 from spras.prm import PRM
 from spras.util import add_rank_column, duplicate_edges, raw_pathway_df
 
@@ -35,6 +36,7 @@ Interactor1   Interactor2   Weight
 class ResponseNet(PRM[ResponseNetParams]):
     required_inputs = ['sources', 'targets', 'edges']
     dois = ["10.1038/ng.337"]
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data, filename_map):
@@ -68,26 +70,24 @@ class ResponseNet(PRM[ResponseNetParams]):
         ResponseNet.validate_required_run_args(inputs)
         if not args: args = ResponseNetParams()
 
+        if container_settings.backend == ExecutionBackend.native:
+            ResponseNet.run_native(inputs, output_file, args)
+            return
+
         # the data files will be mapped within this directory within the container
         work_dir = '/ResponseNet'
 
-        # the tuple is for mapping the sources, targets, edges, and output
-        volumes = list()
-
-        bind_path, sources_file = prepare_volume(inputs["sources"], work_dir, container_settings)
-        volumes.append(bind_path)
-
-        bind_path, targets_file = prepare_volume(inputs["targets"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, edges_file = prepare_volume(inputs["edges"], work_dir, container_settings)
-        volumes.append(bind_path)
+        sources_file = volumes.add(inputs["sources"])
+        targets_file = volumes.add(inputs["targets"])
+        edges_file = volumes.add(inputs["edges"])
 
         # Create a prefix for the output filename and ensure the directory exists
         out_dir = Path(output_file).parent
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
 
         mapped_out_prefix = Path(mapped_out_dir)
         out_file_suffixed = out_dir / f'output_gamma{str(args.gamma)}.txt'
@@ -109,7 +109,7 @@ class ResponseNet(PRM[ResponseNetParams]):
             'ResponseNet',
             container_suffix,
             command,
-            volumes,
+            volumes.binds,
             work_dir,
             out_dir,
             container_settings)
@@ -117,6 +117,17 @@ class ResponseNet(PRM[ResponseNetParams]):
         # Rename the primary output file to match the desired output filename
         out_file_suffixed.rename(output_file)
 
+    @staticmethod
+    def run_native(inputs, output_file, args):
+        """
+        Solve the ResponseNet flow in process with spras.native.flow instead of the ResponseNet container.
+        The output file has the same format as the container output. Runs with different gammas on the same inputs
+        continue from the flow that was already found. When paths tie, the flow can take a different path than in the
+        container.
+        """
+        edges = response_net(inputs["edges"], inputs["sources"], inputs["targets"], args.gamma)
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        edges.to_csv(output_file, sep='\t', index=False, header=['Interactor 1', 'Interactor 2', 'Flow'])
 
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
@@ -6,6 +6,7 @@ from spras.config.dataset import DatasetSchema
 from spras.config.util import ALGORITHM_REGISTRY, AlgorithmName
 from spras.dataset import Dataset
 from spras.prm import PRM
+from spras.tracing import span
 from spras.util import LoosePathLike
 
 
@@ -33,14 +34,31 @@ def run(algorithm: str, inputs, output_file, args, container_settings):
     """
     A generic interface to the algorithm-specific run functions
     """
-    algorithm_runner = get_algorithm(algorithm)
-    # Resolve per-algorithm image override so containers.py can use it
+    with span('run', algorithm=algorithm, output_file=output_file):
+        algorithm_runner = get_algorithm(algorithm)
+        settings = algorithm_container_settings(algorithm, container_settings)
+        # We can't use config.config here else we would get a cyclic dependency.
+        # Since args is a dict here, we use the 'run_typeless' utility PRM function.
+        algorithm_runner.run_typeless(inputs, output_file, args, settings)
+
+
+def algorithm_container_settings(algorithm: str, container_settings):
+    """
+    Resolve the per-algorithm image override, backend, and execution settings so containers.py can use them
+    @param algorithm: algorithm name
+    @param container_settings: the container settings shared by all algorithms
+    @return: a copy of the container settings for this algorithm
+    """
     settings = copy.copy(container_settings)
     if settings.images and algorithm in settings.images:
         settings.image_override = settings.images[algorithm]
-    # We can't use config.config here else we would get a cyclic dependency.
-    # Since args is a dict here, we use the 'run_typeless' utility PRM function.
-    algorithm_runner.run_typeless(inputs, output_file, args, settings)
+    if settings.backends and algorithm in settings.backends:
+        settings.backend = settings.backends[algorithm]
+    if settings.execution and algorithm in settings.execution:
+        settings.processes = settings.execution[algorithm].processes
+        settings.threads = settings.execution[algorithm].threads
+        settings.visualization = settings.execution[algorithm].visualization
+    return settings
 
 
 def get_required_inputs(algorithm: str):
@@ -59,8 +77,11 @@ def merge_input(dataset_data: DatasetSchema, dataset_output: LoosePathLike):
     @param dataset_dict: dataset to process
     @param dataset_file: output filename
     """
-    dataset = Dataset(dataset_data)
-    dataset.to_file(dataset_output)
+    with span('merge_input', dataset=dataset_data.label):
+        with span('merge_dataset'):
+            dataset = Dataset(dataset_data)
+        with span('pickle_dataset'):
+            dataset.to_file(dataset_output)
 
 
 def prepare_inputs(algorithm: str, data_file: LoosePathLike, filename_map: Mapping[str, LoosePathLike]):
@@ -71,9 +92,12 @@ def prepare_inputs(algorithm: str, data_file: LoosePathLike, filename_map: Mappi
     @param filename_map: a dict mapping file types in the required_inputs to the filename for that type
     @return:
     """
-    dataset = Dataset.from_file(data_file)
-    algorithm_runner = get_algorithm(algorithm)
-    return algorithm_runner.generate_inputs(dataset, filename_map)
+    with span('prepare_inputs', algorithm=algorithm, dataset_file=data_file):
+        with span('unpickle_dataset'):
+            dataset = Dataset.from_file(data_file)
+        algorithm_runner = get_algorithm(algorithm)
+        with span('generate_inputs', algorithm=algorithm):
+            return algorithm_runner.generate_inputs(dataset, filename_map)
 
 
 # TODO: make raw_pathway_file and standardized_pathway_file LoosePathLike
@@ -84,5 +108,6 @@ def parse_output(algorithm: str, raw_pathway_file: str, standardized_pathway_fil
     @param raw_pathway_file: pathway file produced by an algorithm's run function
     @param standardized_pathway_file: the same pathway written in the universal format
     """
-    algorithm_runner = get_algorithm(algorithm)
-    return algorithm_runner.parse_output(raw_pathway_file, standardized_pathway_file, params)
+    with span('parse_output', algorithm=algorithm, raw_pathway_file=raw_pathway_file):
+        algorithm_runner = get_algorithm(algorithm)
+        return algorithm_runner.parse_output(raw_pathway_file, standardized_pathway_file, params)
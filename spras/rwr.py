@@ -4,13 +4,20 @@ from typing import Optional
 import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
-from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import prepare_volume, run_container_and_log
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
+from spras.containers import VolumePlanner, run_container_and_log
 from spras.dataset import Dataset
 from spras.interactome import (
     convert_undirected_to_directed,
     reinsert_direction_col_directed,
 )
+from spras.native.rwr import (
+    DEFAULT_ALPHA,
+    load_network,
+    personalized_pagerank,
+    read_nodes,
+    write_scores,
+)
 from spras.prm import PRM
 from spras.util import add_rank_column, duplicate_edges, raw_pathway_df
 
@@ -28,6 +35,7 @@ class RWRParams(BaseModel):
 class RWR(PRM[RWRParams]):
     required_inputs = ['network','nodes']
     dois = []
+    backends = [ExecutionBackend.container, ExecutionBackend.native]
 
     @staticmethod
     def generate_inputs(data, filename_map):
@@ -62,24 +70,25 @@ class RWR(PRM[RWRParams]):
                 endpoints = line.split("|")
                 if len(endpoints) != 2:
                     raise ValueError(f"Edge {line} does not contain 2 nodes separated by '|'")
-        work_dir = '/spras'
 
-        # Each volume is a tuple (src, dest)
-        volumes = list()
+        if container_settings.backend == ExecutionBackend.native:
+            RWR.run_native(inputs, output_file, args)
+            return
+
+        work_dir = '/spras'
 
-        bind_path, nodes_file = prepare_volume(inputs["nodes"], work_dir, container_settings)
-        volumes.append(bind_path)
+        # Each local directory is bound once, however many of its files are used
+        volumes = VolumePlanner(work_dir, container_settings)
 
-        bind_path, network_file = prepare_volume(inputs["network"], work_dir, container_settings)
-        volumes.append(bind_path)
+        nodes_file = volumes.add(inputs["nodes"])
+        network_file = volumes.add(inputs["network"])
 
         # RWR does not provide an argument to set the output directory
         # Use its --output argument to set the output file prefix to specify an absolute path and prefix
         out_dir = Path(output_file).parent
         # RWR requires that the output directory exist
         out_dir.mkdir(parents=True, exist_ok=True)
-        bind_path, mapped_out_dir = prepare_volume(str(out_dir), work_dir, container_settings)
-        volumes.append(bind_path)
+        mapped_out_dir = volumes.add(str(out_dir))
         mapped_out_prefix = mapped_out_dir + "/output.txt"
         command = ['python',
                    '/RWR/RWR.py',
@@ -96,7 +105,7 @@ class RWR(PRM[RWRParams]):
             "RandomWalk with Restart",
             container_suffix,
             command,
-            volumes,
+            volumes.binds,
             work_dir,
             out_dir,
             container_settings)
@@ -105,6 +114,23 @@ class RWR(PRM[RWRParams]):
         output_edges = Path(out_dir, 'output.txt')
         output_edges.rename(output_file)
 
+    @staticmethod
+    def run_native(inputs, output_file, args):
+        """
+        Run the random walk in process with spras.native.rwr instead of the rwr container.
+        The output file has the same format as the container output.
+        """
+        network = load_network(inputs["network"])
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        if len(network) == 0:
+            Path(output_file).write_text('Node\tScore\n')
+            return
+
+        nodes = read_nodes(inputs["nodes"])
+        alpha = args.alpha if args.alpha is not None else DEFAULT_ALPHA
+        scores = personalized_pagerank(network, network.restart_matrix([nodes]), alpha)
+        write_scores(network, scores[:, 0], output_file)
+
     @staticmethod
     def parse_output(raw_pathway_file, standardized_pathway_file, params):
         df = raw_pathway_df(raw_pathway_file, sep='\t',header=0)
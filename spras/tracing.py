@@ -0,0 +1,139 @@
+"""
+Records how long each stage of the workflow takes.
+
+Spans are appended as JSON lines to a single trace file shared by every job of a workflow run. Each line holds the
+span name, its category, the wall clock start time and duration in microseconds, the process and thread it ran in,
+and any extra arguments (e.g. the algorithm name). Spans nest by time, so a container run recorded inside
+runner.run shows up as a child of it.
+
+Tracing is disabled until configure_tracing is called, in which case span has no effect.
+The trace file can be converted with export_chrome_trace into the Chrome trace event format, which can be opened
+in https://ui.perfetto.dev or chrome://tracing.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from spras.util import LoosePathLike
+
+_trace_file: Optional[Path] = None
+# Jobs that Snakemake runs in threads of the same process share the trace file
+_trace_lock = threading.Lock()
+# The wall clock time at the zero of the performance counter, so span times are wall clock times that never go
+# backwards within a process
+_CLOCK_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+
+def configure_tracing(trace_file: Optional[LoosePathLike]):
+    """
+    Set the file that spans are appended to.
+    @param trace_file: the JSON lines trace file, or None to disable tracing
+    """
+    global _trace_file
+    if trace_file is None:
+        _trace_file = None
+        return
+    _trace_file = Path(trace_file)
+    _trace_file.parent.mkdir(parents=True, exist_ok=True)
+
+
+def tracing_enabled() -> bool:
+    return _trace_file is not None
+
+
+def write_span(event: dict[str, Any]):
+    """
+    Append a single span to the trace file.
+    Each span is written with one call in append mode so that concurrent processes do not interleave lines.
+    @param event: the span to write
+    """
+    if _trace_file is None:
+        return
+    line = json.dumps(event, default=str) + '\n'
+    with _trace_lock, open(_trace_file, 'a') as f:
+        f.write(line)
+
+
+def _now_us() -> int:
+    """
+    The wall clock time in microseconds, read from the monotonic performance counter so that the start and end of
+    spans are measured on the same clock and a nested span always ends within its parent
+    """
+    return (time.perf_counter_ns() + _CLOCK_OFFSET_NS) // 1000
+
+
+@contextmanager
+def span(name: str, category: str = 'runner', **args: Any) -> Iterator[dict[str, Any]]:
+    """
+    Record the time spent in the body of the with statement as a span.
+    If the body raises an exception, the span is still recorded and its type is stored in the 'error' argument.
+    @param name: the name of the stage, e.g. 'generate_inputs'
+    @param category: the group the stage belongs to, e.g. 'runner' or 'container'
+    @param args: extra values to store with the span. More can be added to the yielded dict inside the body.
+    @return: the dict of span arguments
+    """
+    if _trace_file is None:
+        yield args
+        return
+
+    start_us = _now_us()
+    try:
+        yield args
+    except BaseException as err:
+        args['error'] = type(err).__name__
+        raise
+    finally:
+        write_span({
+            'name': name,
+            'cat': category,
+            'ts': start_us,
+            'dur': _now_us() - start_us,
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+            'args': args
+        })
+
+
+def read_trace(trace_file: LoosePathLike) -> list[dict[str, Any]]:
+    """
+    Read the spans in a JSON lines trace file.
+    A partially written last line, which can be left behind by a job that was killed, is skipped.
+    @param trace_file: the trace file written by span
+    @return: the list of spans in the order they were written
+    """
+    events = []
+    with open(trace_file) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def export_chrome_trace(trace_file: LoosePathLike, output_file: LoosePathLike):
+    """
+    Convert a JSON lines trace file into the Chrome trace event format, which Perfetto can also open.
+    Every span becomes a complete ('X') event. The timestamps are shifted so the trace starts at 0.
+    @param trace_file: the trace file written by span
+    @param output_file: the JSON file to write
+    """
+    events = read_trace(trace_file)
+    first_us = min((event['ts'] for event in events), default=0)
+
+    trace_events = []
+    for pid in sorted({event['pid'] for event in events}):
+        trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': f'spras {pid}'}})
+    for event in sorted(events, key=lambda e: (e['ts'], -e['dur'])):
+        trace_events.append({**event, 'ph': 'X', 'ts': event['ts'] - first_us})
+
+    with open(output_file, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
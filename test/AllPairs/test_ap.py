@@ -6,7 +6,11 @@ import pytest
 
 import spras.config.config as config
 from spras.allpairs import AllPairs
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
 
 # Note that we don't directly use the config in the test, but we need the config
 # to be initialized under the hood nonetheless. Initializing the config has implications
@@ -133,3 +137,31 @@ class TestAllPairs:
         )
 
         assert filecmp.cmp(OUT_DIR / 'zero-length-out.txt', EXPECTED_DIR / 'zero-length-expected.txt', shallow=False)
+
+    @pytest.mark.parametrize('case, directed_flag', [('correctness', 'false'), ('directed', 'true')])
+    def test_allpairs_native(self, case, directed_flag):
+        """
+        Tests the in-process shortest paths on the same networks as the container correctness tests
+        """
+        out_path = OUT_DIR / f'{case}-native-out.txt'
+        out_path.unlink(missing_ok=True)
+
+        AllPairs.run({"nodetypes": TEST_DIR / 'input' / f'{case}-nodetypes.txt',
+                      "network": TEST_DIR / 'input' / f'{case}-network.txt',
+                      "directed_flag": TEST_DIR / 'input' / f'directed-flag-{directed_flag}.txt'},
+                     output_file=out_path,
+                     container_settings=ProcessedContainerSettings(backend=ExecutionBackend.native))
+
+        edge_equality_test_util(out_path, EXPECTED_DIR / f'{case}-expected.txt')
+
+    def test_allpairs_native_zero_length(self):
+        out_path = OUT_DIR / 'zero-length-native-out.txt'
+        out_path.unlink(missing_ok=True)
+
+        AllPairs.run({"nodetypes": TEST_DIR / 'input' / 'zero-length-nodetypes.txt',
+                      "network": TEST_DIR / 'input' / 'zero-length-network.txt',
+                      "directed_flag": TEST_DIR / 'input' / 'directed-flag-false.txt'},
+                     output_file=out_path,
+                     container_settings=ProcessedContainerSettings(backend=ExecutionBackend.native))
+
+        assert filecmp.cmp(out_path, EXPECTED_DIR / 'zero-length-expected.txt', shallow=False)
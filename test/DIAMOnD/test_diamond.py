@@ -4,12 +4,15 @@ from pathlib import Path
 import pytest
 
 import spras.config.config as config
+from spras.config.container_schema import ExecutionBackend, ProcessedContainerSettings
 from spras.diamond import DIAMOnD, DIAMOnDParams
 
 config.init_from_file("config/config.yaml")
 
 TEST_DIR = Path('test', 'DIAMOnD')
+EXPECTED_DIR = TEST_DIR / 'expected'
 OUT_FILE = TEST_DIR / 'output' / 'diamond-output.txt'
+NATIVE_SETTINGS = ProcessedContainerSettings(backend=ExecutionBackend.native)
 
 
 class TestDIAMOnD:
@@ -38,6 +41,32 @@ class TestDIAMOnD:
                      args=DIAMOnDParams(alpha=0, n=2))
         assert OUT_FILE.exists()
 
+    @pytest.mark.parametrize('alpha', [1, 3])
+    def test_diamond_native(self, alpha):
+        inputs = {"network": TEST_DIR / 'input' / 'diamond-medium-network.txt',
+                  "seeds": TEST_DIR / 'input' / 'diamond-medium-seeds.txt'}
+        DIAMOnD.run(inputs, output_file=OUT_FILE, args=DIAMOnDParams(n=200, alpha=alpha),
+                    container_settings=NATIVE_SETTINGS)
+        with open(OUT_FILE) as f:
+            n200_lines = f.readlines()
+        # The expected ranks, nodes and p-values are from DIAMOnD.py with ties broken by node order in the network file
+        with open(EXPECTED_DIR / f'diamond-medium-alpha{alpha}-expected.txt') as f:
+            assert n200_lines == f.readlines()
+
+        # The nodes for a smaller n are the first nodes for a larger n
+        DIAMOnD.run(inputs, output_file=OUT_FILE, args=DIAMOnDParams(n=20, alpha=alpha),
+                    container_settings=NATIVE_SETTINGS)
+        with open(OUT_FILE) as f:
+            assert f.readlines() == n200_lines[:21]
+
+    def test_diamond_native_too_many_iterations(self):
+        with pytest.raises(RuntimeError, match='too many iterations'):
+            DIAMOnD.run({"network": TEST_DIR / 'input' / 'diamond-network.txt',
+                         "seeds": TEST_DIR / 'input' / 'diamond-seeds.txt'},
+                        output_file=OUT_FILE,
+                        args=DIAMOnDParams(n=10),
+                        container_settings=NATIVE_SETTINGS)
+
     def test_DIAMOnD_missing_seeds(self):
         with pytest.raises(ValueError):
             # No seeds
@@ -1,6 +1,8 @@
+import json
 import shutil
 from pathlib import Path
 
+import pandas as pd
 import pytest
 
 import spras.config.config as config
@@ -10,6 +12,7 @@ from spras.domino import (
     DominoParams,
     post_domino_id_transform,
     pre_domino_id_transform,
+    write_module_edges,
 )
 
 config.init_from_file("config/config.yaml")
@@ -99,3 +102,59 @@ class TestDOMINO:
         assert post_domino_id_transform('ENSG0123') == '123'
         assert post_domino_id_transform('ENSG0xyz') == 'xyz'
         assert post_domino_id_transform('123') == '123'
+
+    def test_domino_write_module_edges(self, tmp_path):
+        network_file = tmp_path / 'network.txt'
+        network_file.write_text('ID_interactor_A\tppi\tID_interactor_B\n'
+                                'ENSG0A\tppi\tENSG0B\n'
+                                'ENSG0B\tppi\tENSG0C\n'
+                                'ENSG0C\tppi\tENSG0D\n'
+                                'ENSG0D\tppi\tENSG0E\n')
+        modules_file = tmp_path / 'modules.out'
+        modules_file.write_text('[ENSG0A, ENSG0B, ENSG0C]\n[ENSG0D, ENSG0E]\n')
+        raw_file = tmp_path / 'raw.txt'
+        write_module_edges(network_file, modules_file, raw_file)
+
+        standardized_file = tmp_path / 'standardized.txt'
+        DOMINO.parse_output(raw_file, standardized_file, {})
+        edges = pd.read_csv(standardized_file, sep='\t')
+        assert edges[['Node1', 'Node2']].values.tolist() == [['A', 'B'], ['B', 'C'], ['D', 'E']]
+
+    def test_domino_write_module_edges_overlapping_modules(self, tmp_path):
+        network_file = tmp_path / 'network.txt'
+        network_file.write_text('ID_interactor_A\tppi\tID_interactor_B\n'
+                                'ENSG0C\tppi\tENSG0B\n'
+                                'ENSG0A\tppi\tENSG0B\n'
+                                'ENSG0A\tppi\tENSG0D\n')
+        modules_file = tmp_path / 'modules.out'
+        modules_file.write_text('[ENSG0D]\n[ENSG0A, ENSG0B]\n[ENSG0B, ENSG0C, ENSG0A]\n')
+        raw_file = tmp_path / 'raw.txt'
+        write_module_edges(network_file, modules_file, raw_file)
+
+        # Each module lists the network edges between its nodes in network order, including an edge shared by modules
+        modules = [[(edge['data']['source'], edge['data']['target']) for edge in json.loads(line.removeprefix('let data = ').removesuffix(';'))]
+                   for line in raw_file.read_text().splitlines()]
+        assert modules == [[], [('ENSG0A', 'ENSG0B')], [('ENSG0C', 'ENSG0B'), ('ENSG0A', 'ENSG0B')]]
+
+    def test_domino_write_module_edges_no_modules(self, tmp_path):
+        network_file = tmp_path / 'network.txt'
+        network_file.write_text('ID_interactor_A\tppi\tID_interactor_B\nENSG0A\tppi\tENSG0B\n')
+        raw_file = tmp_path / 'raw.txt'
+        # DOMINO does not write modules.out when it fails on empty inputs
+        write_module_edges(network_file, tmp_path / 'modules.out', raw_file)
+        assert raw_file.read_text() == ''
+
+    def test_domino_missing_slices(self):
+        # The slices are optional, but when they are given the file has to exist
+        with pytest.raises(OSError):
+            DOMINO.run({"network": TEST_DIR / 'input' / 'simple' / 'domino-network.txt',
+                        "active_genes": TEST_DIR / 'input' / 'simple' / 'domino-active-genes.txt',
+                        "slices": TEST_DIR / 'input' / 'simple' / 'missing-slices.txt'},
+                       output_file=OUT_FILE_DEFAULT)
+
+    def test_domino_extra_input(self):
+        with pytest.raises(ValueError):
+            DOMINO.run({"network": TEST_DIR / 'input' / 'simple' / 'domino-network.txt',
+                        "active_genes": TEST_DIR / 'input' / 'simple' / 'domino-active-genes.txt',
+                        "modules": TEST_DIR / 'input' / 'simple' / 'domino-network.txt'},
+                       output_file=OUT_FILE_DEFAULT)
@@ -44,10 +44,12 @@ class TestLocalNeighborhood:
     Run the local neighborhood algorithm with an improperly formatted network file
     """
     def test_format_error(self):
+        OUT_FILE.unlink(missing_ok=True)
         with pytest.raises(ValueError):
             local_neighborhood(network_file=Path(TEST_DIR, 'input', 'ln-bad-network.txt'),
                                nodes_file=Path(TEST_DIR, 'input', 'ln-nodes.txt'),
                                output_file=OUT_FILE)
+        assert not OUT_FILE.exists(), 'A partial output file was written'
 
     # Write tests for the Local Neighborhood run function here.
     # The tests above test the internal python code for local_neighborhood - can you
@@ -4,13 +4,18 @@ from pathlib import Path
 import pytest
 
 import spras.config.config as config
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
 from spras.mincostflow import MinCostFlow, MinCostFlowParams
 
 config.init_from_file("config/config.yaml")
 
 TEST_DIR = 'test/MinCostFlow/'
 OUT_FILE = TEST_DIR + 'output/mincostflow-output.txt'
+NATIVE_SETTINGS = ProcessedContainerSettings(backend=ExecutionBackend.native)
 
 
 class TestMinCostFlow:
@@ -111,3 +116,30 @@ class TestMinCostFlow:
                         args=MinCostFlowParams(flow=1, capacity=1),
                         container_settings=ProcessedContainerSettings(framework=ContainerFramework.singularity))
         assert out_path.exists()
+
+    @pytest.mark.parametrize('graph, flow', [('graph1', 1), ('graph1', 2), ('graph2', 1), ('graph2', 2), ('graph2', 3),
+                                             ('graph3', 2)])
+    def test_mincostflow_native(self, graph, flow):
+        out_path = Path(OUT_FILE)
+        out_path.unlink(missing_ok=True)
+        MinCostFlow.run({"sources": TEST_DIR + 'input/' + graph + '/sources.txt',
+                         "targets": TEST_DIR + 'input/' + graph + '/targets.txt',
+                         "edges": TEST_DIR + 'input/' + graph + '/edges.txt'},
+                        output_file=OUT_FILE,
+                        args=MinCostFlowParams(flow=flow, capacity=1),
+                        container_settings=NATIVE_SETTINGS)
+        # The expected networks list each edge from head to tail
+        with open(out_path) as f:
+            edges = {tuple(line.split()) for line in f}
+        with open(TEST_DIR + f'expected/{graph}/{graph}_flow{flow}_c1.0.sif') as f:
+            expected = {tuple(reversed(line.split())) for line in f}
+        assert edges == expected
+
+    def test_mincostflow_native_too_much_flow(self):
+        with pytest.raises(RuntimeError, match='did not produce an output network'):
+            MinCostFlow.run({"sources": TEST_DIR + 'input/graph1/sources.txt',
+                             "targets": TEST_DIR + 'input/graph1/targets.txt',
+                             "edges": TEST_DIR + 'input/graph1/edges.txt'},
+                            output_file=OUT_FILE,
+                            args=MinCostFlowParams(flow=50, capacity=1),
+                            container_settings=NATIVE_SETTINGS)
@@ -100,6 +100,14 @@ class TestOmicsIntegrator1:
                        b=1,
                        d=10)
 
+    def test_oi1_write_conf(self, tmp_path):
+        conf_file = tmp_path / 'oi1-configuration.txt'
+        write_conf(conf_file, w=5, b=1, d=10)
+        assert conf_file.read_text().splitlines()[-2:] == ['processes = 1', 'threads = 1']
+
+        write_conf(conf_file, w=5, b=1, d=10, processes=4, threads=2)
+        assert conf_file.read_text().splitlines()[-2:] == ['processes = 4', 'threads = 2']
+
     def test_oi1_missing_dummy(self):
         # Test the expected error is raised when the dummy_nodes file is missing and the dummy_mode is 'file'
         with pytest.raises(ValueError):
@@ -1,11 +1,18 @@
 import shutil
 from pathlib import Path
 
+import pandas as pd
 import pytest
 
 import spras.config.config as config
 from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
-from spras.omicsintegrator2 import DummyMode, OmicsIntegrator2, OmicsIntegrator2Params
+from spras.omicsintegrator2 import (
+    DummyMode,
+    OmicsIntegrator2,
+    OmicsIntegrator2Params,
+    merge_forests,
+    replicate_runs,
+)
 
 config.init_from_file("config/config.yaml")
 
@@ -63,3 +70,38 @@ class TestOmicsIntegrator2:
                              output_file=OUT_FILE,
                              container_settings=ProcessedContainerSettings(framework=ContainerFramework.singularity))
         assert OUT_FILE.exists()
+
+    def test_oi2_replicate_runs(self):
+        replicates = replicate_runs(OmicsIntegrator2Params(noisy_edges=2, random_terminals=3, seed=2))
+        assert [(noisy, random) for noisy, random, _ in replicates] == [(1, 0), (1, 0), (0, 1), (0, 1), (0, 1)]
+        seeds = [seed for _, _, seed in replicates]
+        assert len(set(seeds)) == len(seeds)
+        assert all(0 <= seed < 2**32 for seed in seeds)
+        # The seeds only depend on the seed parameter and the position of the replicate
+        assert replicate_runs(OmicsIntegrator2Params(noisy_edges=2, random_terminals=3, seed=2)) == replicates
+        assert replicate_runs(OmicsIntegrator2Params(noisy_edges=2, seed=2)) == replicates[:2]
+
+    def test_oi2_merge_forests(self, tmp_path):
+        columns = ['protein1', 'protein2', 'cost', 'in_solution']
+        first = tmp_path / 'first.tsv'
+        pd.DataFrame([['A', 'B', 0.5, True], ['B', 'C', 0.2, False]], columns=columns).to_csv(first, sep='\t', index=False)
+        # The same undirected edges in the other order and with the columns reordered
+        second = tmp_path / 'second.tsv'
+        pd.DataFrame([[True, 'C', 'B', 0.2], [True, 'D', 'C', 0.1]], columns=['in_solution', 'protein1', 'protein2', 'cost']) \
+            .to_csv(second, sep='\t', index=False)
+        # A replicate without a solution
+        empty = tmp_path / 'empty.tsv'
+        empty.write_text('\n')
+
+        merged_file = tmp_path / 'merged.tsv'
+        merge_forests([first, empty, second], merged_file)
+        merged = pd.read_csv(merged_file, sep='\t')
+        assert list(merged.columns) == columns
+        assert merged.values.tolist() == [['A', 'B', 0.5, True], ['B', 'C', 0.2, True], ['D', 'C', 0.1, True]]
+
+    def test_oi2_merge_forests_empty(self, tmp_path):
+        empty = tmp_path / 'empty.tsv'
+        empty.write_text('\n')
+        merged_file = tmp_path / 'merged.tsv'
+        merge_forests([empty], merged_file)
+        assert merged_file.read_text().strip() == 'protein1\tprotein2\tcost\tin_solution'
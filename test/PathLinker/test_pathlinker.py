@@ -1,10 +1,19 @@
+import math
 import shutil
+from collections import defaultdict
 from pathlib import Path
 
+import networkx as nx
+import pandas as pd
 import pytest
 
 import spras.config.config as config
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
+from spras.native.pathlinker import find_paths, read_network
 from spras.pathlinker import PathLinker, PathLinkerParams
 
 config.init_from_file("config/config.yaml")
@@ -12,6 +21,9 @@ config.init_from_file("config/config.yaml")
 TEST_DIR = 'test/PathLinker/'
 OUT_FILE_DEFAULT = TEST_DIR+'output/pathlinker-ranked-edges.txt'
 OUT_FILE_100 = TEST_DIR+'output/pathlinker-ranked-edges-k100.txt'
+OUT_FILE_NATIVE = TEST_DIR+'output/pathlinker-ranked-edges-native.txt'
+# The container's ranked edges for the sample inputs with k=15
+CONTAINER_OUT_FILE = 'test/parse-outputs/input/pathlinker-raw-pathway.txt'
 
 
 class TestPathLinker:
@@ -37,6 +49,60 @@ class TestPathLinker:
                        args=PathLinkerParams(k=100))
         assert out_path.exists()
 
+    def test_pathlinker_native(self):
+        native_settings = ProcessedContainerSettings(backend=ExecutionBackend.native)
+        inputs = {"nodetypes": TEST_DIR+'input/sample-in-nodetypes.txt',
+                  "network": TEST_DIR+'input/sample-in-net.txt'}
+        PathLinker.run(inputs, output_file=OUT_FILE_NATIVE, args=PathLinkerParams(k=15),
+                       container_settings=native_settings)
+        native = pd.read_csv(OUT_FILE_NATIVE, sep='\t', dtype=str)
+        container = pd.read_csv(CONTAINER_OUT_FILE, sep='\t', dtype=str)
+        assert list(native.columns) == list(container.columns)
+
+        # Paths of equal cost can be found in any order, so an edge can have a different KSP index than in the
+        # container output, but the first path that contains it has the same cost
+        def edge_costs(df):
+            return sorted(df[['#tail', 'head', 'path cost']].itertuples(index=False, name=None))
+        assert edge_costs(native) == edge_costs(container)
+        # The KSP index of an edge has to be the index of one of the paths with that cost
+        costs = [f'{10 ** -cost:0.5e}' for cost, _ in find_paths(inputs['network'], inputs['nodetypes'], 15)]
+        for df in (native, container):
+            for rank, cost in zip(df['KSP index'].astype(int), df['path cost'], strict=True):
+                assert costs[rank - 1] == cost
+
+        # The edges for a smaller k are the edges of the first k paths for a larger k
+        with open(OUT_FILE_NATIVE) as f:
+            k15_lines = f.readlines()
+        PathLinker.run(inputs, output_file=OUT_FILE_NATIVE, args=PathLinkerParams(k=3),
+                       container_settings=native_settings)
+        with open(OUT_FILE_NATIVE) as f:
+            k3_lines = f.readlines()
+        assert k3_lines == [line for line in k15_lines if line.startswith('#') or int(line.split('\t')[2]) <= 3]
+
+    def test_pathlinker_native_matches_networkx(self):
+        # Paths of equal cost can be found in any order, so the paths are compared in groups of equal cost
+        def paths_by_cost(paths):
+            groups = defaultdict(set)
+            for cost, nodes in paths:
+                groups[round(cost, 6)].add(tuple(nodes))
+            return [groups[cost] for cost in sorted(groups)]
+
+        network_file = TEST_DIR + 'input/sample-in-net.txt'
+        node_file = TEST_DIR + 'input/sample-in-nodetypes.txt'
+        nodes = pd.read_csv(node_file, sep='\t', header=0, names=['node', 'type'])
+        sources = nodes.loc[nodes['type'] == 'source', 'node'].tolist()
+        targets = nodes.loc[nodes['type'] == 'target', 'node'].tolist()
+        graph = nx.DiGraph()
+        for tail, head, weight in read_network(network_file).itertuples(index=False):
+            if head not in sources and tail not in targets:
+                graph.add_edge(tail, head, weight=-math.log10(weight))
+        graph.add_edges_from([('source', source) for source in sources], weight=0)
+        graph.add_edges_from([(target, 'target') for target in targets], weight=0)
+        expected = [(nx.path_weight(graph, path, 'weight'), path[1:-1])
+                    for path in nx.shortest_simple_paths(graph, 'source', 'target', weight='weight')]
+
+        assert paths_by_cost(find_paths(network_file, node_file, 100)) == paths_by_cost(expected)
+
     def test_pathlinker_missing(self):
         # Test the expected error is raised when required arguments are missing
         with pytest.raises(ValueError):
@@ -2,10 +2,17 @@ import shutil
 from filecmp import cmp
 from pathlib import Path
 
+import networkx as nx
+import numpy as np
 import pytest
 
 import spras.config.config as config
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
+from spras.native.rwr import load_network, personalized_pagerank
 from spras.rwr import RWR, RWRParams
 
 config.init_from_file("config/config.yaml")
@@ -28,6 +35,38 @@ class TestRWR:
         expected_file = Path(TEST_DIR, 'expected_output', 'rwr-output.txt')
         assert cmp(OUT_FILE, expected_file, shallow=False), 'Output file does not match expected output file'
 
+    """
+    Run the RWR algorithm in process with the native backend, which writes the same output as the container
+    """
+    def test_rwr_native(self):
+        OUT_FILE.unlink(missing_ok=True)
+        RWR.run({"network": Path(TEST_DIR, 'input', 'rwr-network.txt'),
+                 "nodes": Path(TEST_DIR, 'input','rwr-nodes.txt')},
+                args=RWRParams(alpha=0.85, threshold=200),
+                output_file=OUT_FILE,
+                container_settings=ProcessedContainerSettings(backend=ExecutionBackend.native))
+        expected_file = Path(TEST_DIR, 'expected_output', 'rwr-output.txt')
+        assert cmp(OUT_FILE, expected_file, shallow=False), 'Output file does not match expected output file'
+
+    """
+    Solve several alphas in one block iteration and compare each column with networkx
+    """
+    def test_personalized_pagerank_alphas(self):
+        network_file = Path(TEST_DIR, 'input', 'rwr-network.txt')
+        network = load_network(network_file)
+        restart_nodes = ['A', 'C']
+        alphas = [0.5, 0.85, 0.99]
+        restarts = network.restart_matrix([restart_nodes] * len(alphas))
+        scores = personalized_pagerank(network, restarts, alphas)
+
+        graph = nx.read_edgelist(network_file, delimiter='|', create_using=nx.DiGraph, data=False)
+        for column, alpha in enumerate(alphas):
+            expected = nx.pagerank(graph, alpha=alpha, personalization={node: 1 for node in restart_nodes})
+            assert np.allclose(scores[:, column], [expected[node] for node in network.nodes])
+
+        # The parsed network is reused for the same unchanged file
+        assert load_network(network_file) is network
+
     """
     Run the RWR algorithm with a missing input file
     """
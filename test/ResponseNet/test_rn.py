@@ -5,7 +5,11 @@ from pathlib import Path
 import pytest
 
 import spras.config.config as config
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
 from spras.responsenet import ResponseNet, ResponseNetParams
 
 config.init_from_file("config/config.yaml")
@@ -41,6 +45,18 @@ class TestResponseNet:
 
         assert filecmp.cmp(OUT_FILE, EXPECTED_FILE_OPTIONAL, shallow=True)
 
+    @pytest.mark.parametrize('gamma, expected_file', [(10, EXPECTED_FILE), (1, EXPECTED_FILE_OPTIONAL),
+                                                      (20, EXPECTED_FILE)])
+    def test_responsenet_native(self, gamma, expected_file):
+        OUT_FILE.unlink(missing_ok=True)
+        ResponseNet.run({"sources": TEST_DIR / 'input' / 'rn-sources.txt',
+                         "targets": TEST_DIR / 'input' / 'rn-targets.txt',
+                         "edges": TEST_DIR / 'input' / 'rn-edges.txt'},
+                        output_file=OUT_FILE,
+                        args=ResponseNetParams(gamma=gamma),
+                        container_settings=ProcessedContainerSettings(backend=ExecutionBackend.native))
+        assert filecmp.cmp(OUT_FILE, expected_file, shallow=False)
+
     def test_mincostflow_missing(self):
         # Test the expected error is raised when required arguments are missing
         with pytest.raises(ValueError):
@@ -5,7 +5,11 @@ from pathlib import Path
 import pytest
 
 import spras.config.config as config
-from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.config.container_schema import (
+    ContainerFramework,
+    ExecutionBackend,
+    ProcessedContainerSettings,
+)
 from spras.strwr import ST_RWR, ST_RWRParams
 
 config.init_from_file("config/config.yaml")
@@ -30,6 +34,19 @@ class TestSTRWR:
         expected_file = Path(TEST_DIR, 'expected_output', 'strwr-output.txt')
         assert cmp(OUT_FILE, expected_file, shallow=False), 'Output file does not match expected output file'
 
+    """
+    Run the ST_RWR algorithm in process with the native backend, which writes the same output as the container
+    """
+    def test_strwr_native(self):
+        OUT_FILE.unlink(missing_ok=True)
+        ST_RWR.run({"network": Path(TEST_DIR, 'input', 'strwr-network.txt'),
+                    "sources": Path(TEST_DIR, 'input', 'strwr-sources.txt'),
+                    "targets": Path(TEST_DIR, 'input','strwr-targets.txt')},
+                   args=ST_RWRParams(alpha=0.85, threshold=200),
+                   output_file=OUT_FILE,
+                   container_settings=ProcessedContainerSettings(backend=ExecutionBackend.native))
+        assert cmp(OUT_FILE, EXPECTED_OUTPUT, shallow=False), 'Output file does not match expected output file'
+
     """
     Run the ST_RWR algorithm with a missing input file
     """
@@ -0,0 +1,77 @@
+from pathlib import Path
+from statistics import median
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from spras.analysis.graph_stats import NetworkStatistics, summary_statistics
+from spras.config.schema import SummaryPathLengths
+
+OUT_DIR = Path('test', 'analysis', 'output')
+
+
+def networkx_statistics(edges: list[tuple[str, str]]) -> list:
+    """
+    The summary table statistics computed with networkx the way the summary table used to
+    """
+    nw = nx.Graph()
+    nw.add_edges_from(edges)
+    cc = list(nx.connected_components(nw))
+    diameters = [nx.diameter(nw.subgraph(c).copy()) if len(c) > 1 else 0 for c in cc]
+    avg_path_lengths = [nx.average_shortest_path_length(nw.subgraph(c).copy()) if len(c) > 1 else 0.0 for c in cc]
+    degrees = [deg for _, deg in nw.degree()]
+    return [nw.number_of_nodes(), nw.number_of_edges(), nx.number_connected_components(nw),
+            nx.density(nw) if degrees else 0.0, max(degrees, default=0), median(degrees) if degrees else 0.0,
+            max(diameters, default=0), sum(avg_path_lengths) / len(avg_path_lengths) if avg_path_lengths else 0.0]
+
+
+def random_edges(seed: int, nodes: int, edges: int) -> list[tuple[str, str]]:
+    rng = np.random.default_rng(seed)
+    return [(f'N{u}', f'N{v}') for u, v in rng.integers(nodes, size=(edges, 2))]
+
+
+def write_pathway(edges: list[tuple[str, str]], name: str) -> Path:
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    pathway = OUT_DIR / name
+    with open(pathway, 'w') as f:
+        f.write('Node1\tNode2\tRank\tDirection\n')
+        f.writelines(f'{u}\t{v}\t1\tU\n' for u, v in edges)
+    return pathway
+
+
+class TestNetworkStatistics:
+    @pytest.mark.parametrize('seed', range(5))
+    def test_matches_networkx(self, seed):
+        # Sparse random graphs have several components, repeated edges and self loops
+        edges = random_edges(seed, 60, 70)
+        pathway = write_pathway(edges, f'graph-stats-{seed}.txt')
+        _, stats = summary_statistics(pathway)
+        # Compared as strings so the summary table values also have the same types
+        assert [str(stat) for stat in stats] == [str(stat) for stat in networkx_statistics(edges)]
+
+    def test_empty(self):
+        pathway = write_pathway([], 'graph-stats-empty.txt')
+        _, stats = summary_statistics(pathway)
+        assert stats == [0, 0, 0, 0.0, 0, 0.0, 0, 0.0]
+        # The density is written as 0.0 in the summary table
+        assert isinstance(stats[3], float)
+
+    def test_self_loop(self):
+        edges = [('A', 'A')]
+        pathway = write_pathway(edges, 'graph-stats-self-loop.txt')
+        _, stats = summary_statistics(pathway)
+        assert [str(stat) for stat in stats] == [str(stat) for stat in networkx_statistics(edges)]
+
+    def test_sampled(self):
+        edges = random_edges(0, 300, 900)
+        stats = NetworkStatistics([u for u, _ in edges], [v for _, v in edges])
+        exact_diameter, exact_length = stats.path_lengths()
+        # Components at or below the cutoff are always exact
+        assert stats.path_lengths(SummaryPathLengths.sampled, sampling_cutoff=1000) == (exact_diameter, exact_length)
+        # Sampling every node of the large component gives the exact values
+        assert stats.path_lengths(SummaryPathLengths.sampled, sampling_cutoff=10, samples=1000) == \
+            pytest.approx((exact_diameter, exact_length))
+        diameter, length = stats.path_lengths(SummaryPathLengths.sampled, sampling_cutoff=10, samples=50)
+        assert diameter <= exact_diameter
+        assert length == pytest.approx(exact_length, rel=0.1)
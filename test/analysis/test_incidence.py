@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from spras.analysis.incidence import PathwayNodeMatrix
+
+INPUT_DIR = Path('test', 'evaluate', 'input')
+FILE_PATHS = [INPUT_DIR / 'data-test-params-123' / 'pathway.txt', INPUT_DIR / 'data-test-params-456' / 'pathway.txt',
+              INPUT_DIR / 'data-test-params-789' / 'pathway.txt', INPUT_DIR / 'data-test-params-empty' / 'pathway.txt']
+
+
+class TestPathwayNodeMatrix:
+    def test_from_files(self):
+        node_matrix = PathwayNodeMatrix.from_files(FILE_PATHS)
+        assert sorted(node_matrix.nodes) == ['A', 'B', 'C', 'F', 'L', 'Q']
+        assert node_matrix.pathways == FILE_PATHS
+        # B is in two edges of the first pathway but is counted once
+        assert node_matrix.pathway_sizes().tolist() == [3, 2, 3, 0]
+
+    def test_overlap_counts(self):
+        node_matrix = PathwayNodeMatrix.from_files(FILE_PATHS)
+        mask = node_matrix.node_mask(['A', 'Q', 'Z'])
+        assert node_matrix.overlap_counts(mask).tolist() == [1, 0, 2, 0]
+        masks = np.column_stack([mask, node_matrix.node_mask(['F'])])
+        assert node_matrix.overlap_counts(masks).tolist() == [[1, 0], [0, 1], [2, 0], [0, 0]]
+
+    def test_select(self):
+        node_matrix = PathwayNodeMatrix.from_files(FILE_PATHS)
+        selected = node_matrix.select([FILE_PATHS[2], FILE_PATHS[0]])
+        assert selected.pathway_sizes().tolist() == [3, 3]
+        assert selected.overlap_counts(selected.node_mask(['Q'])).tolist() == [1, 0]
+
+    def test_property_counts(self):
+        node_matrix = PathwayNodeMatrix.from_node_lists(['p1', 'p2'], [['A', 'B', 'A'], ['C']])
+        node_table = pd.DataFrame({'NODEID': ['A', 'B', 'C', 'Z'], 'prize': [1.0, None, 0.5, 2.0],
+                                   'source': [True, True, None, True]})
+        mask = node_matrix.property_mask(node_table, ['prize', 'source'])
+        # Z is not in any pathway and B has no prize
+        assert mask.tolist() == [[True, True], [False, True], [True, False]]
+        assert node_matrix.overlap_counts(mask).tolist() == [[1, 2], [1, 0]]
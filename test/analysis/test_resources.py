@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spras.analysis.resources import (
+    USAGE_COLUMNS,
+    ResourceModel,
+    collect_resource_usage,
+    fit_upper_envelope,
+    summarize_usage_profile,
+)
+
+PROFILE_HEADER = 'peak_memory_bytes\tcpu_usage_usec\tcpu_user_usec\tcpu_system_usec\n'
+TIMESERIES_HEADER = 'elapsed_sec\tmemory_bytes\tcpu_usage_usec\tcpu_user_usec\tcpu_system_usec\tio_read_bytes\tio_write_bytes\n'
+
+
+def write_profile(run_dir, profile_rows, elapsed=None):
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / 'usage-profile.tsv').write_text(PROFILE_HEADER + ''.join('\t'.join(map(str, row)) + '\n' for row in profile_rows))
+    if elapsed is not None:
+        (run_dir / 'usage-timeseries.tsv').write_text(TIMESERIES_HEADER + ''.join(f'{e}\t1\t1\t1\t1\t1\t1\n' for e in elapsed))
+
+
+class TestResources:
+    def test_summarize_usage_profile(self, tmp_path):
+        # Two containers: the elapsed time restarts when the second one starts
+        write_profile(tmp_path, [[100, 2_000_000, 1_500_000, 500_000], [300, 1_000_000, 'N/A', 'N/A']],
+                      elapsed=[0.0, 1.0, 2.0, 0.0, 3.0])
+        usage = summarize_usage_profile(tmp_path)
+        assert usage['peak_memory_bytes'] == 300
+        assert usage['cpu_usage_usec'] == 3_000_000
+        assert usage['cpu_user_usec'] == 1_500_000
+        assert usage['wall_sec'] == 5.0
+
+    def test_summarize_usage_profile_not_profiled(self, tmp_path):
+        assert summarize_usage_profile(tmp_path) is None
+
+    def test_collect_resource_usage(self, tmp_path):
+        prepared_dir = tmp_path / 'prepared' / 'data0-pathlinker-inputs'
+        prepared_dir.mkdir(parents=True)
+        (prepared_dir / 'network.txt').write_text('A\tB\n')
+        write_profile(tmp_path / 'data0-pathlinker-params-ABC', [[100, 1_000_000, 1, 1]], elapsed=[0.0, 2.0])
+
+        algorithm_params = {'pathlinker': {'ABC': {'k': 10, '_spras_run_name': 'run'},
+                                           'DEF': {'k': 20, '_spras_run_name': 'run2'}}}
+        usage_df = collect_resource_usage(tmp_path, ['data0'], algorithm_params)
+
+        # Only the profiled job is included and the run name is not treated as a parameter
+        assert list(usage_df.columns) == USAGE_COLUMNS
+        assert len(usage_df) == 1
+        assert usage_df.loc[0, 'params'] == '{"k": 10}'
+        assert usage_df.loc[0, 'input_bytes'] == 4
+        assert np.isnan(usage_df.loc[0, 'network_nodes'])
+        # The parameter combinations are not modified
+        assert '_spras_run_name' in algorithm_params['pathlinker']['ABC']
+
+    def test_fit_upper_envelope(self):
+        x = np.array([1.0, 2.0, 3.0, 4.0])
+        y = np.array([2.0, 5.0, 5.0, 9.0])
+        slope, intercept = fit_upper_envelope(x, y)
+        assert slope > 0
+        assert np.all(slope * x + intercept >= y - 1e-9)
+
+        # A single job size gives a constant prediction
+        assert fit_upper_envelope(np.array([1.0, 1.0]), np.array([3.0, 4.0])) == (0.0, 4.0)
+
+    def test_resource_model(self, tmp_path):
+        usage_df = pd.DataFrame({
+            'algorithm': ['pathlinker', 'pathlinker'],
+            'input_bytes': [1_000_000, 2_000_000],
+            'peak_memory_bytes': [100_000_000, 200_000_000],
+            'cpu_usage_usec': [120_000_000, 240_000_000],
+            'wall_sec': [60.0, 120.0],
+        })
+        model = ResourceModel.fit(usage_df, headroom=1.5)
+        prediction = model.predict('pathlinker', 2_000_000)
+        assert prediction == {'threads': 2, 'mem_mb': 300, 'runtime': 3}
+        assert model.predict('omicsintegrator1', 2_000_000) == {}
+
+        model.to_file(tmp_path / 'resource-model.json')
+        loaded = ResourceModel.from_file(tmp_path / 'resource-model.json')
+        assert loaded.headroom == 1.5
+        assert loaded.predict('pathlinker', 2_000_000) == prediction
+
+    def test_resource_model_no_usage(self):
+        usage_df = pd.DataFrame({'algorithm': ['pathlinker'], 'input_bytes': [1.0], 'peak_memory_bytes': [np.nan],
+                                 'cpu_usage_usec': [np.nan], 'wall_sec': [np.nan]})
+        assert ResourceModel.fit(usage_df).predict('pathlinker', 1.0) == {'threads': 1}
+
+    @pytest.mark.parametrize('input_bytes', [0, 1e9])
+    def test_resource_model_minimum(self, input_bytes):
+        model = ResourceModel({'pathlinker': {'memory_slope': 0.0, 'memory_intercept': 0.0, 'threads': 1}})
+        assert model.predict('pathlinker', input_bytes)['mem_mb'] == 1
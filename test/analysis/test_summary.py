@@ -6,7 +6,9 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
+import spras.analysis.summary as summary
 import spras.config.config as config
+from spras.analysis.graph_stats import summary_statistics
 from spras.analysis.summary import summarize_networks
 from spras.config.dataset import DatasetSchema
 from spras.dataset import Dataset
@@ -103,6 +105,41 @@ class TestSummary:
 
         assert same_df
 
+    def test_parallel_and_cached(self, monkeypatch):
+        """Summaries computed in worker processes or read from the cache match the serial summary"""
+        file_paths = sorted(Path('test', 'evaluate', 'input').glob('data-test-params-*/pathway.txt'))
+        node_table = pd.DataFrame({'NODEID': ['A', 'B', 'F'], 'prize': [1.0, None, 2.0]})
+        algo_params = {'algo': {f'hash{i}': {'_spras_run_name': f'run{i}', 'k': i} for i in range(len(file_paths))}}
+        algo_with_params = [f'algo-params-hash{i}' for i in range(len(file_paths))]
+        cache_dir = OUT_DIR / 'summary-cache'
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+        def summarize(**kwargs):
+            return summarize_networks(file_paths, node_table, algo_params, algo_with_params, **kwargs)
+
+        serial = summarize()
+        # The parameter combinations are not modified, so the summary can be made again from the same dicts
+        assert all('_spras_run_name' in params for params in algo_params['algo'].values())
+        assert summarize(processes=2, cache_dir=cache_dir).equals(serial)
+        assert len(list(cache_dir.glob('*.json'))) == len(file_paths)
+
+        # Every pathway is read from the cache the second time
+        summarized = []
+        def count_summary_statistics(file_path, *args):
+            summarized.append(file_path)
+            return summary_statistics(file_path, *args)
+        monkeypatch.setattr(summary, 'summary_statistics', count_summary_statistics)
+        assert summarize(cache_dir=cache_dir).equals(serial)
+        assert summarized == []
+
+        # Different path length settings are cached separately
+        summarize(cache_dir=cache_dir, path_lengths='sampled')
+        assert summarized == file_paths
+        # Only the statistics of the latest summary are kept
+        assert len(list(cache_dir.glob('*.json'))) == len(file_paths)
+        summarize(cache_dir=cache_dir)
+        assert summarized == file_paths * 2
+
 
 # PurePosixPath will not convert the separators in strings
 def convert_path_posix(file_path: str) -> str:
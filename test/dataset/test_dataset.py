@@ -59,3 +59,4 @@ class TestDataset:
         ))
 
         assert len(dataset.get_interactome()) == 2
+        assert dataset.get_node_universe().tolist() == sorted(set(dataset.node_table['NODEID']))
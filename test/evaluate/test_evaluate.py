@@ -1,11 +1,15 @@
 import filecmp
 import pickle
+import warnings
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn.metrics import average_precision_score, precision_recall_curve
 
 import spras.analysis.ml as ml
+from spras.analysis.incidence import PathwayNodeMatrix
 from spras.config.dataset import DatasetSchema
 from spras.dataset import Dataset
 from spras.evaluation import Evaluation
@@ -15,6 +19,8 @@ OUT_DIR = 'test/evaluate/output/'
 EXPECT_DIR = 'test/evaluate/expected/'
 GS_NODE_TABLE = pd.read_csv(INPUT_DIR + 'gs_node_table.csv', header=0)
 SUMMARY_FILE = INPUT_DIR + 'example_summary.txt'
+GS_EDGES = Evaluation({'label': 'gs_edges', 'node_files': [], 'edge_files': ['gs_edges.txt'], 'data_dir': INPUT_DIR,
+                       'dataset_labels': ['toy']})
 
 
 class TestEvaluate:
@@ -55,6 +61,16 @@ class TestEvaluate:
         assert output.equals(expected)
         assert output_png.exists()
 
+    def test_node_precision_recall_shared_matrix(self):
+        file_paths = [INPUT_DIR + 'data-test-params-123/pathway.txt', INPUT_DIR + 'data-test-params-456/pathway.txt',
+                      INPUT_DIR + 'data-test-params-789/pathway.txt', INPUT_DIR + 'data-test-params-empty/pathway.txt']
+        node_matrix = PathwayNodeMatrix.from_files(file_paths)
+        # Evaluating some of the pathways from the shared matrix gives the same values as reading them
+        pr_df = Evaluation.node_precision_and_recall(file_paths[2:0:-1], GS_NODE_TABLE, node_matrix)
+        assert pr_df['Pathway'].tolist() == file_paths[2:0:-1]
+        assert pr_df.equals(Evaluation.node_precision_and_recall(file_paths[2:0:-1], GS_NODE_TABLE))
+        assert pr_df[['Precision', 'Recall']].values.tolist() == [[1.0, 0.75], [0.0, 0.0]]
+
     def test_node_precision_recall_per_pathway_empty(self):
 
         file_paths = [INPUT_DIR + 'data-test-params-empty/pathway.txt']
@@ -123,6 +139,31 @@ class TestEvaluate:
         assert chosen.equals(expected)
         assert output_png.exists()
 
+    def test_pca_chosen_pathway_top_n(self):
+        coordinates_files = []
+        for algorithm, rows in [('a', [['d-a-params-1', 1.0, 0.0], ['d-a-params-2', 0.0, 0.5], ['d-a-params-3', 0.5, 0.0]]),
+                                ('b', [['d-b-params-1', 3.0, 4.0], ['d-b-params-2', 0.0, 0.0], ['centroid', 0.0, 0.0]])]:
+            coordinates = pd.DataFrame(rows + [['kde_peak', 0.0, 0.0]], columns=['datapoint_labels', 'PC1', 'PC2'])
+            coordinates_file = Path(OUT_DIR, f'{algorithm}-pca-coordinates-top-n.txt')
+            coordinates.to_csv(coordinates_file, sep='\t', index=False)
+            coordinates_files.append(coordinates_file)
+        summary_file = Path(OUT_DIR, 'summary-top-n.txt')
+        pd.DataFrame({'Name': [f'out/d-{run}/pathway.txt' for run in ['a-params-1', 'a-params-2', 'a-params-3', 'b-params-1', 'b-params-2']],
+                      'Number of nodes': [2, 3, 2, 2, 2], 'Number of edges': [1, 2, 1, 1, 1]}).to_csv(summary_file, sep='\t', index=False)
+
+        # d-a-params-2 and d-a-params-3 are as close to the KDE peak, and d-a-params-3 has fewer edges
+        assert Evaluation.pca_chosen_pathway(coordinates_files, summary_file, 'out') == \
+            ['out/d-a-params-3/pathway.txt', 'out/d-b-params-2/pathway.txt']
+        assert Evaluation.pca_chosen_pathway(coordinates_files, summary_file, 'out', top_n=2) == \
+            ['out/d-a-params-3/pathway.txt', 'out/d-a-params-2/pathway.txt', 'out/d-b-params-2/pathway.txt', 'out/d-b-params-1/pathway.txt']
+        assert Evaluation.pca_chosen_pathway([], summary_file, 'out') == []
+
+    def test_ensemble_label(self):
+        assert Evaluation.ensemble_label('output/data0-ml/ensemble-pathway.txt') == 'ensemble'
+        assert Evaluation.ensemble_label('output/data0-ml/pathlinker-ensemble-pathway.txt') == 'pathlinker'
+        assert Evaluation.ensemble_label('output/data0-ml/my-algo-ensemble-pathway.txt') == 'my-algo'
+        assert Evaluation.ensemble_label(INPUT_DIR + 'empty-ensemble-network.tsv') == 'empty'
+
     def test_node_ensemble(self):
         out_path_file = Path(OUT_DIR + 'node-ensemble.csv')
         out_path_file.unlink(missing_ok=True)
@@ -132,6 +173,20 @@ class TestEvaluate:
         node_ensemble_dict['ensemble'].to_csv(out_path_file, sep='\t', index=False)
         assert filecmp.cmp(out_path_file, EXPECT_DIR + 'expected-node-ensemble.csv', shallow=False)
 
+    def test_node_ensemble_outside_interactome(self):
+        # Gold standard nodes that are not in the interactome are in the node universe with frequency 0
+        node_table = pd.DataFrame({'NODEID': ['A', 'AA']})
+        dataset = Dataset.from_file(OUT_DIR + 'data.pickle')
+        # A dataset pickled without a node universe computes it from the interactome
+        del dataset.node_universe
+        out_dataset = Path(OUT_DIR, 'data-no-universe.pickle')
+        dataset.to_file(out_dataset)
+        node_ensemble_dict = Evaluation.edge_frequency_node_ensemble(node_table, [INPUT_DIR + 'ensemble-network.tsv'],
+                                                                     str(out_dataset))
+        node_ensemble = node_ensemble_dict['ensemble']
+        assert node_ensemble['Node'].tolist()[:3] == ['A', 'AA', 'B']
+        assert node_ensemble.set_index('Node').loc[['A', 'AA', 'Q', 'R'], 'Frequency'].tolist() == [0.5, 0.0, 0.01, 0.01]
+
     def test_empty_node_ensemble(self):
         out_path_file = Path(OUT_DIR + 'empty-node-ensemble.csv')
         out_path_file.unlink(missing_ok=True)
@@ -155,6 +210,22 @@ class TestEvaluate:
         node_ensemble_dict['empty'].to_csv(out_path_empty_file, sep='\t', index=False)
         assert filecmp.cmp(out_path_empty_file, EXPECT_DIR + 'expected-empty-node-ensemble.csv', shallow=False)
 
+    @pytest.mark.parametrize('positive_fraction', [0.0, 0.1, 1.0])
+    def test_precision_recall_curve_matches_sklearn(self, positive_fraction):
+        rng = np.random.default_rng(7)
+        y_true = (rng.random(500) < positive_fraction).astype(int)
+        # rounded scores have ties, like ensemble frequencies
+        y_scores = rng.random(500).round(2)
+        precision, recall, thresholds, avg_precision = Evaluation.precision_recall_curve(y_true, y_scores)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected_precision, expected_recall, expected_thresholds = precision_recall_curve(y_true, y_scores)
+            expected_avg_precision = average_precision_score(y_true, y_scores)
+        assert np.array_equal(precision, expected_precision)
+        assert np.array_equal(recall, expected_recall)
+        assert np.array_equal(thresholds, expected_thresholds)
+        assert avg_precision == expected_avg_precision
+
     def test_precision_recall_curve_ensemble_nodes(self):
         out_path_png = Path(OUT_DIR + 'pr-curve-ensemble-nodes.png')
         out_path_png.unlink(missing_ok=True)
@@ -191,3 +262,69 @@ class TestEvaluate:
                                                         out_path_file, True)
         assert out_path_png.exists()
         assert filecmp.cmp(out_path_file, EXPECT_DIR + 'expected-pr-curve-multiple-ensemble-nodes.txt', shallow=False)
+
+    def test_edge_precision_recall_per_pathway(self):
+        file_paths = [INPUT_DIR + 'data-test-params-123/pathway.txt', INPUT_DIR + 'data-test-params-456/pathway.txt',
+                      INPUT_DIR + 'data-test-params-789/pathway.txt', INPUT_DIR + 'data-test-params-empty/pathway.txt']
+        output_file = Path(OUT_DIR + 'pr-per-pathway-edges.txt')
+        output_png = Path(OUT_DIR + 'pr-per-pathway-edges.png')
+        output_file.unlink(missing_ok=True)
+        output_png.unlink(missing_ok=True)
+
+        pr_df = Evaluation.edge_precision_and_recall(file_paths, GS_EDGES.edge_tables())
+        pr = {(row.Edge_Directionality, row.Pathway): (row.Precision, row.Recall) for row in pr_df.itertuples()}
+        # The gold standard has A-B undirected and C->B and B->Q directed
+        # Only A-B matches in the mixed comparison
+        assert pr[('mixed', file_paths[0])] == pytest.approx((0.5, 1 / 3))
+        assert pr[('mixed', file_paths[2])] == pytest.approx((0.5, 1 / 3))
+        # B-C and B-Q match once directions are ignored
+        assert pr[('undirected', file_paths[0])] == pytest.approx((1.0, 2 / 3))
+        # A-B and B-C predict four directed edges, of which three are in the directed gold standard
+        assert pr[('directed', file_paths[0])] == pytest.approx((0.75, 0.75))
+        for directionality in ['mixed', 'undirected', 'directed']:
+            assert pr[(directionality, file_paths[1])] == (0.0, 0.0)
+            assert pr[(directionality, file_paths[3])] == (0.0, 0.0)
+
+        Evaluation.precision_and_recall_per_pathway_edges(pr_df, output_file, output_png)
+        assert pd.read_csv(output_file, sep='\t', header=0).columns.tolist() == ['Pathway', 'Edge_Directionality', 'Precision', 'Recall']
+        assert output_png.exists()
+
+    def test_edge_precision_recall_node_order(self):
+        # Undirected edges match whichever order their nodes are written in
+        out_pathway = Path(OUT_DIR, 'data-test-params-reversed', 'pathway.txt')
+        out_pathway.parent.mkdir(parents=True, exist_ok=True)
+        out_pathway.write_text('Node1\tNode2\tRank\tDirection\nB\tA\t1\tU\nQ\tB\t1\tD\n')
+        pr_df = Evaluation.edge_precision_and_recall([out_pathway], GS_EDGES.edge_tables())
+        pr = dict(zip(pr_df['Edge_Directionality'], pr_df[['Precision', 'Recall']].values.tolist(), strict=True))
+        assert pr['mixed'] == pytest.approx([0.5, 1 / 3])
+        assert pr['undirected'] == pytest.approx([1.0, 2 / 3])
+        assert pr['directed'] == pytest.approx([2 / 3, 0.5])
+
+    def test_edge_ensemble(self):
+        ensemble_network = [INPUT_DIR + 'ensemble-network.tsv']
+        input_network = OUT_DIR + 'data.pickle'
+        edge_ensembles = Evaluation.edge_frequency_edge_ensemble(GS_EDGES.edge_tables(), ensemble_network, input_network)
+        mixed = edge_ensembles['ensemble']
+        mixed = mixed[mixed['Edge_Directionality'] == 'mixed'].set_index(['Node1', 'Node2', 'Direction'])
+        # The repeated A-B edge keeps its highest frequency and gold standard edges missing from the ensemble have 0
+        assert mixed.loc[('A', 'B', 'U'), 'Frequency'] == 0.5
+        assert mixed.loc[('C', 'B', 'D'), 'Frequency'] == 0.0
+        assert mixed['Gold_Standard'].sum() == 3
+        # 25 interactome edges, the 2 directed gold standard edges and the Z-X ensemble edge
+        assert len(mixed) == 28
+        assert mixed.loc[('X', 'Z', 'U'), 'Frequency'] == 0.66
+
+        out_path_png = Path(OUT_DIR + 'pr-curve-ensemble-edges.png')
+        out_path_png.unlink(missing_ok=True)
+        out_path_file = Path(OUT_DIR + 'pr-curve-ensemble-edges.txt')
+        out_path_file.unlink(missing_ok=True)
+        Evaluation.precision_recall_curve_edge_ensemble(edge_ensembles, out_path_png, out_path_file)
+        assert out_path_png.exists()
+        prc = pd.read_csv(out_path_file, sep='\t', header=0)
+        assert prc['Edge_Directionality'].unique().tolist() == ['mixed', 'undirected', 'directed']
+        assert prc['Average_Precision'].notna().sum() == 3
+        assert prc.loc[prc['Baseline'].notna(), 'Baseline'].tolist() == pytest.approx([3 / 28, 3 / 27, 4 / 53])
+        # The average precision is the one scikit-learn computes for the same edges
+        expected_ap = [average_precision_score(edges['Gold_Standard'], edges['Frequency'])
+                       for _, edges in edge_ensembles['ensemble'].groupby('Edge_Directionality', sort=False)]
+        assert prc['Average_Precision'].dropna().tolist() == pytest.approx(expected_ap)
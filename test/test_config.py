@@ -6,7 +6,8 @@ import pytest
 from pydantic import BaseModel
 
 import spras.config.config as config
-from spras.config.container_schema import DEFAULT_CONTAINER_PREFIX
+from spras.config.container_schema import DEFAULT_CONTAINER_PREFIX, ExecutionBackend
+from spras.config.params import ParameterTable, RunCatalog, run_algorithms
 from spras.config.schema import DEFAULT_HASH_LENGTH
 from spras.meo import MEOParams
 from spras.mincostflow import MinCostFlowParams
@@ -251,6 +252,46 @@ class TestConfig:
         with pytest.raises(ValueError, match="Unknown algorithm name 'typo_algo'"):
             config.init_global(test_config)
 
+    def test_config_container_execution(self):
+        test_config = get_test_config()
+        config.init_global(test_config)
+        assert config.config.container_settings.execution == {}
+        params_before = copy.deepcopy(config.config.algorithm_params)
+
+        test_config["containers"]["execution"] = {"omicsintegrator1": {"processes": 4, "threads": 2},
+                                                  "domino": {"visualization": False}}
+        config.init_global(test_config)
+        execution = config.config.container_settings.execution["omicsintegrator1"]
+        assert (execution.processes, execution.threads, execution.cores) == (4, 2, 8)
+        assert not config.config.container_settings.execution["domino"].visualization
+        # Processes, threads and visualization are not parameters, so the parameter hashes do not change
+        assert config.config.algorithm_params == params_before
+
+        test_config["containers"]["execution"] = {"omicsintegrator3": {"processes": 4}}
+        with pytest.raises(ValueError, match="Unknown algorithm name 'omicsintegrator3' in configured containers.execution"):
+            config.init_global(test_config)
+
+    def test_config_container_backends(self):
+        test_config = get_test_config()
+        config.init_global(test_config)
+        assert config.config.container_settings.backends == {}
+        assert config.config.container_settings.backend == ExecutionBackend.container
+
+        test_config["containers"]["backends"] = {"rwr": "Native", "strwr": "container"}
+        config.init_global(test_config)
+        assert config.config.container_settings.backends == {"rwr": ExecutionBackend.native,
+                                                             "strwr": ExecutionBackend.container}
+
+    def test_config_container_backends_unavailable(self):
+        test_config = get_test_config()
+        test_config["containers"]["backends"] = {"meo": "native"}
+        with pytest.raises(ValueError, match="native backend configured in containers.backends is not available for 'meo'"):
+            config.init_global(test_config)
+
+        test_config["containers"]["backends"] = {"typo_algo": "native"}
+        with pytest.raises(ValueError, match="Unknown algorithm name 'typo_algo'"):
+            config.init_global(test_config)
+
     def test_error_dataset_label(self):
         test_config = get_test_config()
         error_test_dicts = [{"label": "test$"}, {"label": "@test'"}, {"label": "[test]"}, {"label": "test-test"},
@@ -337,6 +378,55 @@ class TestConfig:
             MEOParams(local_search=False, max_path_length=2)
         ])
 
+    def test_config_parameter_table(self):
+        test_config = get_test_config()
+        config.init_global(test_config)
+        parameter_table = config.config.parameter_table
+
+        labels = [f'{algorithm}-params-{params_hash}' for algorithm, param_combos in config.config.algorithm_params.items()
+                  for params_hash in param_combos]
+        assert parameter_table.labels == labels
+        assert parameter_table.algorithms == list(config.config.algorithm_params)
+        for combination in parameter_table:
+            params = config.config.algorithm_params[combination.algorithm][combination.params_hash]
+            assert combination.run_name == params["_spras_run_name"]
+            assert combination.params == {k: v for k, v in params.items() if k != "_spras_run_name"}
+            assert parameter_table.get(combination.algorithm, combination.params_hash) is combination
+
+    def test_config_run_catalog(self):
+        test_config = get_test_config()
+        config.init_global(test_config)
+        run_catalog = config.config.run_catalog
+        out_dir = config.config.out_dir
+
+        labels = config.config.parameter_table.labels
+        assert run_catalog.pathways() == [f'{out_dir}/{dataset}-{label}/pathway.txt'
+                                          for dataset in config.config.datasets for label in labels]
+        for algorithm in config.config.algorithm_params:
+            runs = run_catalog.select(algorithm=algorithm)
+            assert [run.combination.label for run in runs] == \
+                [label for label in labels if config.config.parameter_table[label].algorithm == algorithm] * len(config.config.datasets)
+            assert run_algorithms([run.pathway for run in runs], run_catalog) == [algorithm] * len(runs)
+
+    def test_run_catalog_names_with_dashes(self):
+        parameter_table = ParameterTable({'my-algo': {'abc': {'k': 1}}, 'algo': {'def': {}}})
+        run_catalog = RunCatalog('output', ['data-0', 'data1'], parameter_table)
+
+        assert run_catalog.pathways('data-0', 'my-algo') == ['output/data-0-my-algo-params-abc/pathway.txt']
+        assert run_catalog.pathways(algorithm='algo') == ['output/data-0-algo-params-def/pathway.txt',
+                                                          'output/data1-algo-params-def/pathway.txt']
+        assert run_catalog.select('data2') == []
+        run = run_catalog.find('output/data-0-my-algo-params-abc/pathway.txt')
+        assert (run.dataset, run.algorithm, run.params_hash) == ('data-0', 'my-algo', 'abc')
+        assert run_catalog.find('data1-my-algo-params-abc') is run_catalog['data1-my-algo-params-abc']
+        with pytest.raises(KeyError):
+            run_catalog.find('output/data1-other-params-abc/pathway.txt')
+
+        runs = ['data-0-my-algo-params-abc', 'output/data-0-algo-params-def/pathway.txt']
+        assert run_algorithms(runs, run_catalog) == ['my-algo', 'algo']
+        # Without a catalog, only the dataset label must not contain '-'
+        assert run_algorithms(['data1-my-algo-params-abc', 'output/data1-algo-params-def/pathway.txt']) == ['my-algo', 'algo']
+
     @pytest.mark.parametrize("ml_include, eval_include, expected_ml, expected_eval", [
         (True, True, True, True),
         (True, False, True, False),
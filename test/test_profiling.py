@@ -0,0 +1,148 @@
+"""
+Tests for the resource samplers in spras/profiling.py.
+The cgroup interface files are faked in a temporary directory and the containers are mocked,
+so neither cgroups nor Docker are needed.
+"""
+import csv
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from spras.config.container_schema import ContainerFramework, ProcessedContainerSettings
+from spras.containers import ResolvedImage, run_container_singularity
+from spras.profiling import (
+    TIMESERIES_HEADER,
+    CgroupSampler,
+    DockerStatsSampler,
+    ProcessCgroupSampler,
+    create_sampled_container_stats,
+    read_io_stat,
+    write_usage_timeseries,
+)
+
+
+def write_fake_cgroup(path, memory, peak=None):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "memory.current").write_text(f"{memory}\n")
+    if peak is not None:
+        (path / "memory.peak").write_text(f"{peak}\n")
+    (path / "cpu.stat").write_text("usage_usec 3000\nuser_usec 2000\nsystem_usec 1000\nnr_periods 0\n")
+    (path / "io.stat").write_text("8:0 rbytes=100 wbytes=20 rios=1 wios=2 dbytes=0 dios=0\n"
+                                  "8:16 rbytes=5 wbytes=1 rios=1 wios=1 dbytes=0 dios=0\n")
+
+
+class TestProfiling:
+    def test_read_io_stat(self, tmp_path):
+        write_fake_cgroup(tmp_path, 1)
+        assert read_io_stat(str(tmp_path / "io.stat")) == (105, 21)
+
+    def test_cgroup_sampler(self, tmp_path):
+        write_fake_cgroup(tmp_path, 4096)
+        with CgroupSampler(str(tmp_path), 0.01) as sampler:
+            time.sleep(0.05)
+        assert len(sampler.samples) >= 1
+        assert sampler.samples[0][1:] == ["4096", "3000", "2000", "1000", 105, 21]
+        elapsed = [row[0] for row in sampler.samples]
+        assert elapsed == sorted(elapsed)
+
+    def test_cgroup_sampler_missing_cgroup(self, tmp_path):
+        # No samples are recorded until the cgroup interface files exist
+        with CgroupSampler(str(tmp_path / "missing"), 0.01) as sampler:
+            time.sleep(0.03)
+        assert sampler.samples == []
+
+    def test_docker_stats_sampler(self):
+        container = MagicMock()
+        container.stats.return_value = {
+            "memory_stats": {"usage": 2048},
+            "cpu_stats": {"cpu_usage": {"total_usage": 5_000_000, "usage_in_usermode": 4_000_000, "usage_in_kernelmode": 1_000_000}},
+            "blkio_stats": {"io_service_bytes_recursive": [
+                {"major": 8, "minor": 0, "op": "read", "value": 10},
+                {"major": 8, "minor": 0, "op": "write", "value": 3},
+                {"major": 8, "minor": 0, "op": "total", "value": 13},
+            ]},
+        }
+        sampler = DockerStatsSampler(container, 1)
+        assert sampler.sample() == [2048, 5000, 4000, 1000, 10, 3]
+
+        # Exited containers report empty memory stats
+        container.stats.return_value = {"memory_stats": {}}
+        assert sampler.sample() is None
+
+    def test_invalid_interval(self, tmp_path):
+        with pytest.raises(ValueError):
+            CgroupSampler(str(tmp_path), 0)
+
+    def test_write_usage_timeseries(self, tmp_path):
+        write_usage_timeseries([[0.0, 1, 2, 3, 4, 5, 6]], str(tmp_path))
+        write_usage_timeseries([[0.0, 7, 8, 9, 10, 11, 12]], str(tmp_path))
+        with open(tmp_path / "usage-timeseries.tsv") as f:
+            rows = list(csv.reader(f, delimiter="\t"))
+        # The header is only written once even though two containers were profiled
+        assert rows[0] == TIMESERIES_HEADER
+        assert len(rows) == 3
+
+    def test_cgroup_sampler_peak(self, tmp_path):
+        write_fake_cgroup(tmp_path, 4096, peak=8192)
+        sampler = CgroupSampler(str(tmp_path), 1)
+        sampler._record()
+        # memory.peak is preferred over the sampled memory.current values
+        assert sampler.peak_memory == 8192
+
+    def test_process_cgroup_sampler(self, tmp_path):
+        scope = tmp_path / "app.slice" / "spras-1.scope"
+        write_fake_cgroup(scope, 100)
+        sampler = ProcessCgroupSampler(1, "spras-1.scope", 1)
+
+        # Until the process has moved into the scope, its cgroup is never sampled
+        with patch("spras.profiling.get_process_cgroup", return_value=str(tmp_path / "app.slice")):
+            sampler._record()
+        assert sampler.samples == []
+
+        with patch("spras.profiling.get_process_cgroup", return_value=str(scope)):
+            sampler._record()
+        assert sampler.samples[0][1] == "100"
+
+        # Exited processes are skipped rather than raising
+        with patch("spras.profiling.get_process_cgroup", side_effect=FileNotFoundError):
+            assert sampler.sample() is None
+
+    def test_create_sampled_container_stats(self, tmp_path):
+        container = MagicMock()
+        sampler = DockerStatsSampler(container, 1)
+        for usage, cpu in [(100, 1_000_000), (300, 2_000_000), (200, 4_000_000)]:
+            container.stats.return_value = {
+                "memory_stats": {"usage": usage},
+                "cpu_stats": {"cpu_usage": {"total_usage": cpu, "usage_in_usermode": cpu // 2, "usage_in_kernelmode": cpu // 2}},
+            }
+            sampler._record()
+
+        create_sampled_container_stats(sampler, str(tmp_path))
+        with open(tmp_path / "usage-profile.tsv") as f:
+            rows = list(csv.reader(f, delimiter="\t"))
+        assert rows == [["peak_memory_bytes", "cpu_usage_usec", "cpu_user_usec", "cpu_system_usec"],
+                        ["300", "4000", "2000", "2000"]]
+
+    def test_create_sampled_container_stats_no_samples(self, tmp_path):
+        create_sampled_container_stats(DockerStatsSampler(MagicMock(), 1), str(tmp_path))
+        assert os.path.exists(tmp_path / "usage-profile.tsv")
+        with open(tmp_path / "usage-profile.tsv") as f:
+            rows = list(csv.reader(f, delimiter="\t"))
+        assert rows[1] == ["N/A", "N/A", "N/A", "N/A"]
+
+    def test_singularity_unprofiled_without_cgroup(self, tmp_path):
+        # Without a peer cgroup or a systemd scope, the container runs without profiling instead of failing
+        settings = ProcessedContainerSettings(framework=ContainerFramework.apptainer, enable_profiling=True)
+        with patch("spras.containers.create_peer_cgroup", return_value=None), \
+                patch("spras.containers.create_delegated_scope_command", return_value=None), \
+                patch("spras.containers._prepare_singularity_image", return_value="image.sif"), \
+                patch("spras.containers.platform.system", return_value="Linux"), \
+                patch("spython.main.Client.execute", return_value={"message": ["done"], "return_code": 0}) as execute:
+            with pytest.warns(UserWarning, match="without profiling"):
+                result = run_container_singularity(ResolvedImage(image="image", is_local_sif=False), ["echo"], [],
+                                                   "/spras", str(tmp_path), settings)
+        assert result == {"message": ["done"], "return_code": 0}
+        execute.assert_called_once()
+        assert not os.path.exists(tmp_path / "usage-profile.tsv")
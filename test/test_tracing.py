@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from spras import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    trace_file = tmp_path / 'logs' / 'trace.jsonl'
+    tracing.configure_tracing(trace_file)
+    yield trace_file
+    tracing.configure_tracing(None)
+
+
+class TestTracing:
+    def test_span_disabled(self, tmp_path):
+        tracing.configure_tracing(None)
+        with tracing.span('run') as args:
+            args['extra'] = 1
+        assert not tracing.tracing_enabled()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_nested_spans(self, trace_file):
+        with tracing.span('run', algorithm='pathlinker'):
+            with tracing.span('container_run', 'container') as args:
+                args['exit_status'] = 0
+
+        events = tracing.read_trace(trace_file)
+        # Inner spans finish first
+        assert [event['name'] for event in events] == ['container_run', 'run']
+        inner, outer = events
+        assert inner['cat'] == 'container'
+        assert inner['args'] == {'exit_status': 0}
+        assert outer['args'] == {'algorithm': 'pathlinker'}
+        # The start and end of every span are read from the same clock, so nested spans nest exactly
+        assert outer['ts'] <= inner['ts']
+        assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+    def test_span_error(self, trace_file):
+        with pytest.raises(ValueError), tracing.span('parse_output'):
+            raise ValueError('bad output')
+        assert tracing.read_trace(trace_file)[0]['args'] == {'error': 'ValueError'}
+
+    def test_read_trace_partial_line(self, trace_file):
+        with tracing.span('merge_input'):
+            pass
+        with open(trace_file, 'a') as f:
+            f.write('{"name": "run", "ts"')
+        assert len(tracing.read_trace(trace_file)) == 1
+
+    def test_export_chrome_trace(self, trace_file, tmp_path):
+        with tracing.span('run'):
+            with tracing.span('container_run', 'container'):
+                pass
+        output_file = tmp_path / 'trace.json'
+        tracing.export_chrome_trace(trace_file, output_file)
+
+        with open(output_file) as f:
+            trace = json.load(f)
+        metadata = [event for event in trace['traceEvents'] if event['ph'] == 'M']
+        spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+        assert len(metadata) == 1
+        # Spans are ordered by start time with the enclosing span first, and the trace starts at 0
+        assert [event['name'] for event in spans] == ['run', 'container_run']
+        assert spans[0]['ts'] == 0
@@ -1,10 +1,16 @@
-from pathlib import PurePosixPath, PureWindowsPath
+from pathlib import Path, PurePosixPath, PureWindowsPath
 
 import pytest
 
 import spras.config.config as config
 from spras.config.container_schema import ProcessedContainerSettings
-from spras.containers import convert_docker_path, prepare_path_docker, prepare_volume
+from spras.containers import (
+    VolumePlanner,
+    convert_docker_path,
+    prepare_path_docker,
+    prepare_volume,
+    unique_bind_paths,
+)
 from spras.util import hash_params_sha1_base32
 
 config.init_from_file("config/config.yaml")
@@ -45,6 +51,31 @@ class TestUtil:
         _, container_filename = prepare_volume(filename, volume_base, ProcessedContainerSettings())
         assert container_filename == expected_filename
 
+    def test_volume_planner(self):
+        volumes = VolumePlanner('/spras', ProcessedContainerSettings())
+        edges = volumes.add('test/OmicsIntegrator1/input/oi1-edges.txt')
+        prizes = volumes.add('test/OmicsIntegrator1/input/oi1-prizes.txt')
+        input_dir = volumes.add('test/OmicsIntegrator1/input')
+        out_file = volumes.add('test/OmicsIntegrator1/output/oi1-configuration.txt')
+
+        # Files in the same directory share a single bind of that directory
+        assert volumes.binds == [(Path('test/OmicsIntegrator1/input').resolve(), PurePosixPath(input_dir)),
+                                 (Path('test/OmicsIntegrator1/output').resolve(), PurePosixPath(out_file).parent)]
+        assert edges == input_dir + '/oi1-edges.txt'
+        assert prizes == input_dir + '/oi1-prizes.txt'
+        # The hash is derived from the path relative to the working directory, so it does not depend on the checkout
+        assert input_dir == '/spras/KUVJRJR/input'
+
+    def test_volume_planner_relative_base(self):
+        with pytest.raises(ValueError):
+            VolumePlanner('spras', ProcessedContainerSettings())
+
+    def test_unique_bind_paths(self):
+        volumes = [(PurePosixPath('/data'), PurePosixPath('/spras/A/data')),
+                   (PurePosixPath('/out'), PurePosixPath('/spras/B/out')),
+                   (PurePosixPath('/data'), PurePosixPath('/spras/A/data'))]
+        assert unique_bind_paths(volumes) == ['/data:/spras/A/data', '/out:/spras/B/out']
+
     def test_convert_docker_path(self):
         src_path = PureWindowsPath(r'C:/Users/admin/spras/test/OmicsIntegrator1/output/')
         dest_path = PurePosixPath('/spras/FQAXPPD/output')